@@ -1,17 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 import json
-from collections import defaultdict
-from langchain_community.vectorstores import Chroma
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import base64
 import os
+import asyncio
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
-from openai import OpenAI
-from groq import Groq
-from typing import List, Optional
+from typing import List, Literal, Optional
+from recarga import Recargador
+from catalogo import LIMITE_PAGINA, codificar_cursor, proyectar
+from busqueda import (agrupar_por_empleo, analizador_para, candidatos_por_facetas, fusion_rrf, indice_bm25_para,
+                      priorizar_facetas, separar_facetas)
+from indice_vectorial import (ARCHIVO_METADATOS, INDICE_VECTORIAL, INDICE_PLANO_PATH, IndiceChroma,
+                              abrir_indice_local, eliminar_indices_planos_antiguos, esperar_listo,
+                              guardar_indice_plano, marcar_listo)
+from serializacion import comprimir_para, dumps
+from indexador import (MODELO_EMBEDDINGS, EMBED_LOTE, EMBED_CACHE_PATH, PipelineEmbeddings,
+                       clonar_coleccion, sincronizar_coleccion)
+from cache import CacheEmbeddings, CacheTTL, EmbeddingsConCache, crear_cache_respuestas
+from texto import normalizar_consulta
+from proveedores import RouterProveedores, crear_proveedores
+from servicio_embeddings import EMBED_CLAVE, EMBED_SERVIDOR, EmbeddingsRemotos, ServidorEmbeddings
 
 # Cargar variables de entorno
 load_dotenv()
@@ -35,6 +50,10 @@ app.add_middleware(
 # Modelos Pydantic
 class ChatRequest(BaseModel):
     mensaje: str
+    # Modo de búsqueda: "vector", "bm25" o "hibrido" (por defecto MODO_BUSQUEDA)
+    mode: Optional[Literal["vector", "bm25", "hibrido"]] = None
+    # Cantidad de empleos distintos a devolver (por defecto EMPLEOS_POR_RESPUESTA)
+    n: Optional[int] = Field(None, ge=1, le=10)
 
 class ChatResponse(BaseModel):
     respuesta: str
@@ -48,149 +67,282 @@ class HealthResponse(BaseModel):
     status: str
     message: str
 
+class RecargaResponse(BaseModel):
+    iniciada: bool
+    recargando: bool
+    version: str
+    error: Optional[str] = None
+
 
 # Variables globales
-vectorstore = None
 embeddings = None
-conversaciones = defaultdict(list)
+embeddings_consulta = None
+pipeline_embeddings = None
 VECTORSTORE_PATH = "./data/chroma_db"
-# Configuración de APIs
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-# Inicializar clientes
-openai_client = None
-groq_client = None
-
-if GROQ_API_KEY and GROQ_API_KEY != "tu_api_key_de_groq_aqui":
-    groq_client = Groq(api_key=GROQ_API_KEY)
-
-if OPENAI_API_KEY and OPENAI_API_KEY != "tu_api_key_de_openai_aqui":
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-
-def cargar_empleos():
-    """Carga los empleos del archivo JSON"""
-    try:
-        with open("jobs_for_chatbot.json", "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        print("No se encontró jobs_for_chatbot.json")
-        return []
-
-
-def crear_documento_empleo(empleo):
-    """Crea un documento LangChain para un empleo individual"""
-    
-    # Función auxiliar para manejar listas con valores None
-    def safe_join_lista(lista, separador=", "):
-        if not lista:
-            return "No especificado"
-        # Filtrar valores None y convertir a string
-        elementos_limpios = [str(item) for item in lista if item is not None and str(item).strip()]
-        return separador.join(elementos_limpios) if elementos_limpios else "No especificado"
-    
-    # Crear contenido del documento
-    contenido = f"""
-    Título: {empleo.get('title', 'Sin título')}
-    Empresa: {empleo.get('company', 'Sin empresa')}
-    Ubicación: {empleo.get('location', 'Sin ubicación')}
-    Tipo de empleo: {empleo.get('job_type', 'Sin especificar')}
-    Salario: {empleo.get('salary_info', 'No especificado')}
-
-    Descripción:
-    {empleo.get('description', 'Sin descripción')}
-
-    Requisitos:
-    {empleo.get('requirements', 'Sin requisitos')}
-
-    Información adicional:
-    - Email: {empleo.get('contact_email', 'No especificado')}
-    - Remoto: {empleo.get('remote_type', 'No especificado')}
-    - Nivel de experiencia: {empleo.get('experience_level', 'No especificado')}
-    - Nivel de educación: {empleo.get('education_level', 'No especificado')}
-    - Carreras requeridas: {safe_join_lista(empleo.get('majors', []))}
-    - Idiomas: {safe_join_lista(empleo.get('languages', []))}
-    - Número de vacantes: {empleo.get('vacancies', 'No especificado')}
-    - Horas por semana: {empleo.get('hours_per_week', 'No especificado')}
-    """
-
-    # Crear metadatos para el documento
-    metadatos = {
-        "id": empleo.get('id', ''),
-        "visual_id": empleo.get('visual_id', ''),
-        "title": empleo.get('title', ''),
-        "company": empleo.get('company', ''),
-        "location": empleo.get('location', ''),
-        "job_type": empleo.get('job_type', ''),
-        "salary_info": empleo.get('salary_info', ''),
-        "contact_email": empleo.get('contact_email', ''),
-        "remote_type": empleo.get('remote_type', ''),
-        "experience_level": empleo.get('experience_level', ''),
-        "education_level": empleo.get('education_level', ''),
-        "majors": safe_join_lista(empleo.get('majors', [])),
-        "languages": safe_join_lista(empleo.get('languages', [])),
-        "vacancies": empleo.get('vacancies', ''),
-        "hours_per_week": empleo.get('hours_per_week', ''),
-        "start_date": empleo.get('start_date', ''),
-        "end_date": empleo.get('end_date', ''),
-        "tipo_documento": "empleo"
-    }
-    
-    return Document(
-        page_content=contenido.strip(),
-        metadata=metadatos
+# Segundos entre revisiones de jobs_for_chatbot.json (0 desactiva el observador)
+RECARGA_INTERVALO = float(os.getenv("RECARGA_INTERVALO", "30"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Cache de consultas: embeddings de la pregunta y top-k de documentos
+CONSULTAS_CACHE_TAMANO = int(os.getenv("CONSULTAS_CACHE_TAMANO", "1024"))
+CONSULTAS_CACHE_TTL = float(os.getenv("CONSULTAS_CACHE_TTL", "3600"))
+cache_consultas = CacheTTL(CONSULTAS_CACHE_TAMANO, CONSULTAS_CACHE_TTL)
+cache_resultados = CacheTTL(CONSULTAS_CACHE_TAMANO, CONSULTAS_CACHE_TTL)
+# Búsqueda por defecto y candidatos que aporta cada lado a la fusión híbrida
+MODO_BUSQUEDA = os.getenv("MODO_BUSQUEDA", "hibrido")
+PROFUNDIDAD_FUSION = int(os.getenv("PROFUNDIDAD_FUSION", "20"))
+# Un empleo ocupa varios chunks: se piden n * SOBRE_MUESTREO chunks y se agrupan por empleo
+EMPLEOS_POR_RESPUESTA = int(os.getenv("EMPLEOS_POR_RESPUESTA", "3"))
+SOBRE_MUESTREO = int(os.getenv("SOBRE_MUESTREO", "4"))
+AGREGACION_PUNTAJES = os.getenv("AGREGACION_PUNTAJES", "max")
+# Versión de la plantilla de prompt: cambiarla invalida las respuestas cacheadas
+VERSION_PROMPT = "1"
+# Cache de respuestas del LLM: "memoria", "sqlite" o vacío para desactivarla
+RESPUESTAS_CACHE = os.getenv("RESPUESTAS_CACHE", "memoria")
+cache_respuestas = crear_cache_respuestas(
+    RESPUESTAS_CACHE,
+    VERSION_PROMPT,
+    tamano_maximo=int(os.getenv("RESPUESTAS_CACHE_TAMANO", "2048")),
+    ttl=float(os.getenv("RESPUESTAS_CACHE_TTL", "21600")),
+    ruta=os.getenv("RESPUESTAS_CACHE_PATH", "./data/cache_respuestas.sqlite3")
+)
+# Hilos dedicados a embeddings de consulta y Chroma, fuera del event loop
+BUSQUEDA_HILOS = int(os.getenv("BUSQUEDA_HILOS", "4"))
+pool_busqueda = ThreadPoolExecutor(max_workers=BUSQUEDA_HILOS, thread_name_prefix="busqueda")
+
+# Los proveedores de IA se crean en el calentamiento (ver inicializar_proveedores)
+groq_proveedor = openai_proveedor = None
+router_ia = RouterProveedores([])
+
+# Con ARRANQUE_RAPIDO el servidor atiende apenas carga el catálogo; los imports pesados,
+# el modelo y el índice se preparan en segundo plano (ver calentar y /ready)
+ARRANQUE_RAPIDO = os.getenv("ARRANQUE_RAPIDO", "1") == "1"
+# Estado del calentamiento: pendiente, calentando, listo o error
+calentamiento = {"estado": "pendiente", "error": None, "segundos": None}
+# Espera antes de reintentar un calentamiento fallido; se duplica en cada intento hasta el máximo
+CALENTAMIENTO_REINTENTO = float(os.getenv("CALENTAMIENTO_REINTENTO", "5"))
+CALENTAMIENTO_REINTENTO_MAX = float(os.getenv("CALENTAMIENTO_REINTENTO_MAX", "300"))
+
+def inicializar_proveedores():
+    """Crea los proveedores de IA (clientes asíncronos con límite de concurrencia y timeout)"""
+    global groq_proveedor, openai_proveedor, router_ia
+    groq_proveedor, openai_proveedor = crear_proveedores()
+    # Prioridad: Groq (gratis y rápido) > OpenAI, con failover, hedging y circuit breakers
+    router_ia = RouterProveedores([groq_proveedor, openai_proveedor])
+
+# Varios workers de uvicorn comparten un índice local de solo lectura que construye
+# una sola vez el proceso cargador; los workers solo abren los archivos mapeados
+WORKERS = int(os.getenv("WORKERS", "1"))
+INDICE_COMPARTIDO = os.getenv("INDICE_COMPARTIDO", "0") == "1"
+ESPERA_INDICE = float(os.getenv("ESPERA_INDICE", "600"))
+# Chroma no admite varios procesos sobre el mismo directorio: en ese modo se usa el índice plano
+if (WORKERS > 1 or INDICE_COMPARTIDO) and INDICE_VECTORIAL == "chroma":
+    TIPO_INDICE = "plano"
+else:
+    TIPO_INDICE = INDICE_VECTORIAL
+
+def nombre_coleccion(catalogo):
+    """Nombre de la colección de Chroma asociada a una versión del catálogo"""
+    return f"empleos_{catalogo.huella[:12] or 'vacio'}"
+
+def abrir_coleccion(coleccion):
+    """Abre (o crea vacía) una colección persistente de Chroma"""
+    from langchain_community.vectorstores import Chroma
+    return Chroma(
+        collection_name=coleccion,
+        persist_directory=VECTORSTORE_PATH,
+        embedding_function=embeddings_consulta
     )
 
-def crear_y_guardar_vectorstore():
-    """Crea y guarda el vectorstore"""
-    empleos = cargar_empleos()
-    documentos = [crear_documento_empleo(e) for e in empleos]
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100,length_function=len,
-            separators=["\n\n", "\n", " ", ""])
-    chunks = splitter.split_documents(documentos)
-
-    vectorstore = Chroma.from_documents(
-        chunks,
-        embedding=embeddings,
-        persist_directory=VECTORSTORE_PATH
-    )
+def indexar(vectorstore, catalogo):
+    """Sincroniza incrementalmente la colección con el catálogo y reporta los cambios"""
+    resumen = sincronizar_coleccion(vectorstore._collection, catalogo.empleos, pipeline_embeddings)
     vectorstore.persist()
-    print(f"Vectorstore creado con {len(chunks)} chunks.")
+    print(f"Indexado: {resumen['agregados']} agregados, {resumen['actualizados']} actualizados, "
+          f"{resumen['eliminados']} eliminados, {resumen['sin_cambios']} sin cambios "
+          f"({resumen['chunks_embebidos']} chunks embebidos)")
+    cache = pipeline_embeddings.cache
+    if cache is not None:
+        print(f"Cache de embeddings: {cache.aciertos} aciertos, {cache.fallos} fallos acumulados")
+    return resumen
+
+def crear_y_guardar_vectorstore(catalogo, coleccion):
+    """Crea y guarda el vectorstore desde cero"""
+    vectorstore = abrir_coleccion(coleccion)
+    indexar(vectorstore, catalogo)
+    print(f"Vectorstore creado con {vectorstore._collection.count()} chunks.")
     return vectorstore
 
-def inicializar_vectorstore():
-    """Inicializa el vectorstore con los empleos"""
-    global vectorstore, embeddings
-    
-    print("Inicializando vectorstore...")
-    
-    # Inicializar embeddings
-    embeddings = HuggingFaceEmbeddings(
-        model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    )
-    
-    # Cargar o crear vectorstore
+def eliminar_colecciones_antiguas(vectorstore, conservar):
+    """Borra las colecciones de versiones anteriores que ya no están en servicio"""
     try:
-        vectorstore = Chroma(
-            persist_directory=VECTORSTORE_PATH,
-            embedding_function=embeddings
-        )
+        for coleccion in vectorstore._client.list_collections():
+            if coleccion.name.startswith("empleos_") and coleccion.name not in conservar:
+                vectorstore._client.delete_collection(coleccion.name)
+                print(f"Colección antigua eliminada: {coleccion.name}")
+    except Exception as e:
+        print(f"No se pudieron limpiar colecciones antiguas: {e}")
+
+def buscar_coleccion_base(vectorstore):
+    """Colección de la que partir: la versión en servicio o, al arrancar, otra versión en disco"""
+    actual = recargador.actual
+    if actual is not None and isinstance(actual.vectorstore, IndiceChroma):
+        return actual.vectorstore.coleccion
+    for coleccion in vectorstore._client.list_collections():
+        if coleccion.name.startswith("empleos_") and coleccion.name != vectorstore._collection.name:
+            return vectorstore._client.get_collection(coleccion.name)
+    return None
+
+def construir_indice_local(catalogo):
+    """Abre o genera el índice local (matriz .npy + metadatos, y las listas IVF o el grafo HNSW) de una versión"""
+    nombre = nombre_coleccion(catalogo)
+    directorio = os.path.join(INDICE_PLANO_PATH, nombre)
+    if not os.path.exists(os.path.join(directorio, ARCHIVO_METADATOS)):
+        cantidad = guardar_indice_plano(directorio, catalogo.empleos, pipeline_embeddings)
+        print(f"Índice plano creado con {cantidad} chunks en {directorio}")
+    indice = abrir_indice_local(directorio, TIPO_INDICE, embeddings_consulta)
+
+    conservar = {nombre}
+    if recargador.actual is not None:
+        conservar.add(nombre_coleccion(recargador.actual.catalogo))
+    eliminar_indices_planos_antiguos(INDICE_PLANO_PATH, conservar)
+    return indice
+
+def preparar_indice_compartido(catalogo):
+    """Cargador: construye el índice local de la versión y lo publica para los workers"""
+    indice = construir_indice_local(catalogo)
+    marcar_listo(os.path.join(INDICE_PLANO_PATH, nombre_coleccion(catalogo)))
+    return indice
+
+def adjuntar_indice_compartido(catalogo):
+    """Worker: espera a que el cargador publique la versión y la abre en solo lectura"""
+    directorio = os.path.join(INDICE_PLANO_PATH, nombre_coleccion(catalogo))
+    if not esperar_listo(directorio, ESPERA_INDICE):
+        raise RuntimeError(f"El cargador no publicó {directorio} en {ESPERA_INDICE:.0f}s")
+    return abrir_indice_local(directorio, TIPO_INDICE, embeddings_consulta)
+
+def construir_vectorstore(catalogo):
+    """Carga o crea el índice vectorial (Chroma, plano, ivf o hnsw según INDICE_VECTORIAL) de una versión del catálogo"""
+    if INDICE_COMPARTIDO:
+        return adjuntar_indice_compartido(catalogo)
+    if TIPO_INDICE in ("plano", "ivf", "hnsw"):
+        return construir_indice_local(catalogo)
+
+    coleccion = nombre_coleccion(catalogo)
+
+    # Cada versión vive en su propia colección, así la activa nunca se modifica.
+    # Una versión nueva parte de una copia de la anterior y solo se embeben los cambios.
+    try:
+        vectorstore = abrir_coleccion(coleccion)
         cantidad_vectores = vectorstore._collection.count()
         if cantidad_vectores == 0:
-            print("Vectorstore existente pero vacío. Reconstruyendo...")
-            vectorstore = crear_y_guardar_vectorstore()
+            base = buscar_coleccion_base(vectorstore)
+            if base is not None:
+                print(f"Copiando {base.count()} vectores desde {base.name}...")
+                clonar_coleccion(base, vectorstore._collection)
         else:
             print(f"Vectorstore cargado con {cantidad_vectores} vectores.")
+        indexar(vectorstore, catalogo)
     except Exception as e:
         print(f"Error al cargar vectorstore: {e}")
         print("Generando uno nuevo...")
-        vectorstore = crear_y_guardar_vectorstore()
+        try:
+            vectorstore._client.delete_collection(coleccion)
+        except Exception:
+            pass
+        vectorstore = crear_y_guardar_vectorstore(catalogo, coleccion)
+
+    # Se conserva la versión en servicio para las peticiones que aún la usan
+    conservar = {coleccion}
+    if recargador.actual is not None:
+        conservar.add(nombre_coleccion(recargador.actual.catalogo))
+    eliminar_colecciones_antiguas(vectorstore, conservar)
+    return IndiceChroma(vectorstore)
+
+def invalidar_caches_consulta(recursos):
+    """Descarta embeddings y resultados cacheados al publicar un índice nuevo"""
+    cache_consultas.limpiar()
+    cache_resultados.limpiar()
+
+recargador = Recargador(construir_vectorstore)
+recargador.al_publicar.append(invalidar_caches_consulta)
+
+def buscar_empleos(recursos, pregunta: str, n: int = EMPLEOS_POR_RESPUESTA, modo: str = MODO_BUSQUEDA):
+    """Los n mejores empleos distintos [(id, metadatos, puntaje)], con cache por consulta normalizada.
+
+    `vector` usa Chroma, `bm25` el índice disperso sobre searchable_text e
+    `hibrido` fusiona ambos con reciprocal rank fusion.
+    """
+    if recursos.vectorstore is None:
+        # Durante el calentamiento todavía no hay índice vectorial: solo palabras clave
+        modo = "bm25"
+    clave = (normalizar_consulta(pregunta) or pregunta, n, modo, AGREGACION_PUNTAJES, recursos.version)
+    ranking = cache_resultados.obtener(clave)
+    if ranking is not None:
+        return ranking
+
+    # Modalidad, tipo, carrera y ubicación filtran; el nivel solo prioriza (ver FACETAS_SUAVES)
+    duras, suaves = separar_facetas(analizador_para(recursos.catalogo).analizar(pregunta))
+    ids, _ = candidatos_por_facetas(recursos.catalogo, duras)
+    # Con facetas suaves se traen más empleos para que tengan de dónde priorizar
+    profundidad = max(n, PROFUNDIDAD_FUSION) if suaves or modo == "hibrido" else n
+
+    if modo == "bm25":
+        dispersos = indice_bm25_para(recursos.catalogo).buscar(pregunta, profundidad, permitidos=ids)
+        ranking = [(empleo_id, {}, puntaje) for empleo_id, puntaje in dispersos]
+    else:
+        # Se sobre-muestrean chunks para que queden `profundidad` empleos distintos tras agruparlos
+        resultados = recursos.vectorstore.buscar(pregunta, profundidad * SOBRE_MUESTREO, permitidos=ids)
+        densos = agrupar_por_empleo(
+            ((metadata.get("id", ""), metadata, puntaje) for metadata, puntaje in resultados),
+            profundidad, AGREGACION_PUNTAJES
+        )
+        ranking = densos
+
+        if modo == "hibrido":
+            metadatos = {empleo_id: metadata for empleo_id, metadata, _ in densos}
+            dispersos = indice_bm25_para(recursos.catalogo).buscar(pregunta, profundidad, permitidos=ids)
+            fusion = fusion_rrf([list(metadatos), [empleo_id for empleo_id, _ in dispersos]])
+            ranking = [(empleo_id, metadatos.get(empleo_id, {}), puntaje) for empleo_id, puntaje in fusion]
+
+    ranking = priorizar_facetas(recursos.catalogo, ranking, suaves)[:n]
+    cache_resultados.guardar(clave, ranking)
+    return ranking
+
+def inicializar_embeddings():
+    """Carga el modelo de embeddings, el pipeline de indexación y la cache de consultas"""
+    global embeddings, embeddings_consulta, pipeline_embeddings
+    if INDICE_COMPARTIDO and EMBED_SERVIDOR:
+        # Las consultas se embeben en el cargador, que ya tiene el modelo en memoria
+        embeddings = EmbeddingsRemotos(EMBED_SERVIDOR, EMBED_CLAVE)
+        embeddings_consulta = EmbeddingsConCache(embeddings, cache_consultas)
+        return
+    # sentence-transformers y torch se importan aquí, no al importar la app
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    embeddings = HuggingFaceEmbeddings(
+        model_name=MODELO_EMBEDDINGS,
+        encode_kwargs={"batch_size": EMBED_LOTE}
+    )
+    # Los workers de un índice compartido no embeben documentos
+    cache_embeddings = None
+    if EMBED_CACHE_PATH and not INDICE_COMPARTIDO:
+        cache_embeddings = CacheEmbeddings(EMBED_CACHE_PATH, MODELO_EMBEDDINGS)
+    pipeline_embeddings = PipelineEmbeddings(embeddings, cache=cache_embeddings)
+    embeddings_consulta = EmbeddingsConCache(embeddings, cache_consultas)
+
+def inicializar_vectorstore():
+    """Inicializa el vectorstore con los empleos"""
+    print("Inicializando vectorstore...")
+    
+    # Inicializar embeddings (en un reintento del calentamiento pueden estar ya cargados)
+    if embeddings is None:
+        inicializar_embeddings()
+    
+    recursos = recargador.cargar_inicial()
     
     # Verificar cuántos documentos tiene
     try:
-        cantidad = vectorstore._collection.count()
-        print(f"El vectorstore contiene {cantidad} vectores")
+        cantidad = len(recursos.vectorstore)
+        print(f"El índice {recursos.vectorstore.nombre} contiene {cantidad} vectores")
         return True
     except Exception as e:
         print(f"No se pudo contar los vectores: {e}")
@@ -199,39 +351,10 @@ def inicializar_vectorstore():
 
 
 
-def generar_con_groq(prompt: str, modelo: str = "llama-3.1-8b-instant") -> str:
-    """Genera texto usando Groq (súper rápido y gratis!)"""
-    try:
-        response = groq_client.chat.completions.create(
-            model=modelo,
-            messages=[
-                {"role": "system", "content": "Eres un asesor laboral profesional y amable que ayuda a las personas a encontrar empleos. Responde en español de manera clara y útil."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error con Groq: {e}")
-        raise e
-
-def generar_con_openai(prompt: str, modelo: str = "gpt-3.5-turbo") -> str:
-    """Genera texto usando OpenAI ChatGPT"""
-    try:
-        response = openai_client.chat.completions.create(
-            model=modelo,
-            messages=[
-                {"role": "system", "content": "Eres un asesor laboral profesional y amable que ayuda a las personas a encontrar empleos."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=500
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        print(f"Error con OpenAI: {e}")
-        raise e
+async def en_pool_busqueda(funcion, *args, **kwargs):
+    """Ejecuta una función bloqueante en el pool de búsqueda sin detener el event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(pool_busqueda, partial(funcion, *args, **kwargs))
 
 
 @app.get("/", response_model=HealthResponse)
@@ -241,14 +364,71 @@ async def root():
         status="OK", 
         message="Jobby API funcionando correctamente"
     )
+def calentar() -> bool:
+    """Crea los proveedores, carga el modelo y construye el índice de la versión en servicio.
+
+    Devuelve True si quedó un índice publicado.
+    """
+    inicio = time.perf_counter()
+    calentamiento["estado"] = "calentando"
+    try:
+        if groq_proveedor is None:
+            inicializar_proveedores()
+        listo = inicializar_vectorstore()
+        calentamiento["estado"] = "listo" if listo else "error"
+        calentamiento["error"] = None
+        if listo:
+            print(f"Servidor listo para recibir consultas (calentamiento en {time.perf_counter() - inicio:.1f}s)")
+        else:
+            print("Error inicializando vectorstore")
+    except Exception as e:
+        calentamiento["estado"] = "error"
+        calentamiento["error"] = str(e)
+        print(f"Error en el calentamiento: {e}")
+    calentamiento["segundos"] = round(time.perf_counter() - inicio, 2)
+    return recargador.actual is not None and recargador.actual.vectorstore is not None
+
+def reintentar_calentamiento():
+    """Repite el calentamiento con espera exponencial hasta que haya índice; mientras, el chat usa BM25"""
+    espera = CALENTAMIENTO_REINTENTO
+    while True:
+        print(f"Reintentando el calentamiento en {espera:.0f}s...")
+        time.sleep(espera)
+        if calentar():
+            return
+        espera = min(espera * 2, CALENTAMIENTO_REINTENTO_MAX)
+
+def calentar_en_segundo_plano():
+    """Calienta y, si falla, sigue reintentando; el observador arranca igual para publicar el catálogo"""
+    listo = calentar()
+    if RECARGA_INTERVALO > 0:
+        recargador.iniciar_observador(RECARGA_INTERVALO)
+    if not listo:
+        reintentar_calentamiento()
+
 @app.on_event("startup")
 async def startup_event():
     """Inicializar vectorstore al iniciar el servidor"""
     print("Iniciando servidor FastAPI...")
-    if inicializar_vectorstore():
-        print("Servidor listo para recibir consultas")
+    if ARRANQUE_RAPIDO:
+        # /health, /job/{id} y /get_all_jobs responden ya; el chat usa BM25 hasta que haya índice
+        recursos = recargador.cargar_catalogo()
+        print(f"Catálogo cargado con {len(recursos.catalogo)} empleos, calentando en segundo plano...")
+        threading.Thread(target=calentar_en_segundo_plano, name="calentamiento", daemon=True).start()
     else:
-        print("Error inicializando vectorstore")
+        listo = calentar()
+        if RECARGA_INTERVALO > 0:
+            recargador.iniciar_observador(RECARGA_INTERVALO)
+        if not listo:
+            threading.Thread(target=reintentar_calentamiento, name="calentamiento", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Detener el observador de archivos, el pool de búsqueda y el de embeddings"""
+    recargador.detener()
+    pool_busqueda.shutdown(wait=False)
+    if pipeline_embeddings is not None:
+        pipeline_embeddings.cerrar()
 
 @app.get("/health", response_model=HealthResponse)
 async def health():
@@ -258,74 +438,62 @@ async def health():
         message="Servidor funcionando correctamente"
     )
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """Endpoint principal del chatbot"""
-    try:
-        pregunta = request.mensaje
-        
-        if not pregunta:
-            raise HTTPException(status_code=400, detail="No se recibió el mensaje")
+@app.get("/ready")
+async def ready(response: Response):
+    """Readiness: 200 cuando el modelo y el índice están cargados, 503 mientras se calientan"""
+    recursos = recargador.actual
+    listo = recursos is not None and recursos.vectorstore is not None
+    if not listo:
+        response.status_code = 503
+    return {
+        "status": "OK" if listo else "NOT_READY",
+        "calentamiento": calentamiento,
+        "catalogo": len(recursos.catalogo) if recursos is not None else 0,
+        "indice": recursos.vectorstore.nombre if listo else None,
+    }
 
-        # Cargar empleos para contexto
-        empleos = cargar_empleos()
-        
-        # Buscar empleos relevantes usando vectorstore
-        if vectorstore is None:
-            raise HTTPException(status_code=500, detail="Vectorstore no inicializado")
-        
-        documentos_relevantes = vectorstore.similarity_search(pregunta, k=3)
-        
-        # Convertir Documents a diccionarios para que funcione con Pydantic
-        empleos_relevantes = []
-        empleos_originales = cargar_empleos()  # Cargar empleos originales
+async def recuperar_empleos(recursos, pregunta: str, modo: Optional[str] = None, n: Optional[int] = None):
+    """Busca los n empleos más relevantes y devuelve los empleos completos del catálogo con su puntaje"""
+    catalogo = recursos.catalogo
+    n = n or EMPLEOS_POR_RESPUESTA
+    ranking = await en_pool_busqueda(buscar_empleos, recursos, pregunta, n=n, modo=modo or MODO_BUSQUEDA)
+    
+    # Convertir el ranking a diccionarios para que funcione con Pydantic
+    empleos_relevantes = []
+    
+    for empleo_id, metadata, puntaje in ranking:
+        # Buscar el empleo original por ID para obtener todos los datos
+        empleo_original = catalogo.por_id.get(empleo_id)
         
-        for doc in documentos_relevantes:
-            # Buscar el empleo original por ID para obtener todos los datos
-            empleo_original = None
-            empleo_id = doc.metadata.get("id", "")
-            
-            for emp in empleos_originales:
-                if emp.get("id") == empleo_id:
-                    empleo_original = emp
-                    break
-            
-            if empleo_original:
-                # Usar el empleo original completo
-                empleos_relevantes.append(empleo_original)
-            else:
-                # Crear diccionario desde metadatos si no encontramos el original
-                empleo_dict = {
-                    "title": doc.metadata.get("title", "Sin título"),
-                    "company": doc.metadata.get("company", "Sin empresa"),
-                    "location": doc.metadata.get("location", "Sin ubicación"),
-                    "id": doc.metadata.get("id", ""),
-                    "visual_id": doc.metadata.get("visual_id", ""),
-                    "job_type": doc.metadata.get("job_type", ""),
-                    "salary_info": doc.metadata.get("salary_info", ""),
-                    "description": "Descripción no disponible",
-                    "requirements": ""
-                }
-                empleos_relevantes.append(empleo_dict)
-
-        #print(empleos_relevantes)
-
-        # Crear contexto con empleos relevantes
-        contexto = ""
-        if empleos_relevantes:
-            for i, empleo in enumerate(empleos_relevantes):
-                contexto += f"""
-Empleo {i+1}:
-- Título: {empleo.get('title', 'Sin título')}
-- ID: {empleo.get('id', '')}
-- Empresa: {empleo.get('company', 'Sin empresa')}
-- Ubicación: {empleo.get('location', 'Sin ubicación')}
-- Descripción: {empleo.get('description', 'Sin descripción')[:300]}...
-"""
+        if empleo_original:
+            # Usar el empleo original completo (copia: el catálogo no se modifica)
+            empleos_relevantes.append({**empleo_original, "score": round(puntaje, 4)})
         else:
-            # Si no hay empleos relevantes, usar algunos empleos generales
-            for i, empleo in enumerate(empleos[:3]):
-                contexto += f"""
+            # Crear diccionario desde metadatos si no encontramos el original
+            empleo_dict = {
+                "title": metadata.get("title", "Sin título"),
+                "company": metadata.get("company", "Sin empresa"),
+                "location": metadata.get("location", "Sin ubicación"),
+                "id": metadata.get("id", ""),
+                "visual_id": metadata.get("visual_id", ""),
+                "job_type": metadata.get("job_type", ""),
+                "salary_info": metadata.get("salary_info", ""),
+                "description": "Descripción no disponible",
+                "requirements": "",
+                "score": round(puntaje, 4)
+            }
+            empleos_relevantes.append(empleo_dict)
+
+    # Si no hay empleos relevantes, usar algunos empleos generales
+    if not empleos_relevantes:
+        empleos_relevantes = catalogo.empleos[:n]
+    return empleos_relevantes
+
+def construir_prompt(pregunta: str, empleos_relevantes):
+    """Construye el prompt contextual con los empleos encontrados"""
+    contexto = ""
+    for i, empleo in enumerate(empleos_relevantes):
+        contexto += f"""
 Empleo {i+1}:
 - Título: {empleo.get('title', 'Sin título')}
 - ID: {empleo.get('id', '')}
@@ -333,10 +501,8 @@ Empleo {i+1}:
 - Ubicación: {empleo.get('location', 'Sin ubicación')}
 - Descripción: {empleo.get('description', 'Sin descripción')[:300]}...
 """
-            empleos_relevantes = empleos[:3]
 
-        # Construir prompt contextual
-        prompt = f"""
+    return f"""
 Eres un asesor laboral profesional y conciso. 
 
 Pregunta del usuario: {pregunta}
@@ -356,60 +522,242 @@ Instrucciones:
 - NO RESPONDAS CON NINGUNA PREGUNTA
 """
 
-        # Prioridad: Groq (gratis y rápido) > OpenAI > Fallback
+def respuesta_sin_ia(cantidad: int) -> str:
+    # Esto no debería pasar, pero por seguridad
+    return f"Encontré {cantidad} empleos que podrían interesarte. ¿Te llama la atención alguno?"
+
+def respuesta_error_ia(cantidad: int) -> str:
+    return f"Aquí tienes {cantidad} empleos relacionados con tu búsqueda. ¿Necesitas ayuda con algo más específico?"
+
+def ids_empleos(empleos_relevantes):
+    return [empleo.get("id", "") for empleo in empleos_relevantes]
+
+async def respuesta_cacheada(pregunta: str, empleos_relevantes):
+    """Busca una respuesta cacheada de cualquiera de los modelos, en orden de prioridad.
+
+    La cache puede ser SQLite, así que se consulta en el pool y no en el event loop.
+    """
+    if cache_respuestas is None or not router_ia.proveedores:
+        return None
+    modelos = [proveedor.modelo for proveedor in router_ia.proveedores]
+    return await en_pool_busqueda(cache_respuestas.obtener_cualquiera, pregunta,
+                                  ids_empleos(empleos_relevantes), modelos)
+
+async def cachear_respuesta(pregunta: str, empleos_relevantes, proveedor, respuesta: str):
+    if cache_respuestas is not None and respuesta:
+        await en_pool_busqueda(cache_respuestas.guardar, pregunta, ids_empleos(empleos_relevantes),
+                               proveedor.modelo, respuesta)
+
+RESPUESTA_EMERGENCIA = "Hola! ¿Qué tipo de trabajo estás buscando? Te ayudo a encontrar las mejores oportunidades."
+
+def obtener_recursos_chat(pregunta: str):
+    """Valida la pregunta y toma el snapshot de catálogo + vectorstore para la petición"""
+    if not pregunta:
+        raise HTTPException(status_code=400, detail="No se recibió el mensaje")
+
+    recursos = recargador.actual
+    if recursos is None:
+        raise HTTPException(status_code=500, detail="Catálogo no inicializado")
+    return recursos
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """Endpoint principal del chatbot"""
+    try:
+        pregunta = request.mensaje
+        recursos = obtener_recursos_chat(pregunta)
+        empleos_relevantes = await recuperar_empleos(recursos, pregunta, request.mode, request.n)
+        prompt = construir_prompt(pregunta, empleos_relevantes)
+
         try:
-            if groq_client:
-                respuesta = generar_con_groq(prompt)
-            elif openai_client:
-                respuesta = generar_con_openai(prompt)
-            else:
-                # Esto no debería pasar, pero por seguridad
-                respuesta = f"Encontré {len(empleos_relevantes)} empleos que podrían interesarte. ¿Te llama la atención alguno?"
+            # Preguntas repetidas con los mismos empleos se responden sin llamar al proveedor
+            respuesta = await respuesta_cacheada(pregunta, empleos_relevantes)
+            if respuesta is None and router_ia.disponible:
+                respuesta, proveedor = await router_ia.generar(prompt)
+                await cachear_respuesta(pregunta, empleos_relevantes, proveedor, respuesta)
+            elif respuesta is None:
+                respuesta = respuesta_sin_ia(len(empleos_relevantes))
         except Exception as e:
             print(f"Error con IA: {e}")
             # Fallback sin IA
-            respuesta = f"Aquí tienes {len(empleos_relevantes)} empleos relacionados con tu búsqueda. ¿Necesitas ayuda con algo más específico?"
+            respuesta = respuesta_error_ia(len(empleos_relevantes))
 
         return ChatResponse(respuesta=respuesta, empleos=empleos_relevantes)
         
     except Exception as e:
         print(f"Error en chat: {e}")
         # Respuesta de emergencia
-        empleos = cargar_empleos()
+        empleos = recargador.actual.catalogo.empleos if recargador.actual else []
         empleos_fallback = empleos[:3] if empleos else []
         return ChatResponse(
-            respuesta="Hola! ¿Qué tipo de trabajo estás buscando? Te ayudo a encontrar las mejores oportunidades.",
+            respuesta=RESPUESTA_EMERGENCIA,
             empleos=empleos_fallback
         )
 
+def evento_sse(evento: str, datos) -> str:
+    """Formatea un evento server-sent events con datos JSON"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Versión en streaming (SSE) del chat: primero las tarjetas, luego el texto del LLM.
+
+    Eventos: `empleos` con la lista de empleos, `token` con cada fragmento de la
+    respuesta y `fin` con la respuesta completa.
+    """
+    async def eventos():
+        try:
+            pregunta = request.mensaje
+            recursos = obtener_recursos_chat(pregunta)
+            empleos_relevantes = await recuperar_empleos(recursos, pregunta, request.mode, request.n)
+        except Exception as e:
+            print(f"Error en chat_stream: {e}")
+            empleos = recargador.actual.catalogo.empleos if recargador.actual else []
+            yield evento_sse("empleos", {"empleos": empleos[:3]})
+            yield evento_sse("token", {"texto": RESPUESTA_EMERGENCIA})
+            yield evento_sse("fin", {"respuesta": RESPUESTA_EMERGENCIA})
+            return
+
+        # Las tarjetas salen en cuanto termina la búsqueda, sin esperar al LLM
+        yield evento_sse("empleos", {"empleos": empleos_relevantes})
+
+        partes = []
+        try:
+            cacheada = await respuesta_cacheada(pregunta, empleos_relevantes)
+            if cacheada is not None:
+                partes = [cacheada]
+                yield evento_sse("token", {"texto": cacheada})
+            elif router_ia.disponible:
+                proveedor = None
+                async for proveedor, fragmento in router_ia.generar_stream(construir_prompt(pregunta, empleos_relevantes)):
+                    partes.append(fragmento)
+                    yield evento_sse("token", {"texto": fragmento})
+                if proveedor is not None:
+                    await cachear_respuesta(pregunta, empleos_relevantes, proveedor, "".join(partes))
+            else:
+                partes = [respuesta_sin_ia(len(empleos_relevantes))]
+                yield evento_sse("token", {"texto": partes[0]})
+        except Exception as e:
+            print(f"Error con IA: {e}")
+            # Si el LLM falla antes de emitir texto se usa la respuesta sin IA
+            if not partes:
+                partes = [respuesta_error_ia(len(empleos_relevantes))]
+                yield evento_sse("token", {"texto": partes[0]})
+
+        yield evento_sse("fin", {"respuesta": "".join(partes)})
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def decodificar_cursor(cursor: str, version: str) -> int:
+    """Posición de inicio guardada en el cursor; falla si es de otra versión del catálogo"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        version_cursor, posicion = base64.urlsafe_b64decode(cursor + relleno).decode().rsplit(":", 1)
+        posicion = int(posicion)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if version_cursor != version or posicion < 0:
+        raise HTTPException(status_code=400, detail="Cursor de otra versión del catálogo, vuelve a la primera página")
+    return posicion
+
+def etag_catalogo(catalogo) -> str:
+    # Débil: el mismo ETag vale para las variantes br, gzip e identity del cuerpo
+    return f'W/"{catalogo.huella[:16]}"'
+
+def cabeceras_catalogo(catalogo) -> dict:
+    """ETag y cabeceras de cache de las respuestas del catálogo, también para el 304"""
+    return {"ETag": etag_catalogo(catalogo), "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+def coincide_etag(request: Request, etag: str) -> bool:
+    """True si el cliente ya tiene esta versión (If-None-Match, comparación débil)"""
+    enviado = request.headers.get("if-none-match", "")
+    etag = etag.removeprefix("W/")
+    return enviado.strip() == "*" or etag in [e.strip().removeprefix("W/") for e in enviado.split(",")]
+
+def respuesta_json(cuerpo: bytes, codificacion: str, cabeceras: dict) -> Response:
+    """Respuesta con un cuerpo JSON ya serializado (y quizá comprimido)"""
+    cabeceras = {**cabeceras, "Vary": "Accept-Encoding"}
+    if codificacion != "identity":
+        cabeceras["Content-Encoding"] = codificacion
+    return Response(content=cuerpo, media_type="application/json", headers=cabeceras)
+
 @app.get("/get_all_jobs")
-async def get_all_jobs():
-    """Endpoint para obtener todos los empleos disponibles"""
+async def get_all_jobs(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(LIMITE_PAGINA, ge=1, le=500),
+    location: Optional[str] = None,
+    job_type: Optional[str] = None,
+    remote_type: Optional[str] = None,
+    experience_level: Optional[str] = None,
+    majors: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Endpoint para obtener los empleos disponibles, paginados y filtrados.
+
+    Los filtros aceptan varios valores separados por comas y `fields` limita
+    los campos de cada empleo (p. ej. `fields=id,title,company`). La respuesta
+    incluye `next_cursor` para pedir la página siguiente y un ETag derivado
+    de la versión del catálogo.
+    """
     try:
-        empleos = cargar_empleos()
-        return {
-            "results": empleos,
-            "total": len(empleos)
+        catalogo = recargador.actual.catalogo
+        cabeceras = cabeceras_catalogo(catalogo)
+        if coincide_etag(request, cabeceras["ETag"]):
+            return Response(status_code=304, headers=cabeceras)
+
+        filtros = {
+            "location": location,
+            "job_type": job_type,
+            "remote_type": remote_type,
+            "experience_level": experience_level,
+            "majors": majors
         }
+        accept_encoding = request.headers.get("accept-encoding", "")
+
+        # Primera página por defecto sin filtros: cuerpo ya serializado y comprimido
+        if not cursor and not fields and not any(filtros.values()) and limit == LIMITE_PAGINA:
+            return respuesta_json(*catalogo.cuerpo_primera_pagina.para(accept_encoding), cabeceras)
+
+        empleos = catalogo.filtrar(filtros)
+        inicio = decodificar_cursor(cursor, catalogo.huella[:16]) if cursor else 0
+        fin = inicio + limit
+        next_cursor = codificar_cursor(catalogo.huella[:16], fin) if fin < len(empleos) else None
+
+        if fields:
+            campos = [c.strip() for c in fields.split(",") if c.strip()]
+            cuerpo = dumps({
+                "results": [proyectar(e, campos) for e in empleos[inicio:fin]],
+                "total": len(empleos),
+                "next_cursor": next_cursor
+            })
+        else:
+            # Sin proyección la página se arma con los fragmentos preserializados
+            cuerpo = catalogo.cuerpo_pagina(empleos[inicio:fin], len(empleos), next_cursor)
+        return respuesta_json(*comprimir_para(cuerpo, accept_encoding), cabeceras)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error en get_all_jobs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/job/{job_id}", response_model=JobDetailResponse)
-async def get_job_details(job_id: str):
+async def get_job_details(job_id: str, request: Request):
     """Endpoint para obtener detalles completos de un empleo específico"""
     try:
-        empleos = cargar_empleos()
-        
-        # Buscar el empleo por ID
-        empleo_encontrado = None
-        for empleo in empleos:
-            if empleo.get('id') == job_id or empleo.get('visual_id') == job_id:
-                empleo_encontrado = empleo
-                break
+        # Buscar el empleo por ID o visual_id; el cuerpo ya está serializado y comprimido
+        catalogo = recargador.actual.catalogo
+        cuerpo = catalogo.cuerpo_detalle(job_id)
         
-        if empleo_encontrado:
-            return JobDetailResponse(job=empleo_encontrado, found=True)
+        if cuerpo:
+            cabeceras = cabeceras_catalogo(catalogo)
+            if coincide_etag(request, cabeceras["ETag"]):
+                return Response(status_code=304, headers=cabeceras)
+            return respuesta_json(*cuerpo.para(request.headers.get("accept-encoding", "")), cabeceras)
         else:
             return JobDetailResponse(job=None, found=False)
             
@@ -417,6 +765,85 @@ async def get_job_details(job_id: str):
         print(f"Error en get_job_details: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def verificar_admin(token: Optional[str]):
+    """Exige el header X-Admin-Token; sin ADMIN_TOKEN configurado los endpoints de administración no atienden"""
+    # El servidor escucha en 0.0.0.0: sin token cualquiera en la red podría forzar re-embeber todo
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Administración desactivada: define ADMIN_TOKEN")
+    if token is None or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+@app.post("/admin/recargar", response_model=RecargaResponse)
+async def recargar_recursos(forzar: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """Reconstruye catálogo y vectorstore en segundo plano si jobs_for_chatbot.json cambió"""
+    verificar_admin(x_admin_token)
+
+    iniciada = recargador.recargar(forzar=forzar)
+    return RecargaResponse(
+        iniciada=iniciada,
+        recargando=recargador.recargando,
+        version=recargador.actual.version if recargador.actual else "",
+        error=recargador.ultimo_error
+    )
+
+@app.get("/admin/cache")
+async def estadisticas_cache(x_admin_token: Optional[str] = Header(None)):
+    """Aciertos y fallos de las caches de consultas"""
+    verificar_admin(x_admin_token)
+
+    return {
+        "embeddings_consulta": cache_consultas.estadisticas(),
+        "resultados": cache_resultados.estadisticas(),
+        "respuestas": cache_respuestas.estadisticas() if cache_respuestas else None
+    }
+
+@app.get("/admin/proveedores")
+async def estadisticas_proveedores(x_admin_token: Optional[str] = Header(None)):
+    """Latencias p50/p95, tasa de error y estado del circuito de cada proveedor de IA"""
+    verificar_admin(x_admin_token)
+    return router_ia.estadisticas()
+
+def iniciar_cargador():
+    """Construye y publica el índice compartido de la versión actual y vigila el archivo de empleos"""
+    inicializar_embeddings()
+    recargador.construir = preparar_indice_compartido
+    recursos = recargador.cargar_inicial()
+    print(f"Índice compartido {recursos.version} publicado en {INDICE_PLANO_PATH} ({len(recursos.vectorstore)} vectores)")
+    if RECARGA_INTERVALO > 0:
+        recargador.iniciar_observador(RECARGA_INTERVALO)
+
+def iniciar_servidor_embeddings(direccion: str, clave: str) -> ServidorEmbeddings:
+    """Cargador: atiende los embeddings de consulta de los workers con su modelo"""
+    servidor = ServidorEmbeddings(embeddings, direccion, clave).iniciar()
+    print(f"Servidor de embeddings de consulta en {servidor.direccion}")
+    return servidor
+
+
 if __name__ == '__main__':
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5000)
+    if "--cargador" in sys.argv:
+        # Cargador independiente (p. ej. junto a gunicorn): construye, publica y se queda vigilando
+        iniciar_cargador()
+        if EMBED_SERVIDOR:
+            if not EMBED_CLAVE:
+                sys.exit("EMBED_SERVIDOR requiere EMBED_CLAVE, la misma en el cargador y en los workers")
+            iniciar_servidor_embeddings(EMBED_SERVIDOR, EMBED_CLAVE)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            recargador.detener()
+            if pipeline_embeddings is not None:
+                pipeline_embeddings.cerrar()
+    elif WORKERS > 1:
+        # Este proceso hace de cargador; los workers heredan INDICE_COMPARTIDO y solo leen.
+        # También embebe las consultas de los workers, así el modelo se carga una sola vez
+        iniciar_cargador()
+        servidor = iniciar_servidor_embeddings(EMBED_SERVIDOR or "127.0.0.1:0", EMBED_CLAVE or secrets.token_hex(16))
+        os.environ["INDICE_COMPARTIDO"] = "1"
+        os.environ["EMBED_SERVIDOR"] = servidor.direccion
+        os.environ["EMBED_CLAVE"] = servidor.clave
+        uvicorn.run("app_simple:app", host="0.0.0.0", port=5000, workers=WORKERS)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,130 @@
+"""Compara recall@k, latencia y memoria de los índices aproximados (IVF, HNSW) y de las
+matrices cuantizadas (float16, int8) contra la búsqueda exacta en float32.
+
+Uso (desde back/):
+    python benchmark_indices.py --directorio ./data/indice_plano/empleos_xxxxxxxxxxxx
+    python benchmark_indices.py --sintetico 200000
+
+Las consultas son chunks del propio índice con ruido, así no hace falta
+cargar el modelo de embeddings para medir.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from indice_vectorial import (ARCHIVO_HNSW, ARCHIVO_METADATOS, ARCHIVO_VECTORES, IndiceHNSW, IndiceIVF, IndicePlano,
+                              asegurar_cuantizado, guardar_hnsw, guardar_ivf, hnswlib, normalizar_filas)
+
+
+def generar_sintetico(directorio: str, cantidad: int, dimension: int = 384, grupos: int = 1000, semilla: int = 0):
+    """Vectores agrupados alrededor de `grupos` centros, parecidos a embeddings reales"""
+    generador = np.random.default_rng(semilla)
+    centros = generador.standard_normal((grupos, dimension)).astype(np.float32)
+    vectores = np.lib.format.open_memmap(os.path.join(directorio, ARCHIVO_VECTORES), mode="w+",
+                                         dtype=np.float32, shape=(cantidad, dimension))
+    for desde in range(0, cantidad, 65536):
+        hasta = min(cantidad, desde + 65536)
+        asignados = centros[generador.integers(0, grupos, hasta - desde)]
+        ruido = generador.standard_normal((hasta - desde, dimension)).astype(np.float32)
+        vectores[desde:hasta] = normalizar_filas(asignados + 0.8 * ruido)
+    vectores.flush()
+    with open(os.path.join(directorio, ARCHIVO_METADATOS), "w", encoding="utf-8") as f:
+        f.write("[" + ",".join('{"id":"%d"}' % i for i in range(cantidad)) + "]")
+
+
+def generar_consultas(vectores, cantidad: int, ruido: float = 0.05, semilla: int = 1):
+    generador = np.random.default_rng(semilla)
+    filas = generador.choice(len(vectores), min(cantidad, len(vectores)), replace=False)
+    base = np.asarray(vectores[np.sort(filas)])
+    return normalizar_filas(base + ruido * generador.standard_normal(base.shape).astype(np.float32))
+
+
+def medir(indice, consultas, k: int, exactos=None):
+    """Devuelve (recall@k, p50 ms, p95 ms) y los resultados de cada consulta"""
+    latencias, resultados = [], []
+    for vector in consultas:
+        inicio = time.perf_counter()
+        filas, _ = indice.buscar_vector(vector, k)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        resultados.append(set(int(f) for f in filas))
+    recall = 1.0
+    if exactos is not None:
+        recall = float(np.mean([len(r & e) / len(e) for r, e in zip(resultados, exactos) if e]))
+    return recall, float(np.percentile(latencias, 50)), float(np.percentile(latencias, 95)), resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument("--directorio", help="Directorio de un índice local (vectores.npy + metadatos.json)")
+    origen.add_argument("--sintetico", type=int, help="Cantidad de vectores sintéticos a generar")
+    parser.add_argument("--consultas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--listas", type=int, default=0, help="Listas IVF (0 = 4 * raíz de N)")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32")
+    parser.add_argument("--ef", default="16,32,64,128,256")
+    parser.add_argument("--precisiones", default="float16,int8")
+    parser.add_argument("--rerank", type=int, default=4, help="Candidatos re-puntuados en float32 por resultado")
+    args = parser.parse_args()
+
+    # Se trabaja sobre una copia para no tocar el índice en servicio
+    trabajo = tempfile.mkdtemp(prefix="benchmark_indices_")
+    try:
+        if args.sintetico:
+            print(f"Generando {args.sintetico} vectores sintéticos...")
+            generar_sintetico(trabajo, args.sintetico)
+        else:
+            for archivo in (ARCHIVO_VECTORES, ARCHIVO_METADATOS):
+                shutil.copy(os.path.join(args.directorio, archivo), trabajo)
+
+        plano = IndicePlano.abrir(trabajo, None)
+        consultas = generar_consultas(plano.vectores, args.consultas)
+        print(f"{len(plano)} vectores de {plano.vectores.shape[1]} dimensiones, "
+              f"{len(consultas)} consultas, k={args.k}\n")
+
+        filas = []
+        recall, p50, p95, exactos = medir(plano, consultas, args.k)
+        filas.append(("plano (exacto)", "-", recall, p50, p95, plano.matriz_busqueda.nbytes))
+
+        for precision in (p for p in args.precisiones.split(",") if p):
+            asegurar_cuantizado(trabajo, precision)
+            for rerank in sorted({0, args.rerank}):
+                cuantizado = IndicePlano.abrir(trabajo, None, precision=precision, rerank=rerank)
+                memoria = cuantizado.matriz_busqueda.nbytes
+                if cuantizado.escalas is not None:
+                    memoria += cuantizado.escalas.nbytes
+                recall, p50, p95, _ = medir(cuantizado, consultas, args.k, exactos)
+                filas.append((f"plano {precision}", f"rerank={rerank}", recall, p50, p95, memoria))
+
+        inicio = time.perf_counter()
+        listas = guardar_ivf(trabajo, args.listas)
+        print(f"IVF: {listas} listas construidas en {time.perf_counter() - inicio:.1f}s")
+        for nprobe in (int(n) for n in args.nprobe.split(",")):
+            ivf = IndiceIVF.abrir(trabajo, None, nprobe=nprobe, precision="float32")
+            recall, p50, p95, _ = medir(ivf, consultas, args.k, exactos)
+            filas.append(("ivf", f"nprobe={nprobe}", recall, p50, p95, ivf.matriz_busqueda.nbytes))
+
+        if hnswlib is None:
+            print("HNSW: se omite (hnswlib no está instalado)")
+        else:
+            inicio = time.perf_counter()
+            guardar_hnsw(trabajo)
+            print(f"HNSW: grafo construido en {time.perf_counter() - inicio:.1f}s")
+            for ef in (int(e) for e in args.ef.split(",")):
+                hnsw = IndiceHNSW.abrir(trabajo, None, ef=ef, precision="float32")
+                recall, p50, p95, _ = medir(hnsw, consultas, args.k, exactos)
+                filas.append(("hnsw", f"ef={ef}", recall, p50, p95, os.path.getsize(os.path.join(trabajo, ARCHIVO_HNSW))))
+
+        print(f"\n{'índice':<18}{'parámetro':<14}{'recall@' + str(args.k):>10}{'p50 ms':>10}{'p95 ms':>10}{'MB':>10}")
+        for nombre, parametro, recall, p50, p95, memoria in filas:
+            print(f"{nombre:<18}{parametro:<14}{recall:>10.3f}{p50:>10.3f}{p95:>10.3f}{memoria / 2**20:>10.1f}")
+    finally:
+        shutil.rmtree(trabajo, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
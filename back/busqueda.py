@@ -0,0 +1,292 @@
+import heapq
+import math
+import re
+import weakref
+from collections import Counter, defaultdict
+
+from texto import plegar_acentos, terminos, tokenizar
+
+# Palabras de la consulta que indican una faceta; el valor es un fragmento
+# (sin tildes, en minúsculas) de los valores reales del catálogo
+SINONIMOS = {
+    "remote_type": {
+        "remoto": "remoto", "remota": "remoto", "remotos": "remoto", "remotas": "remoto",
+        "teletrabajo": "remoto", "virtual": "remoto",
+        "hibrido": "hibrido", "hibrida": "hibrido", "hibridos": "hibrido", "hibridas": "hibrido",
+        "presencial": "instalaciones", "presenciales": "instalaciones",
+    },
+    "job_type": {
+        "practica": "practica", "practicas": "practica", "pasantia": "practica", "pasantias": "practica",
+        "preprofesional": "practica preprofesional", "preprofesionales": "practica preprofesional",
+        "trainee": "trainee", "trainees": "trainee",
+        "independiente": "independiente", "freelance": "independiente",
+    },
+    "experience_level": {
+        "practicante": "practicante", "practicantes": "practicante",
+        "analista": "analista", "analistas": "analista",
+        "asistente": "asistente", "asistentes": "asistente",
+        "supervisor": "supervisor", "supervisora": "supervisor",
+        "jefe": "jefe", "jefa": "jefe",
+        "consultor": "consultor", "consultora": "consultor", "asesor": "asesor",
+    },
+}
+
+# Frases que también indican modalidad pero tienen más de una palabra
+FRASES = {
+    "remote_type": {"home office": "remoto", "trabajo desde casa": "remoto"},
+}
+
+# Prefijos de las carreras en symplicity que no aportan a la búsqueda
+PREFIJOS_CARRERA = ("pregrado/", "posgrado/", "postgrado/", "maestria/", "doctorado/")
+
+# Orden en que se relajan las facetas si no queda ningún empleo candidato: la
+# modalidad se descarta antes que el tipo de puesto, que cambia más lo que se busca
+ORDEN_RELAJACION = ("location", "experience_level", "remote_type", "job_type", "majors")
+
+# Facetas que salen de palabras que suelen ser parte del puesto ("analista de datos",
+# "practicante de marketing"): no filtran, solo suben en el ranking a los empleos que las cumplen
+FACETAS_SUAVES = ("experience_level",)
+
+# Constante de reciprocal rank fusion (60 es el valor habitual)
+RRF_K = 60
+# Cómo se combinan los puntajes de varios chunks del mismo empleo
+AGREGACIONES = ("max", "sum")
+
+
+def frase_en(frase: str, texto: str) -> bool:
+    return re.search(rf"(?<![a-z0-9ñ]){re.escape(frase)}(?![a-z0-9ñ])", texto) is not None
+
+
+class AnalizadorConsulta:
+    """Extrae facetas estructuradas de una consulta en lenguaje natural, sin LLM.
+
+    Modalidad, tipo y nivel salen de diccionarios de sinónimos; carreras y
+    ubicaciones, de los valores que existen en el catálogo. Cada faceta se
+    traduce a los valores exactos del catálogo para poder filtrar con ellos.
+    """
+
+    def __init__(self, catalogo):
+        self.valores = {campo: catalogo.valores_faceta(campo) for campo in ORDEN_RELAJACION}
+        self.plegados = {
+            campo: {valor: plegar_acentos(str(valor).lower()) for valor in valores}
+            for campo, valores in self.valores.items()
+        }
+
+        # "PREGRADO/INGENIERÍA INDUSTRIAL" -> "ingenieria industrial"
+        self.frases_carrera = {}
+        for valor, plegado in self.plegados["majors"].items():
+            for prefijo in PREFIJOS_CARRERA:
+                if plegado.startswith(prefijo):
+                    plegado = plegado[len(prefijo):]
+            self.frases_carrera.setdefault(plegado.strip(), set()).add(valor)
+
+        # "San Isidro, Lima, Perú" -> "san isidro", "lima", "peru"
+        self.frases_ubicacion = {}
+        for valor, plegado in self.plegados["location"].items():
+            for parte in plegado.split(","):
+                if len(parte.strip()) >= 3:
+                    self.frases_ubicacion.setdefault(parte.strip(), set()).add(valor)
+
+    def _valores_con(self, campo: str, fragmento: str) -> set:
+        return {valor for valor, plegado in self.plegados[campo].items() if fragmento in plegado}
+
+    def analizar(self, pregunta: str) -> dict:
+        """Devuelve {campo: set de valores del catálogo} para las facetas detectadas"""
+        tokens = tokenizar(pregunta)
+        texto = " ".join(tokens)
+        facetas = {}
+
+        for campo, sinonimos in SINONIMOS.items():
+            fragmentos = {sinonimos[t] for t in tokens if t in sinonimos}
+            fragmentos |= {f for frase, f in FRASES.get(campo, {}).items() if frase_en(frase, texto)}
+            # "practica preprofesional" es más específico que "practica"
+            fragmentos = {f for f in fragmentos if not any(f != o and f in o for o in fragmentos)}
+            valores = set()
+            for fragmento in fragmentos:
+                valores |= self._valores_con(campo, fragmento)
+            if valores:
+                facetas[campo] = valores
+
+        for campo, frases in (("majors", self.frases_carrera), ("location", self.frases_ubicacion)):
+            encontradas = [frase for frase in frases if frase and frase_en(frase, texto)]
+            # "ingenieria industrial" gana sobre "ingenieria" sola
+            encontradas = [f for f in encontradas if not any(f != o and f in o for o in encontradas)]
+            valores = set()
+            for frase in encontradas:
+                # "ingenieria" sola abarca todas las carreras que la contienen
+                for otra, valores_otra in frases.items():
+                    if frase_en(frase, otra):
+                        valores |= valores_otra
+            if valores:
+                facetas[campo] = valores
+
+        return facetas
+
+
+class IndiceBM25:
+    """Índice invertido BM25 en memoria sobre el `searchable_text` de cada empleo.
+
+    Los textos se pliegan (sin tildes) y se reducen a raíces, así "prácticas"
+    y "practica" o "ingeniería" e "ingeniero" cuentan como el mismo término.
+    """
+
+    def __init__(self, catalogo, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.longitudes = []
+        self.postings = defaultdict(list)
+        for empleo in catalogo.empleos:
+            if not empleo.get("id"):
+                continue
+            indice = len(self.ids)
+            self.ids.append(empleo["id"])
+            frecuencias = Counter(terminos(texto_buscable(empleo)))
+            self.longitudes.append(sum(frecuencias.values()))
+            for termino, tf in frecuencias.items():
+                self.postings[termino].append((indice, tf))
+
+        total = len(self.ids)
+        self.longitud_media = (sum(self.longitudes) / total) if total else 0.0
+        # Parte del denominador de BM25 que solo depende del documento
+        self.normalizacion = [
+            k1 * (1 - b + b * longitud / self.longitud_media) if self.longitud_media else k1
+            for longitud in self.longitudes
+        ]
+        self.idf = {
+            termino: math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termino, lista in self.postings.items()
+        }
+
+    def buscar(self, consulta: str, k: int = 10, permitidos=None):
+        """Devuelve [(id, puntaje)] de los k empleos con mayor BM25, opcionalmente solo entre `permitidos`"""
+        permitidos = set(permitidos) if permitidos is not None else None
+        puntajes = defaultdict(float)
+        for termino in set(terminos(consulta)):
+            idf = self.idf.get(termino)
+            if idf is None:
+                continue
+            for indice, tf in self.postings[termino]:
+                puntajes[indice] += idf * tf * (self.k1 + 1) / (tf + self.normalizacion[indice])
+
+        if permitidos is not None:
+            puntajes = {i: p for i, p in puntajes.items() if self.ids[i] in permitidos}
+        mejores = heapq.nlargest(k, puntajes.items(), key=lambda item: item[1])
+        return [(self.ids[i], puntaje) for i, puntaje in mejores]
+
+
+def texto_buscable(empleo) -> str:
+    """`searchable_text` del scraper, o los campos principales si el JSON es anterior"""
+    if empleo.get("searchable_text"):
+        return empleo["searchable_text"]
+    partes = [empleo.get(c) or "" for c in ("title", "company", "location", "job_type", "description", "requirements")]
+    partes += [str(m) for m in empleo.get("majors") or [] if m]
+    return " ".join(partes)
+
+
+def fusion_rrf(rankings, k: int = RRF_K):
+    """Reciprocal rank fusion de varias listas ordenadas de ids. Devuelve [(id, puntaje)]"""
+    puntajes = defaultdict(float)
+    for ranking in rankings:
+        for posicion, clave in enumerate(ranking):
+            puntajes[clave] += 1.0 / (k + posicion + 1)
+    return sorted(puntajes.items(), key=lambda item: item[1], reverse=True)
+
+
+def similitud_desde_distancia(distancia: float) -> float:
+    """Convierte una distancia de Chroma (menor es mejor) en similitud en (0, 1]"""
+    return 1.0 / (1.0 + max(distancia, 0.0))
+
+
+def agrupar_por_empleo(resultados, n: int, agregacion: str = "max"):
+    """Agrupa resultados por chunk [(id, metadatos, puntaje)] en los n mejores empleos distintos.
+
+    Con `max` cada empleo vale lo que su mejor chunk; con `sum` se suman sus
+    chunks, lo que premia a los empleos que coinciden en varias partes.
+    """
+    if agregacion not in AGREGACIONES:
+        raise ValueError(f"Agregación desconocida: {agregacion}")
+    puntajes = {}
+    metadatos = {}
+    for empleo_id, metadata, puntaje in resultados:
+        if not empleo_id:
+            continue
+        if empleo_id not in puntajes:
+            puntajes[empleo_id] = puntaje
+            metadatos[empleo_id] = metadata
+        elif agregacion == "sum":
+            puntajes[empleo_id] += puntaje
+        else:
+            puntajes[empleo_id] = max(puntajes[empleo_id], puntaje)
+    mejores = heapq.nlargest(n, puntajes.items(), key=lambda item: item[1])
+    return [(empleo_id, metadatos[empleo_id], puntaje) for empleo_id, puntaje in mejores]
+
+
+_analizadores = weakref.WeakKeyDictionary()
+_indices_bm25 = weakref.WeakKeyDictionary()
+
+
+def analizador_para(catalogo) -> AnalizadorConsulta:
+    """Analizador construido una vez por versión del catálogo"""
+    analizador = _analizadores.get(catalogo)
+    if analizador is None:
+        analizador = AnalizadorConsulta(catalogo)
+        _analizadores[catalogo] = analizador
+    return analizador
+
+
+def indice_bm25_para(catalogo) -> IndiceBM25:
+    """Índice BM25 construido una vez por versión del catálogo"""
+    indice = _indices_bm25.get(catalogo)
+    if indice is None:
+        indice = IndiceBM25(catalogo)
+        _indices_bm25[catalogo] = indice
+    return indice
+
+
+def separar_facetas(facetas: dict):
+    """Divide las facetas detectadas en (duras, que filtran; suaves, que solo priorizan)"""
+    duras = {campo: valores for campo, valores in facetas.items() if campo not in FACETAS_SUAVES}
+    suaves = {campo: valores for campo, valores in facetas.items() if campo in FACETAS_SUAVES}
+    return duras, suaves
+
+
+def priorizar_facetas(catalogo, ranking, suaves: dict):
+    """Fusiona por RRF el ranking [(id, metadatos, puntaje)] con su sublista de empleos que cumplen `suaves`.
+
+    Los que cumplen suben sin que el resto desaparezca, como haría un filtro.
+    """
+    if not suaves:
+        return ranking
+    cumplen = {empleo.get("id") for empleo in catalogo.filtrar_exacto(suaves)}
+    ids = [empleo_id for empleo_id, _, _ in ranking]
+    metadatos = {empleo_id: metadata for empleo_id, metadata, _ in ranking}
+    fusion = fusion_rrf([ids, [empleo_id for empleo_id in ids if empleo_id in cumplen]])
+    return [(empleo_id, metadatos[empleo_id], puntaje) for empleo_id, puntaje in fusion]
+
+
+def candidatos_por_facetas(catalogo, facetas: dict):
+    """Ids de los empleos que cumplen las facetas, relajándolas si no queda ninguno.
+
+    Devuelve (ids, facetas aplicadas). `ids` es None cuando no hay que filtrar.
+    """
+    facetas = dict(facetas)
+    while facetas:
+        empleos = catalogo.filtrar_exacto(facetas)
+        if empleos:
+            if len(empleos) >= len(catalogo):
+                return None, facetas
+            return [e.get("id") for e in empleos if e.get("id")], facetas
+        # Se descarta la faceta menos importante y se vuelve a intentar
+        for campo in ORDEN_RELAJACION:
+            if campo in facetas:
+                del facetas[campo]
+                break
+    return None, {}
+
+
+def filtro_chroma(ids):
+    """Filtro `where` de Chroma que restringe la búsqueda a los chunks de esos empleos"""
+    if ids is None:
+        return None
+    return {"id": {"$in": ids}}
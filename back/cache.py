@@ -0,0 +1,300 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from texto import normalizar_consulta
+
+# Máximo de parámetros por consulta IN (...) en SQLite
+LOTE_SQLITE = 500
+
+# Versión del preprocesamiento de textos antes de embeber; cambiarla invalida la cache.
+# v2: el pool de procesos usa embed_documents igual que el servidor (antes embebía el
+# texto sin reemplazar saltos de línea y guardaba vectores distintos con la misma clave)
+VERSION_EMBEDDINGS = "v2"
+
+
+class CacheEmbeddings:
+    """Cache persistente de embeddings en SQLite, indexado por hash de modelo + texto.
+
+    Los vectores se guardan como float32 crudos, así un chunk idéntico al de
+    una construcción anterior cuesta una lectura en vez de una pasada del modelo.
+    """
+
+    def __init__(self, ruta: str, modelo: str):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.ruta = ruta
+        self.modelo = modelo
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (clave BLOB PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def clave(self, texto: str) -> bytes:
+        return hashlib.sha256(f"{self.modelo}\0{VERSION_EMBEDDINGS}\0{texto}".encode("utf-8")).digest()
+
+    def obtener_muchos(self, textos):
+        """Devuelve una lista alineada con `textos` con el vector o None si no está en cache"""
+        claves = [self.clave(t) for t in textos]
+        encontrados = {}
+        with self._lock:
+            for desde in range(0, len(claves), LOTE_SQLITE):
+                lote = claves[desde:desde + LOTE_SQLITE]
+                marcadores = ",".join("?" * len(lote))
+                filas = self._conn.execute(
+                    f"SELECT clave, vector FROM embeddings WHERE clave IN ({marcadores})", lote
+                )
+                for clave, blob in filas:
+                    encontrados[clave] = array("f", blob).tolist()
+
+        vectores = [encontrados.get(c) for c in claves]
+        aciertos = sum(v is not None for v in vectores)
+        self.aciertos += aciertos
+        self.fallos += len(vectores) - aciertos
+        return vectores
+
+    def guardar_muchos(self, textos, vectores):
+        filas = [(self.clave(t), array("f", v).tobytes()) for t, v in zip(textos, vectores)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (clave, vector) VALUES (?, ?)", filas)
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def cerrar(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CacheTTL:
+    """Cache LRU en memoria con tamaño máximo y expiración por entrada"""
+
+    def __init__(self, tamano_maximo: int = 1024, ttl: float = 3600):
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        """Devuelve el valor o None si no está o expiró"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < ahora:
+                if entrada is not None:
+                    del self._datos[clave]
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def obtener_primero(self, claves):
+        """Valor de la primera clave presente; cuenta un solo acierto o fallo"""
+        ahora = time.monotonic()
+        with self._lock:
+            for clave in claves:
+                entrada = self._datos.get(clave)
+                if entrada is not None and entrada[0] >= ahora:
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return entrada[1]
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        if self.tamano_maximo <= 0:
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano_maximo:
+                self._datos.popitem(last=False)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._datos)
+
+
+class EmbeddingsConCache:
+    """Envuelve un modelo de embeddings y cachea `embed_query` por consulta normalizada.
+
+    Se pasa a Chroma como `embedding_function`, así `similarity_search` evita la
+    pasada del transformer para consultas repetidas o casi idénticas.
+    """
+
+    def __init__(self, embeddings, cache: CacheTTL):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_query(self, texto: str):
+        clave = normalizar_consulta(texto) or texto
+        vector = self.cache.obtener(clave)
+        if vector is None:
+            vector = self.embeddings.embed_query(texto)
+            self.cache.guardar(clave, vector)
+        return vector
+
+    def embed_documents(self, textos):
+        return self.embeddings.embed_documents(textos)
+
+
+class CacheSQLite:
+    """Cache persistente en SQLite con la misma interfaz que CacheTTL.
+
+    Los valores se guardan como JSON. Al superar `tamano_maximo` se eliminan
+    las entradas usadas hace más tiempo.
+    """
+
+    def __init__(self, ruta: str, tamano_maximo: int = 1024, ttl: float = 3600):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (clave TEXT PRIMARY KEY, valor TEXT NOT NULL, "
+            "expira REAL NOT NULL, usado REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_usado ON cache (usado)")
+        self._conn.commit()
+
+    def obtener(self, clave):
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute("SELECT valor, expira FROM cache WHERE clave = ?", (clave,)).fetchone()
+            if fila is None or fila[1] < ahora:
+                if fila is not None:
+                    self._conn.execute("DELETE FROM cache WHERE clave = ?", (clave,))
+                    self._conn.commit()
+                self.fallos += 1
+                return None
+            self._conn.execute("UPDATE cache SET usado = ? WHERE clave = ?", (ahora, clave))
+            self._conn.commit()
+            self.aciertos += 1
+            return json.loads(fila[0])
+
+    def obtener_primero(self, claves):
+        """Valor de la primera clave vigente, con una sola consulta; cuenta un solo acierto o fallo"""
+        claves = list(claves)
+        if not claves:
+            return None
+        ahora = time.time()
+        with self._lock:
+            filas = dict(
+                (clave, (valor, expira)) for clave, valor, expira in self._conn.execute(
+                    f"SELECT clave, valor, expira FROM cache WHERE clave IN ({','.join('?' * len(claves))})", claves
+                )
+            )
+            for clave in claves:
+                if clave in filas and filas[clave][1] >= ahora:
+                    self._conn.execute("UPDATE cache SET usado = ? WHERE clave = ?", (ahora, clave))
+                    self._conn.commit()
+                    self.aciertos += 1
+                    return json.loads(filas[clave][0])
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        if self.tamano_maximo <= 0:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (clave, valor, expira, usado) VALUES (?, ?, ?, ?)",
+                (clave, json.dumps(valor, ensure_ascii=False), ahora + self.ttl, ahora)
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE clave IN (SELECT clave FROM cache ORDER BY usado DESC LIMIT -1 OFFSET ?)",
+                (self.tamano_maximo,)
+            )
+            self._conn.commit()
+
+    def limpiar(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            entradas = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": entradas,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / total, 3) if total else 0.0,
+            }
+
+
+class CacheRespuestas:
+    """Cache de respuestas del LLM por (pregunta normalizada, ids recuperados, modelo, versión del prompt).
+
+    El backend puede ser un CacheTTL (en el proceso) o un CacheSQLite (compartido
+    entre procesos y persistente entre reinicios).
+    """
+
+    def __init__(self, backend, version_prompt: str):
+        self.backend = backend
+        self.version_prompt = version_prompt
+
+    def clave(self, pregunta: str, ids_empleos, modelo: str) -> str:
+        partes = [normalizar_consulta(pregunta) or pregunta, list(ids_empleos), modelo, self.version_prompt]
+        return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def obtener(self, pregunta: str, ids_empleos, modelo: str):
+        return self.backend.obtener(self.clave(pregunta, ids_empleos, modelo))
+
+    def obtener_cualquiera(self, pregunta: str, ids_empleos, modelos):
+        """Respuesta cacheada del primero de `modelos` que la tenga, en una sola búsqueda"""
+        return self.backend.obtener_primero([self.clave(pregunta, ids_empleos, modelo) for modelo in modelos])
+
+    def guardar(self, pregunta: str, ids_empleos, modelo: str, respuesta: str):
+        self.backend.guardar(self.clave(pregunta, ids_empleos, modelo), respuesta)
+
+    def estadisticas(self) -> dict:
+        return self.backend.estadisticas()
+
+
+def crear_cache_respuestas(tipo: str, version_prompt: str, tamano_maximo: int, ttl: float, ruta: str):
+    """Crea la cache de respuestas según RESPUESTAS_CACHE: 'memoria', 'sqlite' o vacío (desactivada)"""
+    if tipo == "memoria":
+        return CacheRespuestas(CacheTTL(tamano_maximo, ttl), version_prompt)
+    if tipo == "sqlite":
+        return CacheRespuestas(CacheSQLite(ruta, tamano_maximo, ttl), version_prompt)
+    return None
@@ -0,0 +1,169 @@
+import base64
+import hashlib
+import json
+import os
+
+from serializacion import CuerpoPrecomprimido, dumps
+from texto import plegar_acentos
+
+RUTA_EMPLEOS = "jobs_for_chatbot.json"
+
+# Campos por los que se puede filtrar el listado
+CAMPOS_FILTRABLES = ("location", "job_type", "remote_type", "experience_level", "majors")
+# Empleos por página por defecto en /get_all_jobs; esa primera página se sirve precomprimida
+LIMITE_PAGINA = 50
+
+
+def codificar_cursor(version: str, posicion: int) -> str:
+    return base64.urlsafe_b64encode(f"{version}:{posicion}".encode()).decode().rstrip("=")
+
+
+def normalizar_faceta(valor) -> str:
+    """Texto de una faceta en minúsculas y sin tildes; las listas se unen con '|'"""
+    if isinstance(valor, list):
+        valor = "|".join(str(v) for v in valor if v)
+    return plegar_acentos(str(valor or "").lower())
+
+
+class JobCatalog:
+    """Snapshot en memoria de los empleos con índices por id y visual_id.
+
+    Una instancia nunca se modifica después de construida: cuando el archivo
+    cambia se construye un catálogo nuevo y se reemplaza la referencia global.
+    """
+
+    def __init__(self, empleos: list, ruta: str = RUTA_EMPLEOS, mtime: float = 0.0, huella: str = ""):
+        self.empleos = empleos
+        self.ruta = ruta
+        self.mtime = mtime
+        self.huella = huella
+        self.por_id = {}
+        self.por_visual_id = {}
+        # Facetas normalizadas por empleo, en el mismo orden que `empleos`
+        self.facetas = [
+            {campo: normalizar_faceta(empleo.get(campo)) for campo in CAMPOS_FILTRABLES}
+            for empleo in empleos
+        ]
+        for empleo in empleos:
+            # Si hay duplicados se conserva el primero, igual que la búsqueda lineal anterior
+            if empleo.get("id"):
+                self.por_id.setdefault(empleo["id"], empleo)
+            if empleo.get("visual_id"):
+                self.por_visual_id.setdefault(empleo["visual_id"], empleo)
+        self._preserializar()
+
+    def _preserializar(self):
+        """Serializa y comprime una sola vez los cuerpos que sirven los endpoints del catálogo"""
+        # Fragmentos JSON por empleo para armar páginas del listado sin volver a serializar
+        self.json_empleos = [dumps(empleo) for empleo in self.empleos]
+        self.posicion = {id(empleo): i for i, empleo in enumerate(self.empleos)}
+
+        # Respuesta de /job/{id}, compartida entre id y visual_id
+        self.cuerpos_detalle = {}
+        for i, empleo in enumerate(self.empleos):
+            if self.por_id.get(empleo.get("id")) is not empleo and self.por_visual_id.get(empleo.get("visual_id")) is not empleo:
+                continue
+            self.cuerpos_detalle[id(empleo)] = CuerpoPrecomprimido(
+                b'{"job":' + self.json_empleos[i] + b',"found":true}'
+            )
+
+        # Primera página por defecto del listado sin filtros, la que pide el frontend al abrir
+        siguiente = codificar_cursor(self.huella[:16], LIMITE_PAGINA) if len(self.empleos) > LIMITE_PAGINA else None
+        self.cuerpo_primera_pagina = CuerpoPrecomprimido(
+            self.cuerpo_pagina(self.empleos[:LIMITE_PAGINA], len(self.empleos), siguiente)
+        )
+
+    def cuerpo_pagina(self, pagina, total: int, next_cursor) -> bytes:
+        """Arma el JSON de una página del listado reutilizando los fragmentos por empleo"""
+        fragmentos = b",".join(self.json_empleos[self.posicion[id(e)]] for e in pagina)
+        return (b'{"results":[' + fragmentos + b'],"total":' + str(total).encode()
+                + b',"next_cursor":' + dumps(next_cursor) + b"}")
+
+    def cuerpo_detalle(self, job_id: str):
+        """Cuerpo precomprimido de /job/{id}, o None si el empleo no existe"""
+        empleo = self.buscar(job_id)
+        return self.cuerpos_detalle.get(id(empleo)) if empleo is not None else None
+
+    @classmethod
+    def desde_archivo(cls, ruta: str = RUTA_EMPLEOS) -> "JobCatalog":
+        """Lee el archivo JSON y construye un catálogo nuevo"""
+        try:
+            mtime = os.stat(ruta).st_mtime
+            with open(ruta, "rb") as f:
+                contenido = f.read()
+        except FileNotFoundError:
+            print(f"No se encontró {ruta}")
+            return cls([], ruta=ruta)
+        return cls(json.loads(contenido), ruta=ruta, mtime=mtime, huella=huella_contenido(contenido))
+
+    def buscar(self, job_id: str):
+        """Busca un empleo por id o visual_id en O(1)"""
+        return self.por_id.get(job_id) or self.por_visual_id.get(job_id)
+
+    def filtrar(self, filtros: dict) -> list:
+        """Empleos que cumplen todos los filtros.
+
+        Cada filtro admite varios valores separados por comas (basta con que
+        coincida uno) y compara por subcadena sin distinguir tildes ni mayúsculas.
+        """
+        condiciones = []
+        for campo, valor in filtros.items():
+            if campo not in CAMPOS_FILTRABLES or not valor:
+                continue
+            opciones = [normalizar_faceta(v.strip()) for v in valor.split(",") if v.strip()]
+            if opciones:
+                condiciones.append((campo, opciones))
+        if not condiciones:
+            return self.empleos
+
+        return [
+            empleo for empleo, facetas in zip(self.empleos, self.facetas)
+            if all(any(o in facetas[campo] for o in opciones) for campo, opciones in condiciones)
+        ]
+
+    def valores_faceta(self, campo: str) -> set:
+        """Valores distintos de un campo en el catálogo (las listas se aplanan)"""
+        valores = set()
+        for empleo in self.empleos:
+            valor = empleo.get(campo)
+            for v in (valor if isinstance(valor, list) else [valor]):
+                if v:
+                    valores.add(v)
+        return valores
+
+    def filtrar_exacto(self, facetas: dict) -> list:
+        """Empleos cuyo campo coincide exactamente con alguno de los valores de cada faceta"""
+        def cumple(empleo, campo, valores):
+            valor = empleo.get(campo)
+            if isinstance(valor, list):
+                return any(v in valores for v in valor)
+            return valor in valores
+
+        return [
+            empleo for empleo in self.empleos
+            if all(cumple(empleo, campo, valores) for campo, valores in facetas.items())
+        ]
+
+    def __len__(self):
+        return len(self.empleos)
+
+
+def proyectar(empleo: dict, campos) -> dict:
+    """Devuelve solo los campos pedidos del empleo (todos si `campos` está vacío)"""
+    if not campos:
+        return empleo
+    return {campo: empleo.get(campo) for campo in campos if campo in empleo}
+
+
+def huella_contenido(contenido: bytes) -> str:
+    """Hash SHA-256 del contenido del archivo de empleos"""
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def huella_archivo(ruta: str = RUTA_EMPLEOS) -> str:
+    """Hash SHA-256 del archivo de empleos, o cadena vacía si no existe"""
+    try:
+        with open(ruta, "rb") as f:
+            return huella_contenido(f.read())
+    except FileNotFoundError:
+        return ""
@@ -0,0 +1,386 @@
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+MODELO_EMBEDDINGS = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Tamaño de lote para leer/escribir en Chroma sin superar sus límites por llamada
+LOTE_CHROMA = 1000
+
+# Configuración del pipeline de embeddings para construir el índice
+EMBED_LOTE = int(os.getenv("EMBED_LOTE", "64"))
+# Hilos de torch por proceso (0 = el valor por defecto de torch)
+EMBED_HILOS = int(os.getenv("EMBED_HILOS", "0"))
+# Procesos para repartir los lotes entre núcleos (0 = todo en el proceso del servidor)
+EMBED_PROCESOS = int(os.getenv("EMBED_PROCESOS", "0"))
+# Con menos lotes que estos se embebe en el proceso del servidor: no compensa despertar el pool
+EMBED_MIN_LOTES_POOL = int(os.getenv("EMBED_MIN_LOTES_POOL", "8"))
+# Cache persistente de embeddings por texto de chunk (cadena vacía = desactivada)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "./data/cache_embeddings.sqlite3")
+
+# LangChain se importa recién al generar chunks: el servidor arranca sin pagar ese costo
+_splitter = None
+
+
+def obtener_splitter():
+    """Splitter de chunks de 500 caracteres, creado la primera vez que se usa"""
+    global _splitter
+    if _splitter is None:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        _splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=100, length_function=len,
+                separators=["\n\n", "\n", " ", ""])
+    return _splitter
+
+
+def crear_documento_empleo(empleo):
+    """Crea un documento LangChain para un empleo individual"""
+    from langchain.schema import Document
+    
+    # Función auxiliar para manejar listas con valores None
+    def safe_join_lista(lista, separador=", "):
+        if not lista:
+            return "No especificado"
+        # Filtrar valores None y convertir a string
+        elementos_limpios = [str(item) for item in lista if item is not None and str(item).strip()]
+        return separador.join(elementos_limpios) if elementos_limpios else "No especificado"
+    
+    # Crear contenido del documento
+    contenido = f"""
+    Título: {empleo.get('title', 'Sin título')}
+    Empresa: {empleo.get('company', 'Sin empresa')}
+    Ubicación: {empleo.get('location', 'Sin ubicación')}
+    Tipo de empleo: {empleo.get('job_type', 'Sin especificar')}
+    Salario: {empleo.get('salary_info', 'No especificado')}
+
+    Descripción:
+    {empleo.get('description', 'Sin descripción')}
+
+    Requisitos:
+    {empleo.get('requirements', 'Sin requisitos')}
+
+    Información adicional:
+    - Email: {empleo.get('contact_email', 'No especificado')}
+    - Remoto: {empleo.get('remote_type', 'No especificado')}
+    - Nivel de experiencia: {empleo.get('experience_level', 'No especificado')}
+    - Nivel de educación: {empleo.get('education_level', 'No especificado')}
+    - Carreras requeridas: {safe_join_lista(empleo.get('majors', []))}
+    - Idiomas: {safe_join_lista(empleo.get('languages', []))}
+    - Número de vacantes: {empleo.get('vacancies', 'No especificado')}
+    - Horas por semana: {empleo.get('hours_per_week', 'No especificado')}
+    """
+
+    # Crear metadatos para el documento
+    metadatos = {
+        "id": empleo.get('id', ''),
+        "visual_id": empleo.get('visual_id', ''),
+        "title": empleo.get('title', ''),
+        "company": empleo.get('company', ''),
+        "location": empleo.get('location', ''),
+        "job_type": empleo.get('job_type', ''),
+        "salary_info": empleo.get('salary_info', ''),
+        "contact_email": empleo.get('contact_email', ''),
+        "remote_type": empleo.get('remote_type', ''),
+        "experience_level": empleo.get('experience_level', ''),
+        "education_level": empleo.get('education_level', ''),
+        "majors": safe_join_lista(empleo.get('majors', [])),
+        "languages": safe_join_lista(empleo.get('languages', [])),
+        "vacancies": empleo.get('vacancies', ''),
+        "hours_per_week": empleo.get('hours_per_week', ''),
+        "start_date": empleo.get('start_date', ''),
+        "end_date": empleo.get('end_date', ''),
+        "tipo_documento": "empleo"
+    }
+    
+    return Document(
+        page_content=contenido.strip(),
+        metadata=metadatos
+    )
+
+
+def hash_empleo(empleo) -> str:
+    """Hash estable del contenido de un empleo, para detectar cambios entre scrapes"""
+    serializado = json.dumps(empleo, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+def clave_empleo(empleo, huella: str) -> str:
+    """Identificador del empleo en el índice; los empleos sin id se indexan por su hash"""
+    return empleo.get("id") or f"sin_id_{huella[:16]}"
+
+
+def crear_chunks_empleo(empleo, huella: str = None):
+    """Divide el documento de un empleo en chunks con ids deterministas y hash del empleo"""
+    huella = huella or hash_empleo(empleo)
+    clave = clave_empleo(empleo, huella)
+    chunks = obtener_splitter().split_documents([crear_documento_empleo(empleo)])
+    ids = []
+    for i, chunk in enumerate(chunks):
+        chunk.metadata["id"] = clave
+        chunk.metadata["hash_empleo"] = huella
+        ids.append(f"{clave}:{i}")
+    return ids, chunks
+
+
+def leer_estado_coleccion(coleccion):
+    """Devuelve {clave_empleo: (hash, [ids de chunks])} de lo que hay en la colección"""
+    estado = {}
+    total = coleccion.count()
+    for desde in range(0, total, LOTE_CHROMA):
+        lote = coleccion.get(include=["metadatas"], offset=desde, limit=LOTE_CHROMA)
+        for chunk_id, metadata in zip(lote["ids"], lote["metadatas"]):
+            clave = metadata.get("id", "")
+            huella, ids = estado.get(clave, (metadata.get("hash_empleo", ""), []))
+            # Chunks sin hash (índices antiguos) nunca coinciden y se reindexan
+            if metadata.get("hash_empleo", "") != huella:
+                huella = ""
+            ids.append(chunk_id)
+            estado[clave] = (huella, ids)
+    return estado
+
+
+def clonar_coleccion(origen, destino):
+    """Copia vectores, textos y metadatos de una colección a otra sin recalcular embeddings"""
+    total = origen.count()
+    for desde in range(0, total, LOTE_CHROMA):
+        lote = origen.get(include=["embeddings", "documents", "metadatas"], offset=desde, limit=LOTE_CHROMA)
+        if lote["ids"]:
+            destino.upsert(
+                ids=lote["ids"],
+                embeddings=lote["embeddings"],
+                documents=lote["documents"],
+                metadatas=lote["metadatas"]
+            )
+    return total
+
+
+# Embeddings cargados en cada proceso del pool (ver _iniciar_proceso)
+_embeddings_proceso = None
+
+
+def _iniciar_proceso(modelo: str, hilos: int, encode_kwargs: dict):
+    global _embeddings_proceso
+    import torch
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if hilos > 0:
+        torch.set_num_threads(hilos)
+    # Misma clase y opciones que en el servidor: el preprocesamiento de
+    # embed_documents (saltos de línea a espacios) da vectores idénticos
+    _embeddings_proceso = HuggingFaceEmbeddings(model_name=modelo, model_kwargs={"device": "cpu"},
+                                                encode_kwargs=encode_kwargs)
+
+
+def _embeber_en_proceso(textos):
+    return _embeddings_proceso.embed_documents(textos)
+
+
+class PipelineEmbeddings:
+    """Calcula embeddings por lotes, opcionalmente repartidos en un pool de procesos.
+
+    Con `procesos=0` usa el modelo ya cargado en el servidor. Con `procesos>0`
+    cada proceso carga su propia copia de MiniLM y recibe lotes completos, así
+    la construcción del índice escala con los núcleos de la máquina. El pool se
+    crea la primera vez que hace falta y se reutiliza entre sincronizaciones;
+    los deltas de menos de `min_lotes_pool` lotes se embeben en el servidor.
+
+    Si hay `cache`, solo llegan al modelo los textos que no estén en ella.
+    """
+
+    def __init__(self, embeddings, tamano_lote: int = EMBED_LOTE, procesos: int = EMBED_PROCESOS,
+                 hilos: int = EMBED_HILOS, modelo: str = MODELO_EMBEDDINGS, cache=None,
+                 min_lotes_pool: int = EMBED_MIN_LOTES_POOL):
+        self.embeddings = embeddings
+        self.tamano_lote = max(1, tamano_lote)
+        self.procesos = procesos
+        self.hilos = hilos
+        self.modelo = modelo
+        self.cache = cache
+        self.min_lotes_pool = min_lotes_pool
+        self._pool = None
+        self._lock_pool = threading.Lock()
+        if hilos > 0 and procesos == 0:
+            import torch
+            torch.set_num_threads(hilos)
+
+    def embeber(self, lotes):
+        """Recibe un iterable de listas de textos y produce sus embeddings en el mismo orden"""
+        if self.cache is None:
+            yield from self._calcular(lotes)
+            return
+
+        # Cada entrada es [textos, vectores, índices que faltan]; se emiten en orden
+        # en cuanto el modelo completa los vectores que no estaban en cache
+        entradas = deque()
+        sin_completar = deque()
+
+        def faltantes():
+            for textos in lotes:
+                vectores = self.cache.obtener_muchos(textos)
+                faltan = [i for i, v in enumerate(vectores) if v is None]
+                entrada = [textos, vectores, faltan]
+                entradas.append(entrada)
+                if faltan:
+                    sin_completar.append(entrada)
+                    yield [textos[i] for i in faltan]
+
+        for calculados in self._calcular(faltantes()):
+            textos, vectores, faltan = sin_completar.popleft()
+            for i, vector in zip(faltan, calculados):
+                vectores[i] = vector
+            self.cache.guardar_muchos([textos[i] for i in faltan], calculados)
+            faltan.clear()
+            while entradas and not entradas[0][2]:
+                yield entradas.popleft()[1]
+        while entradas:
+            yield entradas.popleft()[1]
+
+    def encode_kwargs(self) -> dict:
+        """Opciones de encode del modelo del servidor, para replicarlas en el pool"""
+        return dict(getattr(self.embeddings, "encode_kwargs", None) or {})
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        """Pool de procesos con MiniLM cargado, creado una sola vez"""
+        with self._lock_pool:
+            if self._pool is None:
+                # spawn evita heredar el estado de torch del proceso del servidor
+                contexto = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.procesos, mp_context=contexto,
+                                                 initializer=_iniciar_proceso,
+                                                 initargs=(self.modelo, self.hilos, self.encode_kwargs()))
+            return self._pool
+
+    def cerrar(self):
+        """Detiene el pool de procesos, si se llegó a crear"""
+        with self._lock_pool:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _calcular(self, lotes):
+        if self.procesos <= 0:
+            for textos in lotes:
+                yield self.embeddings.embed_documents(textos)
+            return
+
+        # Con pocos lotes (la sincronización típica de un delta) el modelo del servidor
+        # termina antes de lo que tardarían los procesos en cargar MiniLM
+        lotes = iter(lotes)
+        primeros = list(itertools.islice(lotes, self.min_lotes_pool))
+        if len(primeros) < self.min_lotes_pool and self.embeddings is not None:
+            for textos in primeros:
+                yield self.embeddings.embed_documents(textos)
+            return
+
+        pool = self._obtener_pool()
+        # Ventana acotada de lotes en vuelo para no cargar todo el corpus en memoria
+        en_vuelo = deque()
+        try:
+            for textos in itertools.chain(primeros, lotes):
+                en_vuelo.append(pool.submit(_embeber_en_proceso, textos))
+                if len(en_vuelo) >= self.procesos * 2:
+                    yield en_vuelo.popleft().result()
+            while en_vuelo:
+                yield en_vuelo.popleft().result()
+        except BrokenProcessPool:
+            # Un proceso murió (p. ej. sin memoria): la próxima sincronización crea un pool nuevo
+            self.cerrar()
+            raise
+        finally:
+            for futuro in en_vuelo:
+                futuro.cancel()
+
+
+def agrupar_en_lotes(chunks_por_empleo, tamano_lote: int):
+    """Aplana (ids, chunks) por empleo en lotes de `tamano_lote` chunks"""
+    ids, chunks = [], []
+    for ids_empleo, chunks_empleo in chunks_por_empleo:
+        ids.extend(ids_empleo)
+        chunks.extend(chunks_empleo)
+        while len(chunks) >= tamano_lote:
+            yield ids[:tamano_lote], chunks[:tamano_lote]
+            ids, chunks = ids[tamano_lote:], chunks[tamano_lote:]
+    if chunks:
+        yield ids, chunks
+
+
+def escribir_chunks(coleccion, chunks_por_empleo, pipeline: PipelineEmbeddings) -> int:
+    """Embebe los chunks en streaming y los escribe en Chroma en lotes grandes"""
+    # Lotes enviados al pipeline y aún sin vector; embeber() conserva el orden
+    en_espera = deque()
+
+    def textos_por_lote():
+        for ids, chunks in agrupar_en_lotes(chunks_por_empleo, pipeline.tamano_lote):
+            en_espera.append((ids, chunks))
+            yield [c.page_content for c in chunks]
+
+    pendiente = {"ids": [], "embeddings": [], "documents": [], "metadatas": []}
+    total = 0
+
+    def volcar():
+        if pendiente["ids"]:
+            coleccion.upsert(**pendiente)
+        for lista in pendiente.values():
+            lista.clear()
+
+    for vectores in pipeline.embeber(textos_por_lote()):
+        ids, chunks = en_espera.popleft()
+        pendiente["ids"].extend(ids)
+        pendiente["embeddings"].extend(vectores)
+        pendiente["documents"].extend(c.page_content for c in chunks)
+        pendiente["metadatas"].extend(c.metadata for c in chunks)
+        total += len(ids)
+        if len(pendiente["ids"]) >= LOTE_CHROMA:
+            volcar()
+    volcar()
+    return total
+
+
+def sincronizar_coleccion(coleccion, empleos, pipeline: PipelineEmbeddings):
+    """Actualiza la colección en el sitio para que refleje exactamente `empleos`.
+
+    Solo se calculan embeddings de los empleos nuevos o cuyo hash cambió; los
+    chunks de empleos que ya no están en el catálogo se eliminan.
+    """
+    estado = leer_estado_coleccion(coleccion)
+    resumen = {"agregados": 0, "actualizados": 0, "eliminados": 0, "sin_cambios": 0, "chunks_embebidos": 0}
+
+    vistos = set()
+    ids_a_borrar = []
+    pendientes = []
+    for empleo in empleos:
+        huella = hash_empleo(empleo)
+        clave = clave_empleo(empleo, huella)
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+
+        huella_anterior, ids_anteriores = estado.get(clave, (None, []))
+        if huella_anterior == huella:
+            resumen["sin_cambios"] += 1
+            continue
+        if huella_anterior is None:
+            resumen["agregados"] += 1
+        else:
+            # El número de chunks puede cambiar: se borran los anteriores antes de insertar
+            resumen["actualizados"] += 1
+            ids_a_borrar.extend(ids_anteriores)
+        pendientes.append((empleo, huella))
+
+    for clave, (_, ids_anteriores) in estado.items():
+        if clave not in vistos:
+            resumen["eliminados"] += 1
+            ids_a_borrar.extend(ids_anteriores)
+
+    for desde in range(0, len(ids_a_borrar), LOTE_CHROMA):
+        coleccion.delete(ids=ids_a_borrar[desde:desde + LOTE_CHROMA])
+
+    # Los chunks se generan de forma perezosa, empleo por empleo
+    chunks_por_empleo = (crear_chunks_empleo(empleo, huella) for empleo, huella in pendientes)
+    resumen["chunks_embebidos"] = escribir_chunks(coleccion, chunks_por_empleo, pipeline)
+    return resumen
@@ -0,0 +1,485 @@
+import json
+import os
+import shutil
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# hnswlib es opcional: solo hace falta con INDICE_VECTORIAL=hnsw
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+from busqueda import filtro_chroma, similitud_desde_distancia
+from indexador import clave_empleo, crear_chunks_empleo, hash_empleo
+
+# Backend de búsqueda vectorial: "chroma" (por defecto), "plano" (matriz NumPy en
+# memoria mapeada, exacto) o los aproximados "ivf" y "hnsw" para corpus grandes
+INDICE_VECTORIAL = os.getenv("INDICE_VECTORIAL", "chroma")
+# Directorio con un subdirectorio por versión del catálogo para los índices locales
+INDICE_PLANO_PATH = os.getenv("INDICE_PLANO_PATH", "./data/indice_plano")
+# IVF: listas (0 = 4 * raíz del número de chunks) y listas revisadas por consulta
+IVF_LISTAS = int(os.getenv("IVF_LISTAS", "0"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+# HNSW: vecinos por nodo, amplitud al construir y amplitud de búsqueda (más = más recall)
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCCION = int(os.getenv("HNSW_EF_CONSTRUCCION", "200"))
+HNSW_EF = int(os.getenv("HNSW_EF", "64"))
+PRECISIONES = ("float32", "float16", "int8")
+
+ARCHIVO_VECTORES = "vectores.npy"
+ARCHIVO_METADATOS = "metadatos.json"
+ARCHIVO_IVF_CENTROIDES = "ivf_centroides.npy"
+ARCHIVO_IVF_ORDEN = "ivf_orden.npy"
+ARCHIVO_IVF_INICIOS = "ivf_inicios.npy"
+ARCHIVO_HNSW = "hnsw.bin"
+ARCHIVO_FLOAT16 = "vectores_float16.npy"
+ARCHIVO_INT8 = "vectores_int8.npy"
+ARCHIVO_ESCALAS_INT8 = "escalas_int8.npy"
+# Marca que deja el proceso cargador cuando todas las estructuras de una versión están escritas
+ARCHIVO_LISTO = "LISTO"
+# Filas por bloque al asignar vectores a listas, para acotar la memoria
+LOTE_ASIGNACION = 65536
+# Filas por bloque al puntuar la matriz cuantizada; bloques chicos caben en la cache del CPU
+LOTE_CUANTIZADO = 4096
+
+
+def precision_configurada() -> str:
+    """Precisión de la matriz que se recorre en cada consulta (INDICE_PRECISION): float32, float16 o int8.
+
+    Se lee al abrir cada versión del índice y no al importar el módulo.
+    """
+    return os.getenv("INDICE_PRECISION", "float32")
+
+
+def rerank_configurado() -> int:
+    """Con float16/int8 se re-puntúan en float32 k * INDICE_RERANK candidatos (0 = sin re-ranking)"""
+    return int(os.getenv("INDICE_RERANK", "4"))
+
+
+class VectorIndex(ABC):
+    """Interfaz común de los backends de búsqueda vectorial.
+
+    `buscar` devuelve [(metadatos del chunk, puntaje)] ordenado de mayor a
+    menor puntaje, opcionalmente solo entre los chunks de los empleos `permitidos`.
+    """
+
+    nombre = ""
+
+    @abstractmethod
+    def buscar(self, consulta: str, k: int, permitidos=None):
+        """[(metadatos del chunk, puntaje)] de los k chunks más parecidos a la consulta"""
+
+    @abstractmethod
+    def __len__(self):
+        """Número de vectores del índice"""
+
+
+class IndiceChroma(VectorIndex):
+    """Colección persistente de Chroma (vía LangChain) como backend"""
+
+    nombre = "chroma"
+
+    def __init__(self, vectorstore):
+        self.vectorstore = vectorstore
+
+    @property
+    def coleccion(self):
+        return self.vectorstore._collection
+
+    def buscar(self, consulta: str, k: int, permitidos=None):
+        resultados = self.vectorstore.similarity_search_with_score(consulta, k=k, filter=filtro_chroma(permitidos))
+        return [(doc.metadata, similitud_desde_distancia(distancia)) for doc, distancia in resultados]
+
+    def __len__(self):
+        return self.coleccion.count()
+
+
+class IndicePlano(VectorIndex):
+    """Búsqueda exacta por producto punto sobre una matriz float32 normalizada.
+
+    La matriz se abre desde un `.npy` con memoria mapeada, así varios procesos
+    comparten la misma copia en el page cache del sistema operativo. Para unos
+    pocos miles de chunks un top-k es una multiplicación matriz-vector.
+
+    Con `cuantizados` (float16, o int8 con una escala por vector) cada consulta
+    recorre esa matriz más chica y solo los mejores k * `rerank` candidatos se
+    re-puntúan con la float32, que entonces casi no se lee del disco.
+    """
+
+    nombre = "plano"
+
+    def __init__(self, vectores, metadatos, embeddings, cuantizados=None, escalas=None, rerank: int = None):
+        self.vectores = vectores
+        self.metadatos = metadatos
+        self.embeddings = embeddings
+        self.cuantizados = cuantizados
+        self.escalas = escalas
+        self.rerank = rerank_configurado() if rerank is None else rerank
+        # Filas de cada empleo, para restringir la búsqueda a los candidatos por facetas
+        filas = {}
+        for fila, metadata in enumerate(metadatos):
+            filas.setdefault(metadata.get("id", ""), []).append(fila)
+        self.filas_por_empleo = {empleo_id: np.array(lista, dtype=np.int64) for empleo_id, lista in filas.items()}
+
+    @classmethod
+    def abrir(cls, directorio: str, embeddings, precision: str = None, rerank: int = None) -> "IndicePlano":
+        """Abre un índice guardado con `guardar_indice_plano`, en modo solo lectura.
+
+        Sin `precision` ni `rerank` se usan los de INDICE_PRECISION e INDICE_RERANK.
+        """
+        precision = precision or precision_configurada()
+        if precision not in PRECISIONES:
+            raise ValueError(f"Precisión desconocida: {precision}")
+        vectores = np.load(os.path.join(directorio, ARCHIVO_VECTORES), mmap_mode="r")
+        with open(os.path.join(directorio, ARCHIVO_METADATOS), "r", encoding="utf-8") as f:
+            metadatos = json.load(f)
+        cuantizados = escalas = None
+        if precision == "float16":
+            cuantizados = np.load(os.path.join(directorio, ARCHIVO_FLOAT16), mmap_mode="r")
+        elif precision == "int8":
+            cuantizados = np.load(os.path.join(directorio, ARCHIVO_INT8), mmap_mode="r")
+            escalas = np.load(os.path.join(directorio, ARCHIVO_ESCALAS_INT8), mmap_mode="r")
+        return cls(vectores, metadatos, embeddings, cuantizados, escalas, rerank)
+
+    @property
+    def matriz_busqueda(self):
+        """Matriz que se recorre completa en cada consulta"""
+        return self.vectores if self.cuantizados is None else self.cuantizados
+
+    def vector_consulta(self, consulta: str):
+        vector = np.asarray(self.embeddings.embed_query(consulta), dtype=np.float32)
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma else vector
+
+    def buscar(self, consulta: str, k: int, permitidos=None):
+        if not len(self.metadatos) or k <= 0:
+            return []
+        filas = None
+        if permitidos is not None:
+            listas = [self.filas_por_empleo[i] for i in permitidos if i in self.filas_por_empleo]
+            if not listas:
+                return []
+            filas = np.concatenate(listas)
+        mejores, puntajes = self.buscar_vector(self.vector_consulta(consulta), k, filas)
+        return [(self.metadatos[fila], float(puntaje)) for fila, puntaje in zip(mejores, puntajes)]
+
+    def puntajes(self, vector, filas=None):
+        """Producto punto con la matriz de búsqueda, por bloques para no convertir toda la matriz cuantizada a la vez"""
+        if self.cuantizados is None:
+            return self.vectores @ vector if filas is None else self.vectores[filas] @ vector
+        total = len(self.cuantizados) if filas is None else len(filas)
+        puntajes = np.empty(total, dtype=np.float32)
+        for desde in range(0, total, LOTE_CUANTIZADO):
+            hasta = min(total, desde + LOTE_CUANTIZADO)
+            indices = slice(desde, hasta) if filas is None else filas[desde:hasta]
+            puntajes[desde:hasta] = self.cuantizados[indices].astype(np.float32) @ vector
+            if self.escalas is not None:
+                puntajes[desde:hasta] *= self.escalas[indices]
+        return puntajes
+
+    def buscar_vector(self, vector, k: int, filas=None):
+        """Top-k. Devuelve (filas, puntajes) ordenados, opcionalmente solo entre `filas`"""
+        puntajes = self.puntajes(vector, filas)
+        rerank = self.cuantizados is not None and self.rerank > 0
+        posiciones = mejores_k(puntajes, k * self.rerank if rerank else k)
+        candidatos = posiciones if filas is None else filas[posiciones]
+        if not rerank:
+            return candidatos, puntajes[posiciones]
+        # Re-ranking: solo los candidatos se leen de la matriz float32, en orden de fila
+        candidatos = np.sort(candidatos)
+        exactos = self.vectores[candidatos] @ vector
+        seleccion = mejores_k(exactos, k)
+        return candidatos[seleccion], exactos[seleccion]
+
+    def __len__(self):
+        return len(self.metadatos)
+
+
+class IndiceIVF(IndicePlano):
+    """Índice aproximado de listas invertidas (IVF) sobre la misma matriz del índice plano.
+
+    Los chunks se agrupan con k-means en `listas`; cada consulta solo compara
+    contra los chunks de las `nprobe` listas con centroide más cercano, así
+    el costo crece con nprobe y no con el tamaño del corpus.
+    """
+
+    nombre = "ivf"
+
+    @classmethod
+    def abrir(cls, directorio: str, embeddings, nprobe: int = IVF_NPROBE, **opciones) -> "IndiceIVF":
+        indice = super().abrir(directorio, embeddings, **opciones)
+        indice.centroides = np.load(os.path.join(directorio, ARCHIVO_IVF_CENTROIDES))
+        indice.orden = np.load(os.path.join(directorio, ARCHIVO_IVF_ORDEN), mmap_mode="r")
+        indice.inicios = np.load(os.path.join(directorio, ARCHIVO_IVF_INICIOS))
+        indice.nprobe = nprobe
+        return indice
+
+    def buscar_vector(self, vector, k: int, filas=None):
+        # Con pre-filtro por facetas los candidatos ya son pocos: búsqueda exacta entre ellos
+        if filas is not None or not len(self.centroides):
+            return super().buscar_vector(vector, k, filas)
+        nprobe = min(self.nprobe, len(self.centroides))
+        cercanas = np.argpartition(-(self.centroides @ vector), nprobe - 1)[:nprobe]
+        filas = np.concatenate([self.orden[self.inicios[l]:self.inicios[l + 1]] for l in cercanas])
+        return super().buscar_vector(vector, k, filas)
+
+
+class IndiceHNSW(IndicePlano):
+    """Índice aproximado HNSW (hnswlib) sobre la misma matriz del índice plano.
+
+    `ef` controla la amplitud de la búsqueda en el grafo: más ef, más recall
+    y más latencia. Requiere `pip install hnswlib`.
+    """
+
+    nombre = "hnsw"
+
+    @classmethod
+    def abrir(cls, directorio: str, embeddings, ef: int = HNSW_EF, **opciones) -> "IndiceHNSW":
+        if hnswlib is None:
+            raise RuntimeError("INDICE_VECTORIAL=hnsw requiere el paquete hnswlib")
+        indice = super().abrir(directorio, embeddings, **opciones)
+        indice.grafo = hnswlib.Index(space="ip", dim=indice.vectores.shape[1])
+        indice.grafo.load_index(os.path.join(directorio, ARCHIVO_HNSW), max_elements=len(indice.vectores))
+        indice.grafo.set_ef(ef)
+        return indice
+
+    def buscar_vector(self, vector, k: int, filas=None):
+        if filas is not None:
+            return super().buscar_vector(vector, k, filas)
+        k = min(k, len(self.vectores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        etiquetas, distancias = self.grafo.knn_query(vector, k=k, num_threads=1)
+        # En el espacio "ip" hnswlib devuelve 1 - producto punto
+        return etiquetas[0].astype(np.int64), 1.0 - distancias[0]
+
+
+def mejores_k(puntajes, k: int):
+    """Posiciones de los k mayores puntajes, de mayor a menor"""
+    k = min(k, len(puntajes))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    # argpartition evita ordenar todos los puntajes para quedarse con k
+    mejores = np.argpartition(-puntajes, k - 1)[:k]
+    return mejores[np.argsort(-puntajes[mejores])]
+
+
+def normalizar_filas(vectores):
+    """Normaliza cada vector a norma 1 para que el producto punto sea la similitud coseno"""
+    vectores = np.asarray(vectores, dtype=np.float32)
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return vectores / normas
+
+
+def guardar_indice_plano(directorio: str, empleos, pipeline):
+    """Embebe los chunks de `empleos` y guarda matriz + metadatos en `directorio`.
+
+    Se escribe en un directorio temporal y se renombra al final, así un lector
+    nunca abre un índice a medio escribir. Los chunks sin cambios salen de la
+    cache de embeddings del pipeline.
+    """
+    metadatos, textos = [], []
+    vistos = set()
+    for empleo in empleos:
+        huella = hash_empleo(empleo)
+        clave = clave_empleo(empleo, huella)
+        if clave in vistos:
+            continue
+        vistos.add(clave)
+        _, chunks = crear_chunks_empleo(empleo, huella)
+        for chunk in chunks:
+            metadatos.append(chunk.metadata)
+            textos.append(chunk.page_content)
+
+    temporal = directorio + ".tmp"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    lotes = (textos[desde:desde + pipeline.tamano_lote] for desde in range(0, len(textos), pipeline.tamano_lote))
+    matriz = None
+    fila = 0
+    for vectores in pipeline.embeber(lotes):
+        vectores = normalizar_filas(vectores)
+        if matriz is None:
+            # La dimensión se conoce con el primer lote; las filas se escriben directo al archivo
+            matriz = np.lib.format.open_memmap(os.path.join(temporal, ARCHIVO_VECTORES), mode="w+",
+                                               dtype=np.float32, shape=(len(textos), vectores.shape[1]))
+        matriz[fila:fila + len(vectores)] = vectores
+        fila += len(vectores)
+    if matriz is None:
+        np.save(os.path.join(temporal, ARCHIVO_VECTORES), np.zeros((0, 0), dtype=np.float32))
+    else:
+        matriz.flush()
+        del matriz
+
+    with open(os.path.join(temporal, ARCHIVO_METADATOS), "w", encoding="utf-8") as f:
+        json.dump(metadatos, f, ensure_ascii=False)
+
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.replace(temporal, directorio)
+    return len(textos)
+
+
+def guardar_npy(directorio: str, nombre: str, arreglo):
+    """Guarda un .npy con escritura atómica (archivo temporal + rename)"""
+    temporal = os.path.join(directorio, nombre + ".tmp")
+    with open(temporal, "wb") as f:
+        np.save(f, arreglo)
+    os.replace(temporal, os.path.join(directorio, nombre))
+
+
+def asignar_listas(vectores, centroides):
+    """Lista (centroide más cercano) de cada vector, procesando por bloques"""
+    asignacion = np.empty(len(vectores), dtype=np.int64)
+    for desde in range(0, len(vectores), LOTE_ASIGNACION):
+        bloque = np.asarray(vectores[desde:desde + LOTE_ASIGNACION])
+        asignacion[desde:desde + LOTE_ASIGNACION] = np.argmax(bloque @ centroides.T, axis=1)
+    return asignacion
+
+
+def entrenar_centroides(vectores, listas: int, iteraciones: int = 10, semilla: int = 0):
+    """K-means esférico sobre una muestra de hasta 256 vectores por lista"""
+    generador = np.random.default_rng(semilla)
+    muestra = np.sort(generador.choice(len(vectores), min(len(vectores), listas * 256), replace=False))
+    datos = np.asarray(vectores[muestra])
+    centroides = datos[generador.choice(len(datos), listas, replace=False)].copy()
+    for _ in range(iteraciones):
+        asignacion = asignar_listas(datos, centroides)
+        orden = np.argsort(asignacion, kind="stable")
+        presentes, inicios = np.unique(asignacion[orden], return_index=True)
+        # Las listas que quedan vacías conservan su centroide anterior
+        centroides[presentes] = normalizar_filas(np.add.reduceat(datos[orden], inicios, axis=0))
+    return centroides
+
+
+def guardar_ivf(directorio: str, listas: int = IVF_LISTAS):
+    """Entrena las listas IVF sobre `vectores.npy` y guarda centroides, orden e inicios de cada lista"""
+    vectores = np.load(os.path.join(directorio, ARCHIVO_VECTORES), mmap_mode="r")
+    total = len(vectores)
+    listas = min(listas or max(1, int(4 * np.sqrt(total))), total)
+    if listas:
+        centroides = entrenar_centroides(vectores, listas)
+        asignacion = asignar_listas(vectores, centroides)
+    else:
+        centroides = np.zeros((0, vectores.shape[1] if vectores.ndim == 2 else 0), dtype=np.float32)
+        asignacion = np.empty(0, dtype=np.int64)
+    orden = np.argsort(asignacion, kind="stable")
+    inicios = np.searchsorted(asignacion[orden], np.arange(listas + 1))
+    guardar_npy(directorio, ARCHIVO_IVF_ORDEN, orden)
+    guardar_npy(directorio, ARCHIVO_IVF_INICIOS, inicios)
+    # Los centroides van al final: su presencia indica que el índice está completo
+    guardar_npy(directorio, ARCHIVO_IVF_CENTROIDES, centroides)
+    return listas
+
+
+def guardar_hnsw(directorio: str, m: int = HNSW_M, ef_construccion: int = HNSW_EF_CONSTRUCCION):
+    """Construye el grafo HNSW sobre `vectores.npy` y lo guarda en `hnsw.bin`"""
+    if hnswlib is None:
+        raise RuntimeError("INDICE_VECTORIAL=hnsw requiere el paquete hnswlib")
+    vectores = np.load(os.path.join(directorio, ARCHIVO_VECTORES), mmap_mode="r")
+    grafo = hnswlib.Index(space="ip", dim=vectores.shape[1])
+    grafo.init_index(max_elements=max(1, len(vectores)), M=m, ef_construction=ef_construccion)
+    for desde in range(0, len(vectores), LOTE_ASIGNACION):
+        bloque = np.asarray(vectores[desde:desde + LOTE_ASIGNACION])
+        grafo.add_items(bloque, np.arange(desde, desde + len(bloque)))
+    temporal = os.path.join(directorio, ARCHIVO_HNSW + ".tmp")
+    grafo.save_index(temporal)
+    os.replace(temporal, os.path.join(directorio, ARCHIVO_HNSW))
+
+
+def guardar_cuantizado(directorio: str, precision: str):
+    """Genera la copia float16, o int8 con escala por vector, de `vectores.npy`"""
+    vectores = np.load(os.path.join(directorio, ARCHIVO_VECTORES), mmap_mode="r")
+    archivo = ARCHIVO_FLOAT16 if precision == "float16" else ARCHIVO_INT8
+    temporal = os.path.join(directorio, archivo + ".tmp")
+    destino = np.lib.format.open_memmap(temporal, mode="w+", dtype=np.dtype(precision), shape=vectores.shape)
+    escalas = np.ones(len(vectores), dtype=np.float32)
+    for desde in range(0, len(vectores), LOTE_ASIGNACION):
+        bloque = np.asarray(vectores[desde:desde + LOTE_ASIGNACION])
+        if precision == "float16":
+            destino[desde:desde + len(bloque)] = bloque.astype(np.float16)
+            continue
+        # Cuantización simétrica: el mayor valor absoluto de cada vector se mapea a 127
+        maximos = np.abs(bloque).max(axis=1) if bloque.size else np.zeros(len(bloque), dtype=np.float32)
+        maximos[maximos == 0] = 1.0
+        escalas[desde:desde + len(bloque)] = maximos / 127.0
+        destino[desde:desde + len(bloque)] = np.round(bloque / escalas[desde:desde + len(bloque), None]).astype(np.int8)
+    destino.flush()
+    del destino
+    if precision == "int8":
+        guardar_npy(directorio, ARCHIVO_ESCALAS_INT8, escalas)
+    os.replace(temporal, os.path.join(directorio, archivo))
+
+
+def asegurar_cuantizado(directorio: str, precision: str):
+    """Genera la matriz cuantizada de `precision` si todavía no existe"""
+    if precision not in PRECISIONES:
+        raise ValueError(f"Precisión desconocida: {precision}")
+    if precision == "float32":
+        return
+    archivo = ARCHIVO_FLOAT16 if precision == "float16" else ARCHIVO_INT8
+    if not os.path.exists(os.path.join(directorio, archivo)):
+        guardar_cuantizado(directorio, precision)
+        print(f"Matriz {precision} creada")
+
+
+def abrir_indice_local(directorio: str, tipo: str, embeddings):
+    """Abre el índice local de `tipo` (plano, ivf o hnsw), generando lo que falte sobre la matriz ya guardada"""
+    precision = precision_configurada()
+    asegurar_cuantizado(directorio, precision)
+    if tipo == "ivf":
+        if not os.path.exists(os.path.join(directorio, ARCHIVO_IVF_CENTROIDES)):
+            print(f"Índice IVF creado con {guardar_ivf(directorio)} listas")
+        return IndiceIVF.abrir(directorio, embeddings, precision=precision)
+    if tipo == "hnsw":
+        if not os.path.exists(os.path.join(directorio, ARCHIVO_HNSW)):
+            guardar_hnsw(directorio)
+            print("Índice HNSW creado")
+        return IndiceHNSW.abrir(directorio, embeddings, precision=precision)
+    return IndicePlano.abrir(directorio, embeddings, precision=precision)
+
+
+def marcar_listo(directorio: str):
+    """Publica una versión del índice para los workers que solo la leen"""
+    temporal = os.path.join(directorio, ARCHIVO_LISTO + ".tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.write(str(os.getpid()))
+    os.replace(temporal, os.path.join(directorio, ARCHIVO_LISTO))
+
+
+def esperar_listo(directorio: str, timeout: float, intervalo: float = 0.5) -> bool:
+    """Espera a que el cargador publique la versión; False si no llega en `timeout` segundos"""
+    limite = time.monotonic() + timeout
+    while not os.path.exists(os.path.join(directorio, ARCHIVO_LISTO)):
+        if time.monotonic() >= limite:
+            return False
+        time.sleep(intervalo)
+    return True
+
+
+def eliminar_indices_planos_antiguos(raiz: str, conservar):
+    """Borra los índices planos de versiones que ya no están en servicio.
+
+    En Windows no se puede borrar un archivo que un worker todavía tiene mapeado
+    en memoria: esa versión se deja y se vuelve a intentar en la siguiente
+    llamada, cuando se publique otra versión. Devuelve los nombres pendientes.
+    """
+    pendientes = []
+    if not os.path.isdir(raiz):
+        return pendientes
+    for nombre in sorted(os.listdir(raiz)):
+        if nombre.startswith("empleos_") and nombre not in conservar:
+            try:
+                shutil.rmtree(os.path.join(raiz, nombre))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                pendientes.append(nombre)
+                print(f"Índice plano antiguo en uso, se reintentará en la próxima versión: {nombre} ({e})")
+                continue
+            print(f"Índice plano antiguo eliminado: {nombre}")
+    return pendientes
@@ -0,0 +1,73 @@
+"""Mide el arranque en frío de la API: tiempo de `import app_simple`, tiempo hasta
+que `/health` responde y los módulos que más tardan en importarse.
+
+Uso (desde back/):
+    python medir_arranque.py
+    python medir_arranque.py --repeticiones 10 --modulos 15
+
+Cada medición corre en un proceso nuevo para que nada quede en caché de imports.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MEDIR_IMPORT = "import time; t = time.perf_counter(); import app_simple; print(time.perf_counter() - t)"
+
+MEDIR_HEALTH = """
+import time
+t = time.perf_counter()
+import app_simple
+from fastapi.testclient import TestClient
+with TestClient(app_simple.app) as cliente:
+    cliente.get("/health")
+    print(time.perf_counter() - t)
+"""
+
+
+def medir(codigo: str, repeticiones: int):
+    """Segundos de cada ejecución de `codigo` en un intérprete nuevo"""
+    tiempos = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                                env={**os.environ, "RECARGA_INTERVALO": "0"})
+        if salida.returncode != 0:
+            raise RuntimeError(salida.stderr.strip().splitlines()[-1])
+        tiempos.append(float(salida.stdout.strip().splitlines()[-1]))
+    return tiempos
+
+
+def modulos_mas_lentos(cantidad: int):
+    """Módulos de primer nivel importados por app_simple, ordenados por tiempo acumulado (-X importtime)"""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app_simple"],
+                            capture_output=True, text=True)
+    modulos = []
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        # Dos espacios de sangría = importado directamente por app_simple
+        if nombre.startswith("   ") and not nombre.startswith("    "):
+            modulos.append((int(acumulado) / 1e6, nombre.strip()))
+    return sorted(modulos, reverse=True)[:cantidad]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--modulos", type=int, default=10)
+    args = parser.parse_args()
+
+    for nombre, codigo in (("import app_simple", MEDIR_IMPORT), ("primer /health", MEDIR_HEALTH)):
+        tiempos = medir(codigo, args.repeticiones)
+        print(f"{nombre:<20} mediana {statistics.median(tiempos):.2f}s  (mín {min(tiempos):.2f}s, "
+              f"máx {max(tiempos):.2f}s, {len(tiempos)} corridas)")
+
+    print("\nImports más lentos de app_simple:")
+    for segundos, modulo in modulos_mas_lentos(args.modulos):
+        print(f"  {segundos:>6.3f}s  {modulo}")
+
+
+if __name__ == "__main__":
+    main()
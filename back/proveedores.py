@@ -0,0 +1,332 @@
+import asyncio
+import os
+import time
+from collections import deque
+
+# Timeout por llamada al LLM, en segundos
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+# Llamadas simultáneas permitidas por proveedor
+GROQ_CONCURRENCIA = int(os.getenv("GROQ_CONCURRENCIA", "8"))
+OPENAI_CONCURRENCIA = int(os.getenv("OPENAI_CONCURRENCIA", "8"))
+# Segundos antes de lanzar una petición de respaldo al siguiente proveedor.
+# Vacío desactiva el hedging; "auto" usa el p95 del proveedor principal.
+LLM_HEDGE_RETARDO = os.getenv("LLM_HEDGE_RETARDO", "")
+# Fallos consecutivos que abren el circuito y segundos que permanece abierto
+CIRCUITO_FALLOS = int(os.getenv("CIRCUITO_FALLOS", "3"))
+CIRCUITO_ENFRIAMIENTO = float(os.getenv("CIRCUITO_ENFRIAMIENTO", "30"))
+
+
+class Proveedor:
+    """Proveedor de LLM con cliente asíncrono, límite de concurrencia y timeout por llamada"""
+
+    def __init__(self, nombre: str, cliente, modelo: str, sistema: str,
+                 concurrencia: int = 8, timeout: float = LLM_TIMEOUT):
+        self.nombre = nombre
+        self.cliente = cliente
+        self.modelo = modelo
+        self.sistema = sistema
+        self.timeout = timeout
+        self._semaforo = asyncio.Semaphore(concurrencia)
+
+    @property
+    def disponible(self) -> bool:
+        return self.cliente is not None
+
+    def _completar(self, prompt: str, stream: bool = False):
+        return self.cliente.chat.completions.create(
+            model=self.modelo,
+            messages=[
+                {"role": "system", "content": self.sistema},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=500,
+            stream=stream
+        )
+
+    async def generar(self, prompt: str) -> str:
+        """Genera una respuesta sin bloquear el event loop"""
+        try:
+            async with self._semaforo:
+                response = await asyncio.wait_for(self._completar(prompt), timeout=self.timeout)
+            return response.choices[0].message.content
+        except asyncio.TimeoutError:
+            print(f"Timeout con {self.nombre} tras {self.timeout}s")
+            raise
+        except Exception as e:
+            print(f"Error con {self.nombre}: {e}")
+            raise
+
+    async def generar_stream(self, prompt: str):
+        """Produce los fragmentos de texto de la respuesta a medida que llegan.
+
+        El timeout aplica a la espera de cada fragmento, no a la respuesta completa.
+        """
+        try:
+            async with self._semaforo:
+                stream = await asyncio.wait_for(self._completar(prompt, stream=True), timeout=self.timeout)
+                iterador = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(iterador.__anext__(), timeout=self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except asyncio.TimeoutError:
+            print(f"Timeout con {self.nombre} tras {self.timeout}s")
+            raise
+        except Exception as e:
+            print(f"Error con {self.nombre}: {e}")
+            raise
+
+
+def crear_proveedores():
+    """Crea los proveedores de Groq y OpenAI según las API keys del entorno"""
+    groq_api_key = os.getenv("GROQ_API_KEY")
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+
+    # Los SDK se importan solo si hay API key: son de lo más lento de importar
+    cliente_groq = None
+    if groq_api_key and groq_api_key != "tu_api_key_de_groq_aqui":
+        from groq import AsyncGroq
+        cliente_groq = AsyncGroq(api_key=groq_api_key)
+
+    cliente_openai = None
+    if openai_api_key and openai_api_key != "tu_api_key_de_openai_aqui":
+        from openai import AsyncOpenAI
+        cliente_openai = AsyncOpenAI(api_key=openai_api_key)
+
+    # Groq: súper rápido y gratis
+    groq = Proveedor(
+        "Groq", cliente_groq, "llama-3.1-8b-instant",
+        "Eres un asesor laboral profesional y amable que ayuda a las personas a encontrar empleos. Responde en español de manera clara y útil.",
+        concurrencia=GROQ_CONCURRENCIA
+    )
+    openai = Proveedor(
+        "OpenAI", cliente_openai, "gpt-3.5-turbo",
+        "Eres un asesor laboral profesional y amable que ayuda a las personas a encontrar empleos.",
+        concurrencia=OPENAI_CONCURRENCIA
+    )
+    return groq, openai
+
+
+class SinProveedoresError(Exception):
+    """No hay ningún proveedor configurado y sano para atender la petición"""
+
+
+class CircuitoAbiertoError(SinProveedoresError):
+    """El circuito del proveedor está abierto o ya tiene su llamada de prueba en curso"""
+
+
+class SaludProveedor:
+    """Latencias y errores recientes de un proveedor, con circuit breaker.
+
+    Tras `umbral_fallos` errores consecutivos el circuito se abre y el proveedor
+    se salta durante `enfriamiento` segundos. Después queda semiabierto: deja
+    pasar una sola llamada de prueba, que lo cierra si sale bien y lo vuelve a
+    abrir si falla. Las llamadas se reservan con `reservar()` antes de hacerlas.
+    """
+
+    def __init__(self, ventana: int = 100, umbral_fallos: int = CIRCUITO_FALLOS,
+                 enfriamiento: float = CIRCUITO_ENFRIAMIENTO):
+        self.latencias = deque(maxlen=ventana)
+        self.resultados = deque(maxlen=ventana)
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento = enfriamiento
+        self.fallos_seguidos = 0
+        self.abierto_hasta = 0.0
+        self.probando = False
+
+    @property
+    def estado(self) -> str:
+        """'cerrado', 'abierto' o 'semiabierto' (listo para la llamada de prueba)"""
+        if self.fallos_seguidos < self.umbral_fallos:
+            return "cerrado"
+        if self.probando or time.monotonic() < self.abierto_hasta:
+            return "abierto"
+        return "semiabierto"
+
+    @property
+    def sano(self) -> bool:
+        return self.estado != "abierto"
+
+    def reservar(self):
+        """Pide paso para una llamada. Devuelve None si el circuito no la deja
+        pasar, o si es la llamada de prueba del estado semiabierto."""
+        estado = self.estado
+        if estado == "abierto":
+            return None
+        if estado == "semiabierto":
+            self.probando = True
+            return True
+        return False
+
+    def liberar_prueba(self):
+        """La llamada de prueba terminó sin resultado (p. ej. cancelada): se permite otra"""
+        self.probando = False
+
+    def registrar_exito(self, latencia: float):
+        self.latencias.append(latencia)
+        self.resultados.append(True)
+        self.fallos_seguidos = 0
+        self.abierto_hasta = 0.0
+        self.probando = False
+
+    def registrar_error(self):
+        self.resultados.append(False)
+        self.fallos_seguidos += 1
+        self.probando = False
+        if self.fallos_seguidos >= self.umbral_fallos:
+            self.abierto_hasta = time.monotonic() + self.enfriamiento
+
+    def percentil(self, p: float):
+        if not self.latencias:
+            return None
+        ordenadas = sorted(self.latencias)
+        return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+    def resumen(self) -> dict:
+        p50, p95 = self.percentil(0.5), self.percentil(0.95)
+        return {
+            "p50_ms": round(p50 * 1000) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000) if p95 is not None else None,
+            "tasa_error": round(self.resultados.count(False) / len(self.resultados), 3) if self.resultados else 0.0,
+            "circuito": self.estado,
+        }
+
+
+class RouterProveedores:
+    """Reparte las llamadas entre proveedores en orden de prioridad.
+
+    Salta los proveedores con el circuito abierto, pasa al siguiente si uno
+    falla y, con `retardo_hedge`, lanza una petición de respaldo al segundo
+    proveedor si el primero tarda más de ese tiempo; gana la primera respuesta.
+    Los proveedores solo necesitan `nombre`, `modelo`, `disponible`,
+    `generar()` y `generar_stream()`.
+    """
+
+    def __init__(self, proveedores, retardo_hedge=LLM_HEDGE_RETARDO):
+        self.proveedores = [p for p in proveedores if p.disponible]
+        self.salud = {p.nombre: SaludProveedor() for p in self.proveedores}
+        self.retardo_hedge = retardo_hedge
+
+    def candidatos(self):
+        """Proveedores sanos en orden de prioridad"""
+        return [p for p in self.proveedores if self.salud[p.nombre].sano]
+
+    @property
+    def disponible(self) -> bool:
+        return bool(self.proveedores)
+
+    def _retardo_para(self, proveedor):
+        if self.retardo_hedge in ("", None):
+            return None
+        if self.retardo_hedge == "auto":
+            # Sin historial todavía no se sabe qué es "lento"
+            return self.salud[proveedor.nombre].percentil(0.95)
+        return float(self.retardo_hedge)
+
+    async def _llamar(self, proveedor, prompt: str) -> str:
+        salud = self.salud[proveedor.nombre]
+        prueba = salud.reservar()
+        if prueba is None:
+            raise CircuitoAbiertoError(f"Circuito abierto para {proveedor.nombre}")
+        inicio = time.perf_counter()
+        try:
+            respuesta = await proveedor.generar(prompt)
+        except asyncio.CancelledError:
+            # Perder una carrera de hedging no cuenta como error
+            if prueba:
+                salud.liberar_prueba()
+            raise
+        except Exception:
+            salud.registrar_error()
+            raise
+        salud.registrar_exito(time.perf_counter() - inicio)
+        return respuesta
+
+    async def generar(self, prompt: str):
+        """Devuelve (respuesta, proveedor que respondió)"""
+        candidatos = self.candidatos()
+        if not candidatos:
+            raise SinProveedoresError("No hay proveedores de IA sanos")
+
+        ultimo_error = None
+        while candidatos:
+            principal = candidatos.pop(0)
+            retardo = self._retardo_para(principal)
+            if retardo is None or not candidatos:
+                try:
+                    return await self._llamar(principal, prompt), principal
+                except Exception as e:
+                    ultimo_error = e
+                    continue
+
+            respaldo = candidatos.pop(0)
+            try:
+                return await self._carrera(principal, respaldo, prompt, retardo)
+            except Exception as e:
+                ultimo_error = e
+        raise ultimo_error
+
+    async def _carrera(self, principal, respaldo, prompt: str, retardo: float):
+        """Hedging: el respaldo arranca tras `retardo` segundos o si el principal falla antes"""
+        tareas = {asyncio.ensure_future(self._llamar(principal, prompt)): principal}
+        hecho, _ = await asyncio.wait(tareas, timeout=retardo)
+        if hecho:
+            tarea = hecho.pop()
+            if tarea.exception() is None:
+                return tarea.result(), principal
+        tareas[asyncio.ensure_future(self._llamar(respaldo, prompt))] = respaldo
+
+        pendientes = {t for t in tareas if not t.done()}
+        ultimo_error = None
+        try:
+            while pendientes:
+                hecho, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                for tarea in hecho:
+                    if tarea.exception() is None:
+                        return tarea.result(), tareas[tarea]
+                    ultimo_error = tarea.exception()
+            raise ultimo_error or SinProveedoresError("Ningún proveedor respondió")
+        finally:
+            for tarea in pendientes:
+                tarea.cancel()
+
+    async def generar_stream(self, prompt: str):
+        """Produce (proveedor, fragmento). Solo cambia de proveedor si falla antes del primer fragmento"""
+        candidatos = self.candidatos()
+        if not candidatos:
+            raise SinProveedoresError("No hay proveedores de IA sanos")
+
+        ultimo_error = None
+        for proveedor in candidatos:
+            salud = self.salud[proveedor.nombre]
+            prueba = salud.reservar()
+            if prueba is None:
+                ultimo_error = CircuitoAbiertoError(f"Circuito abierto para {proveedor.nombre}")
+                continue
+            inicio = time.perf_counter()
+            emitido = False
+            try:
+                async for fragmento in proveedor.generar_stream(prompt):
+                    emitido = True
+                    yield proveedor, fragmento
+            except (asyncio.CancelledError, GeneratorExit):
+                # El cliente cortó el stream: no es un error del proveedor
+                if prueba:
+                    salud.liberar_prueba()
+                raise
+            except Exception as e:
+                salud.registrar_error()
+                if emitido:
+                    raise
+                ultimo_error = e
+                continue
+            salud.registrar_exito(time.perf_counter() - inicio)
+            return
+        raise ultimo_error
+
+    def estadisticas(self) -> dict:
+        return {p.nombre: {"modelo": p.modelo, **self.salud[p.nombre].resumen()} for p in self.proveedores}
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from catalogo import RUTA_EMPLEOS, JobCatalog, huella_archivo
+
+
+class Recursos:
+    """Versión consistente de catálogo + vectorstore que atiende las peticiones.
+
+    Las peticiones toman la referencia una sola vez y trabajan con ese snapshot
+    aunque mientras tanto se publique una versión nueva.
+    """
+
+    def __init__(self, catalogo: JobCatalog, vectorstore=None):
+        self.catalogo = catalogo
+        self.vectorstore = vectorstore
+
+    @property
+    def version(self) -> str:
+        return self.catalogo.huella[:12]
+
+
+class Recargador:
+    """Detecta cambios en jobs_for_chatbot.json y reconstruye los recursos en segundo plano.
+
+    `construir` recibe el catálogo nuevo y devuelve el vectorstore correspondiente.
+    La publicación es una única asignación de `self.actual`, así que las
+    peticiones en curso nunca bloquean ni ven un índice a medio construir.
+    """
+
+    def __init__(self, construir: Callable[[JobCatalog], object], ruta: str = RUTA_EMPLEOS):
+        self.construir = construir
+        self.ruta = ruta
+        self.actual: Optional[Recursos] = None
+        self.recargando = False
+        self.ultimo_error = None
+        self._mtime_visto = None
+        # Funciones que se llaman tras publicar una versión nueva (p. ej. invalidar caches)
+        self.al_publicar = []
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+    def cargar_catalogo(self) -> Recursos:
+        """Publica solo el catálogo, sin índice, para atender ya los endpoints que no lo necesitan"""
+        catalogo = JobCatalog.desde_archivo(self.ruta)
+        self._mtime_visto = catalogo.mtime
+        self.actual = Recursos(catalogo)
+        return self.actual
+
+    def cargar_inicial(self) -> Recursos:
+        """Construye y publica la primera versión de forma síncrona.
+
+        Si ya se publicó el catálogo con `cargar_catalogo`, se le agrega el índice.
+        Si no, se publica primero el catálogo, así sigue en servicio aunque el índice falle.
+        Si hay una recarga en curso, espera a que termine y construye sobre su catálogo.
+        """
+        # Toma el mismo turno que las recargas: mientras construye, ni el observador
+        # ni /admin/recargar publican otra versión que esta después pisaría
+        while True:
+            with self._lock:
+                if not self.recargando:
+                    self.recargando = True
+                    break
+            time.sleep(0.1)
+        try:
+            if self.actual is None:
+                # Si el índice falla, al menos el catálogo queda publicado
+                self.cargar_catalogo()
+            catalogo = self.actual.catalogo
+            self._publicar(Recursos(catalogo, self.construir(catalogo)))
+        finally:
+            self.recargando = False
+        recursos = self.actual
+        # Si el archivo cambió mientras se construía, se publica también esa versión
+        self.recargar()
+        return recursos
+
+    def hay_cambios(self) -> bool:
+        """Compara mtime y, solo si cambió, el hash del contenido con la versión activa.
+
+        Registra el mtime como visto, así que solo se llama cuando se va a
+        poder lanzar la reconstrucción (ver `recargar`).
+        """
+        try:
+            mtime = os.stat(self.ruta).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime_visto:
+            return False
+        self._mtime_visto = mtime
+        # Un mtime nuevo con el mismo contenido (p. ej. un `touch`) no dispara reconstrucción
+        actual = self.actual
+        return actual is None or huella_archivo(self.ruta) != actual.catalogo.huella
+
+    def recargar(self, forzar: bool = False) -> bool:
+        """Lanza la reconstrucción en un hilo si hay cambios. Devuelve True si se inició"""
+        with self._lock:
+            # Con una reconstrucción en curso no se mira el archivo: el cambio
+            # queda pendiente y se detecta cuando esa reconstrucción termina
+            if self.recargando:
+                return False
+            if not forzar and not self.hay_cambios():
+                return False
+            self.recargando = True
+        threading.Thread(target=self._reconstruir, name="recarga-empleos", daemon=True).start()
+        return True
+
+    def _publicar(self, recursos: Recursos):
+        self.actual = recursos
+        for funcion in self.al_publicar:
+            funcion(recursos)
+
+    def _reconstruir(self):
+        try:
+            inicio = time.perf_counter()
+            catalogo = JobCatalog.desde_archivo(self.ruta)
+            self._mtime_visto = catalogo.mtime
+            try:
+                vectorstore = self.construir(catalogo)
+            except Exception as e:
+                if self.actual is not None and self.actual.vectorstore is not None:
+                    raise
+                # Sin índice en servicio (p. ej. falló el calentamiento) no hay nada que
+                # conservar: se publica el catálogo nuevo y la búsqueda sigue con BM25
+                self._publicar(Recursos(catalogo))
+                self.ultimo_error = str(e)
+                print(f"Catálogo recargado sin índice (versión {self.actual.version}, "
+                      f"{len(catalogo)} empleos): {e}")
+            else:
+                self._publicar(Recursos(catalogo, vectorstore))
+                self.ultimo_error = None
+                print(f"Recursos recargados (versión {self.actual.version}, "
+                      f"{len(catalogo)} empleos) en {time.perf_counter() - inicio:.1f}s")
+        except Exception as e:
+            # Se mantiene la versión anterior en servicio
+            self.ultimo_error = str(e)
+            print(f"Error recargando recursos: {e}")
+        finally:
+            self.recargando = False
+        # Si el archivo cambió mientras se construía, se publica también esa versión
+        self.recargar()
+
+    def iniciar_observador(self, intervalo: float):
+        """Revisa el archivo cada `intervalo` segundos en un hilo daemon"""
+        def observar():
+            while not self._detener.wait(intervalo):
+                try:
+                    self.recargar()
+                except Exception as e:
+                    print(f"Error en el observador de archivos: {e}")
+
+        threading.Thread(target=observar, name="observador-empleos", daemon=True).start()
+
+    def detener(self):
+        self._detener.set()
@@ -5,9 +5,12 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, JavascriptException
 from webdriver_manager.chrome import ChromeDriverManager
-import json
+import asyncio
 import time
 
+from detalles_http import sesion_desde_driver
+from listado_http import LISTADO_MODO, guardar_listado, obtener_listado, parametros_desde_url
+
 # Configuración
 options = webdriver.ChromeOptions()
 options.add_argument("--start-maximized")
@@ -29,6 +32,7 @@ xhr_interceptor = """
 (function() {
   const open = XMLHttpRequest.prototype.open;
   window._xhrResults = [];
+  window._xhrUrls = [];
 
   XMLHttpRequest.prototype.open = function(method, url) {
     this._url = url;
@@ -41,6 +45,7 @@ xhr_interceptor = """
     this.addEventListener("load", function() {
       try {
         if (_this._url.includes("/api/v2/jobs") && _this._url.includes("json_mode=read_only")) {
+          window._xhrUrls.push(_this._url);
           const json = JSON.parse(_this.response);
           if (json.models && json.models.length > 0) {
             window._xhrResults.push(...json.models);
@@ -65,65 +70,94 @@ driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
 driver.get("https://pucp-csm.symplicity.com/students/app/jobs/search?perPage=20&page=1&sort=!postdate")
 input("🔐 Inicia sesión completamente. Luego presiona ENTER aquí para continuar...")
 
-print("🧭 Iniciando scraping navegando con clics en 'Siguiente'...")
-
-page = 1
-max_espera = 10
-
-while True:
-    print(f"\n📄 Página {page}")
-
-    # Scroll a lista para que cargue todo
-    try:
-        scroll_area = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "list-page-job-search"))
-        )
-        for _ in range(5):
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_area)
-            time.sleep(0.3)
-    except TimeoutException:
-        print("❌ No se pudo hacer scroll. Terminando.")
-        break
-
-    # Verificar cuántos empleos hay hasta ahora
-    prev_count = driver.execute_script("return window._xhrResults.length")
-
-    # Buscar botón "Siguiente"
-    try:
-        btn_siguiente = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.XPATH, "//button[span[text()='Siguiente']]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn_siguiente)
-        time.sleep(0.5)
-
-        # Click real con JavaScript
-        driver.execute_script("arguments[0].click();", btn_siguiente)
-        print(f"✅ Clic en 'Siguiente' hecho (página {page})")
-    except TimeoutException:
-        print("✅ No se encontró botón 'Siguiente'. Fin del scraping.")
-        break
-    except JavascriptException as e:
-        print("❌ Falló el clic con JS:", e)
-        break
-
-    # Esperar a que se carguen nuevos empleos
-    for _ in range(max_espera * 2):
-        time.sleep(0.5)
-        new_count = driver.execute_script("return window._xhrResults.length")
-        if new_count > prev_count:
+def listar_con_clics():
+    """Recorre las páginas con clics en 'Siguiente' y lee lo capturado por el interceptor.
+
+    Devuelve (empleos, completo); completo solo si se llegó a la última página.
+    """
+    print("🧭 Iniciando scraping navegando con clics en 'Siguiente'...")
+
+    page = 1
+    max_espera = 10
+    completo = False
+
+    while True:
+        print(f"\n📄 Página {page}")
+
+        # Scroll a lista para que cargue todo
+        try:
+            scroll_area = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "list-page-job-search"))
+            )
+            for _ in range(5):
+                driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_area)
+                time.sleep(0.3)
+        except TimeoutException:
+            print("❌ No se pudo hacer scroll. Terminando.")
+            break
+
+        # Verificar cuántos empleos hay hasta ahora
+        prev_count = driver.execute_script("return window._xhrResults.length")
+
+        # Buscar botón "Siguiente"
+        try:
+            btn_siguiente = WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.XPATH, "//button[span[text()='Siguiente']]"))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn_siguiente)
+            time.sleep(0.5)
+
+            # Click real con JavaScript
+            driver.execute_script("arguments[0].click();", btn_siguiente)
+            print(f"✅ Clic en 'Siguiente' hecho (página {page})")
+        except TimeoutException:
+            print("✅ No se encontró botón 'Siguiente'. Fin del scraping.")
+            completo = True
             break
+        except JavascriptException as e:
+            print("❌ Falló el clic con JS:", e)
+            break
+
+        # Esperar a que se carguen nuevos empleos
+        for _ in range(max_espera * 2):
+            time.sleep(0.5)
+            new_count = driver.execute_script("return window._xhrResults.length")
+            if new_count > prev_count:
+                break
+
+        if new_count == prev_count:
+            print("⚠️ No se cargaron nuevos empleos tras hacer clic. Deteniendo.")
+            break
+
+        page += 1
+
+    return driver.execute_script("return window._xhrResults.filter(x => typeof x === 'object')"), completo
+
+
+def listar_por_api():
+    """Pagina `/api/v2/jobs` directamente con las cookies de la sesión iniciada. Devuelve (empleos, completo)"""
+    print("🧭 Listando empleos directamente desde la API...")
+    urls = driver.execute_script("return window._xhrUrls")
+    parametros = parametros_desde_url(urls[0]) if urls else None
+    cookies, user_agent = sesion_desde_driver(driver)
+    empleos, reporte = asyncio.run(obtener_listado(cookies, user_agent, parametros=parametros))
+    if reporte["paginas_fallidas"]:
+        print(f"⚠️ Fallaron {len(reporte['paginas_fallidas'])} páginas del listado: "
+              f"{[fallo['pagina'] for fallo in reporte['paginas_fallidas']]}")
+    return empleos, not reporte["paginas_fallidas"]
 
-    if new_count == prev_count:
-        print("⚠️ No se cargaron nuevos empleos tras hacer clic. Deteniendo.")
-        break
 
-    page += 1
+resultados, listado_completo = listar_por_api() if LISTADO_MODO == "api" else ([], False)
+if not resultados:
+    if LISTADO_MODO == "api":
+        print("⚠️ La API no devolvió empleos, se usa la navegación con clics")
+    resultados, listado_completo = listar_con_clics()
 
-# Guardar resultados
-resultados = driver.execute_script("return window._xhrResults.filter(x => typeof x === 'object')")
+# Guardar resultados; detailedjobs_scrap.py solo da empleos por expirados si el listado está completo
 print(f"\n📦 Total empleos recolectados: {len(resultados)}")
-with open("jobs_raw.json", "w", encoding="utf-8") as f:
-    json.dump(resultados, f, ensure_ascii=False, indent=2)
+guardar_listado(resultados, listado_completo and bool(resultados))
+if not listado_completo:
+    print("⚠️ El listado quedó incompleto")
 
 driver.quit()
 print("✅ Empleos guardados en 'jobs_raw.json'")
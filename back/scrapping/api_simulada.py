@@ -0,0 +1,150 @@
+"""API simulada de Symplicity para probar y medir el scraper sin credenciales.
+
+Uso (desde back/):
+    python scrapping/api_simulada.py --puerto 8765 --latencia 0.2 --errores 0.1 --limite 50
+
+Responde el listado paginado `/api/v2/jobs?page=N&perPage=M` (con
+`--empleos` empleos) y `/api/v3/jobs/{id}` con datos falsos después de
+`--latencia` segundos. Para ejercitar los reintentos puede devolver 5xx al
+azar (`--errores`), colgarse en algunas peticiones (`--lentas`) y responder
+429 con Retry-After cuando se superan `--limite` peticiones por segundo.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def id_simulado(posicion: int) -> str:
+    return f"{posicion:032x}"
+
+
+def empleo_listado_simulado(posicion: int) -> dict:
+    """Empleo con la forma de los `models` de `/api/v2/jobs`"""
+    return {
+        "job_id": id_simulado(posicion),
+        "job_title": f"Empleo simulado {posicion}",
+        "employer_name": "Empresa Simulada S.A.C.",
+        "postdate": "2026-01-01",
+    }
+
+
+def detalle_simulado(job_id: str) -> dict:
+    """Detalle de empleo con la forma de `/api/v3/jobs/{id}`"""
+    return {
+        "job_id": job_id,
+        "job_title": f"Empleo simulado {job_id[:8]}",
+        "employer_name": "Empresa Simulada S.A.C.",
+        "job_desc": "<p>Descripción de prueba</p>",
+        "location": "Lima",
+    }
+
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    # HTTP/1.1 para que el cliente pueda reutilizar conexiones del pool
+    protocol_version = "HTTP/1.1"
+    latencia = 0.0
+    errores = 0.0
+    lentas = 0.0
+    limite = 0
+    empleos = 400
+
+    def responder(self, estado: int, cuerpo, headers=None):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(estado)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (headers or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def excede_limite(self) -> bool:
+        """Cuenta la petición en el segundo actual y dice si supera `limite`"""
+        if not self.limite:
+            return False
+        segundo = int(time.monotonic())
+        with self.server.lock:
+            if self.server.segundo != segundo:
+                self.server.segundo, self.server.peticiones = segundo, 0
+            self.server.peticiones += 1
+            return self.server.peticiones > self.limite
+
+    def do_GET(self):
+        if self.excede_limite():
+            self.responder(429, {"error": "demasiadas peticiones"}, {"Retry-After": "1"})
+            return
+        if random.random() < self.lentas:
+            time.sleep(60)
+        time.sleep(self.latencia)
+        if random.random() < self.errores:
+            self.responder(random.choice((500, 502, 503)), {"error": "fallo simulado"})
+            return
+        url = urlparse(self.path)
+        ruta = url.path
+        if ruta == "/api/v2/jobs":
+            consulta = parse_qs(url.query)
+            pagina = int(consulta.get("page", ["1"])[0])
+            por_pagina = int(consulta.get("perPage", ["20"])[0])
+            desde = (pagina - 1) * por_pagina
+            modelos = [empleo_listado_simulado(i) for i in range(desde, min(self.empleos, desde + por_pagina))]
+            self.responder(200, {"models": modelos, "total": self.empleos})
+        elif ruta.startswith("/api/v3/jobs/"):
+            self.responder(200, detalle_simulado(ruta.rsplit("/", 1)[-1]))
+        else:
+            self.responder(404, {"error": "no encontrado"})
+
+    def log_message(self, formato, *args):
+        pass
+
+
+class ServidorSimulado(ThreadingHTTPServer):
+    daemon_threads = True
+    # Cola de conexiones amplia para pruebas con mucha concurrencia
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Ventana de un segundo para el límite de peticiones
+        self.lock = threading.Lock()
+        self.segundo = 0
+        self.peticiones = 0
+
+    def handle_error(self, request, client_address):
+        # Un cliente que se corta a mitad de respuesta (p. ej. un scraper interrumpido) no es un error del servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def crear_servidor(puerto: int = 8765, latencia: float = 0.0, errores: float = 0.0, lentas: float = 0.0,
+                   limite: int = 0, empleos: int = 400) -> ServidorSimulado:
+    """Servidor HTTP en 127.0.0.1 (puerto 0 = uno libre)"""
+    manejador = type("Manejador", (ManejadorSimulado,), {"latencia": latencia, "errores": errores,
+                                                         "lentas": lentas, "limite": limite, "empleos": empleos})
+    return ServidorSimulado(("127.0.0.1", puerto), manejador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API simulada de Symplicity")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.1, help="Segundos de espera por respuesta")
+    parser.add_argument("--errores", type=float, default=0.0, help="Fracción de respuestas 5xx")
+    parser.add_argument("--lentas", type=float, default=0.0, help="Fracción de peticiones que no responden a tiempo")
+    parser.add_argument("--limite", type=int, default=0, help="Peticiones por segundo antes de responder 429 (0 = sin límite)")
+    parser.add_argument("--empleos", type=int, default=400, help="Empleos del listado")
+    args = parser.parse_args()
+
+    servidor = crear_servidor(args.puerto, args.latencia, args.errores, args.lentas, args.limite, args.empleos)
+    print(f"🧪 API simulada en http://127.0.0.1:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
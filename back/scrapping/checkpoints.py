@@ -0,0 +1,82 @@
+"""Checkpoints append-only en JSONL para retomar corridas del scraper.
+
+Cada etapa escribe una línea por unidad terminada (una página del listado, un
+detalle) apenas la termina. Si la corrida se cae, `--resume` lee esas líneas y
+solo pide lo que falta. Al terminar bien la corrida los checkpoints se borran.
+"""
+import json
+import os
+
+DIRECTORIO_CHECKPOINTS = os.getenv("SCRAPING_CHECKPOINTS_PATH", "./data/checkpoints")
+
+
+class Checkpoint:
+    """Archivo JSONL al que se agregan registros y se vuelve a leer al retomar"""
+
+    def __init__(self, nombre: str, directorio: str = DIRECTORIO_CHECKPOINTS):
+        os.makedirs(directorio, exist_ok=True)
+        self.ruta = os.path.join(directorio, f"{nombre}.jsonl")
+        self._archivo = None
+
+    def leer(self) -> list:
+        """Registros guardados; una última línea cortada por una caída se descarta"""
+        registros = []
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                for numero, linea in enumerate(f, 1):
+                    if not linea.strip():
+                        continue
+                    try:
+                        registros.append(json.loads(linea))
+                    except ValueError:
+                        print(f"⚠️ Línea {numero} de '{self.ruta}' incompleta, se ignora")
+        except FileNotFoundError:
+            pass
+        return registros
+
+    def recortar_linea_cortada(self):
+        """Quita lo escrito después del último salto de línea (un registro a medias de una caída).
+
+        Sin esto, al retomar el primer registro nuevo quedaría pegado a esa
+        línea cortada y `leer` los descartaría a los dos.
+        """
+        try:
+            with open(self.ruta, "r+b") as f:
+                tamano = f.seek(0, os.SEEK_END)
+                fin = tamano
+                while fin > 0:
+                    inicio = max(0, fin - 4096)
+                    f.seek(inicio)
+                    salto = f.read(fin - inicio).rfind(b"\n")
+                    if salto >= 0:
+                        fin = inicio + salto + 1
+                        break
+                    fin = inicio
+                if fin < tamano:
+                    print(f"⚠️ Se descartan {tamano - fin} bytes de un registro incompleto al final de '{self.ruta}'")
+                    f.truncate(fin)
+        except FileNotFoundError:
+            pass
+
+    def agregar(self, registro: dict):
+        """Escribe el registro y lo vacía a disco para que sobreviva a una caída del proceso"""
+        if self._archivo is None:
+            self.recortar_linea_cortada()
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+
+    def reiniciar(self):
+        """Empieza una corrida nueva descartando lo anterior"""
+        self.cerrar()
+        open(self.ruta, "w", encoding="utf-8").close()
+
+    def borrar(self):
+        self.cerrar()
+        if os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
@@ -1,8 +1,21 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+import argparse
+import asyncio
 import json
-import time
+
+from checkpoints import Checkpoint
+from detalles_http import guardar_reporte, obtener_detalles, sesion_desde_driver
+from estado_scraping import EstadoScraping
+from listado_http import listado_guardado_completo
+
+parser = argparse.ArgumentParser(description="Extrae los detalles de los empleos de jobs_raw.json")
+parser.add_argument("--completo", action="store_true",
+                    help="Descarga el detalle de todos los empleos, no solo de los nuevos o modificados")
+parser.add_argument("--resume", action="store_true",
+                    help="Retoma la corrida interrumpida saltando los detalles ya descargados")
+args = parser.parse_args()
 
 # Configuración
 options = webdriver.ChromeOptions()
@@ -29,43 +42,38 @@ input("🔐 Inicia sesión completamente en la web, luego presiona ENTER aquí p
 with open("jobs_raw.json", "r", encoding="utf-8") as f:
     jobs = json.load(f)
 
-print(f"🔎 Procesando {len(jobs)} empleos para extraer detalles...\n")
-
-# Abre nueva pestaña para recolectar los JSON de detalle
-driver.execute_script("window.open('');")
-driver.switch_to.window(driver.window_handles[1])
-
-detalles = []
-fallidos = []
-
+# La API se llama directamente con las cookies de la sesión iniciada en el navegador
+job_ids = []
 for idx, job in enumerate(jobs, 1):
     job_id = job.get("job_id")  # USAMOS 'job_id' porque ese es el correcto
     if not job_id:
         print(f"⚠️ ({idx}) Empleo sin 'job_id': {job.get('job_title', 'Sin título')}")
         continue
-
-    url = f"https://pucp-csm.symplicity.com/api/v3/jobs/{job_id}"
-
-    try:
-        driver.get(url)
-        driver.implicitly_wait(3)
-
-        # Espera directa por etiqueta <pre> (donde está el JSON visible)
-        pre = driver.find_elements("tag name", "pre")
-        if not pre:
-            print(f"⚠️ ({idx}) No se encontró JSON visible en: {url}")
-            fallidos.append(job_id)
-            continue
-
-        raw_text = pre[0].text.strip()
-        job_detail = json.loads(raw_text)
-        detalles.append(job_detail)
-
-        print(f"✅ ({idx}) Detalle extraído para ID {job_id}")
-
-    except Exception as e:
-        print(f"❌ ({idx}) Error con ID {job_id}: {e}")
-        fallidos.append(job_id)
+    job_ids.append(job_id)
+
+# Solo se piden los detalles de empleos nuevos o cuyo listado cambió desde la última corrida
+estado = EstadoScraping()
+# alljobs_scrap.py anota si llegó a todas las páginas; un listado parcial no da empleos por expirados
+listado_completo = listado_guardado_completo(jobs)
+cambios = estado.registrar_listado(jobs, completo=listado_completo)
+print(f"🆕 {len(cambios['nuevos'])} nuevos, ✏️ {len(cambios['cambiados'])} modificados, "
+      f"{cambios['sin_cambios']} sin cambios, 🗓️ {len(cambios['expirados'])} expirados")
+if not listado_completo:
+    print("⚠️ jobs_raw.json no está marcado como completo: no se marca ningún empleo como expirado")
+if not args.completo:
+    job_ids = estado.pendientes()
+
+print(f"🔎 Procesando {len(job_ids)} empleos para extraer detalles...\n")
+
+checkpoint_detalles = Checkpoint("detalles")
+if not args.resume:
+    checkpoint_detalles.reiniciar()
+
+cookies, user_agent = sesion_desde_driver(driver)
+descargados, reporte = asyncio.run(obtener_detalles(job_ids, cookies, user_agent, checkpoint=checkpoint_detalles))
+estado.guardar_detalles(descargados)
+detalles = estado.detalles_vigentes()
+estado.cerrar()
 
 # Guardar resultados
 with open("detalles_empleos.json", "w", encoding="utf-8") as f:
@@ -73,7 +81,7 @@ with open("detalles_empleos.json", "w", encoding="utf-8") as f:
 
 print(f"\n📦 Detalles guardados: {len(detalles)} empleos en 'detalles_empleos.json'")
 
-if fallidos:
-    print(f"⚠️ Fallaron {len(fallidos)} empleos: {fallidos}")
+guardar_reporte(reporte)
+checkpoint_detalles.borrar()
 
 driver.quit()
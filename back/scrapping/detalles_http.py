@@ -0,0 +1,263 @@
+"""Descarga directa de los detalles de empleos desde la API JSON de Symplicity.
+
+En lugar de abrir cada `/api/v3/jobs/{id}` en Chrome, se toman las cookies de
+la sesión ya autenticada en Selenium y se llama a la API con un cliente HTTP
+asíncrono con pool de conexiones, concurrencia acotada y un límite de
+peticiones por segundo. Los 429, 5xx, timeouts y errores de red se reintentan
+con backoff exponencial y jitter.
+
+Para probarlo sin Symplicity (desde back/):
+    python scrapping/api_simulada.py --puerto 8765 --errores 0.1 --limite 50
+    python scrapping/detalles_http.py --base-url http://127.0.0.1:8765 --cantidad 400 --tasa 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+import httpx
+
+BASE_URL = "https://pucp-csm.symplicity.com"
+# Peticiones de detalle simultáneas y timeout por petición, en segundos
+DETALLES_CONCURRENCIA = int(os.getenv("DETALLES_CONCURRENCIA", "8"))
+DETALLES_TIMEOUT = float(os.getenv("DETALLES_TIMEOUT", "15"))
+# Peticiones por segundo como máximo (0 = sin límite) y ráfaga permitida
+DETALLES_TASA = float(os.getenv("DETALLES_TASA", "10"))
+DETALLES_RAFAGA = int(os.getenv("DETALLES_RAFAGA", "5"))
+# Reintentos por empleo y espera base/máxima del backoff, en segundos
+DETALLES_REINTENTOS = int(os.getenv("DETALLES_REINTENTOS", "4"))
+DETALLES_BACKOFF = float(os.getenv("DETALLES_BACKOFF", "0.5"))
+DETALLES_BACKOFF_MAX = float(os.getenv("DETALLES_BACKOFF_MAX", "30"))
+
+RUTA_REPORTE = "reporte_detalles.json"
+
+
+class LimitadorTasa:
+    """Token bucket: como máximo `tasa` peticiones por segundo con ráfagas de hasta `rafaga`"""
+
+    def __init__(self, tasa: float = DETALLES_TASA, rafaga: int = DETALLES_RAFAGA):
+        self.tasa = tasa
+        self.rafaga = max(1, rafaga)
+        self.fichas = float(self.rafaga)
+        self.actualizado = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        if self.tasa <= 0:
+            return
+        # El lock hace que las corrutinas esperen su ficha por orden de llegada
+        async with self._lock:
+            ahora = time.monotonic()
+            self.fichas = min(self.rafaga, self.fichas + (ahora - self.actualizado) * self.tasa)
+            self.actualizado = ahora
+            if self.fichas < 1:
+                await asyncio.sleep((1 - self.fichas) / self.tasa)
+                self.fichas = 1.0
+                self.actualizado = time.monotonic()
+            self.fichas -= 1
+
+
+class ErrorDescarga(Exception):
+    """Fallo al descargar un detalle; `reintentable` indica si vale la pena volver a intentarlo"""
+
+    def __init__(self, motivo: str, mensaje: str, estado: int = None, reintentable: bool = False,
+                 espera: float = None):
+        super().__init__(mensaje)
+        self.motivo = motivo
+        self.estado = estado
+        self.reintentable = reintentable
+        # Segundos pedidos por el servidor en Retry-After, si los indicó
+        self.espera = espera
+
+
+def espera_backoff(intento: int, base: float = DETALLES_BACKOFF, maximo: float = DETALLES_BACKOFF_MAX) -> float:
+    """Backoff exponencial con jitter completo: aleatorio entre 0 y base * 2^intento"""
+    return random.uniform(0, min(maximo, base * 2 ** intento))
+
+
+def leer_retry_after(respuesta):
+    try:
+        return float(respuesta.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def sesion_desde_driver(driver):
+    """Cookies y user agent de la sesión autenticada en Selenium"""
+    cookies = {cookie["name"]: cookie["value"] for cookie in driver.get_cookies()}
+    user_agent = driver.execute_script("return navigator.userAgent")
+    return cookies, user_agent
+
+
+def crear_cliente(base_url: str = BASE_URL, cookies=None, user_agent: str = None,
+                  concurrencia: int = DETALLES_CONCURRENCIA, timeout: float = DETALLES_TIMEOUT):
+    """Cliente HTTP asíncrono con las cookies de la sesión y un pool del tamaño de la concurrencia"""
+    headers = {"Accept": "application/json"}
+    if user_agent:
+        headers["User-Agent"] = user_agent
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    return httpx.AsyncClient(base_url=base_url, cookies=cookies, headers=headers, limits=limites, timeout=timeout)
+
+
+async def pedir_json(cliente, ruta: str, params=None):
+    """GET de `ruta` que devuelve el JSON; los errores se traducen a ErrorDescarga"""
+    try:
+        respuesta = await cliente.get(ruta, params=params)
+    except httpx.TimeoutException as e:
+        raise ErrorDescarga("timeout", str(e) or "timeout", reintentable=True)
+    except httpx.TransportError as e:
+        raise ErrorDescarga("red", str(e) or type(e).__name__, reintentable=True)
+
+    estado = respuesta.status_code
+    if estado == 429:
+        raise ErrorDescarga("limite", "HTTP 429", estado, True, leer_retry_after(respuesta))
+    if estado >= 500:
+        raise ErrorDescarga("servidor", f"HTTP {estado}", estado, True, leer_retry_after(respuesta))
+    if 300 <= estado < 400:
+        # Symplicity redirige al login cuando la sesión venció
+        raise ErrorDescarga("sesion", f"HTTP {estado} hacia {respuesta.headers.get('Location', '?')}", estado)
+    if estado >= 400:
+        raise ErrorDescarga("cliente", f"HTTP {estado}", estado)
+    try:
+        return respuesta.json()
+    except ValueError:
+        raise ErrorDescarga("json", "La respuesta no es JSON", estado)
+
+
+async def obtener_detalle(cliente, job_id: str):
+    """JSON de `/api/v3/jobs/{job_id}`"""
+    return await pedir_json(cliente, f"/api/v3/jobs/{job_id}")
+
+
+async def con_reintentos(pedir, semaforo, limitador, reintentos: int, etiqueta: str, contador: dict):
+    """Ejecuta `pedir()` respetando la concurrencia y la tasa, reintentando los errores transitorios.
+
+    Devuelve (resultado, None) si sale bien o (None, fallo) con el motivo,
+    último estado HTTP e intentos hechos.
+    """
+    for intento in range(reintentos + 1):
+        async with semaforo:
+            await limitador.adquirir()
+            try:
+                return await pedir(), None
+            except ErrorDescarga as e:
+                error = e
+            except Exception as e:
+                error = ErrorDescarga("inesperado", f"{type(e).__name__}: {e}")
+        if not error.reintentable or intento == reintentos:
+            break
+        # Se espera fuera del semáforo para no ocupar un cupo de concurrencia
+        espera = max(error.espera or 0.0, espera_backoff(intento))
+        contador["reintentos"] += 1
+        print(f"🔁 {etiqueta}: {error}, reintento {intento + 1} en {espera:.1f}s")
+        await asyncio.sleep(espera)
+
+    return None, {"motivo": error.motivo, "estado": error.estado, "intentos": intento + 1, "error": str(error)}
+
+
+async def obtener_detalles(job_ids, cookies=None, user_agent: str = None, base_url: str = BASE_URL,
+                           concurrencia: int = DETALLES_CONCURRENCIA, timeout: float = DETALLES_TIMEOUT,
+                           tasa: float = DETALLES_TASA, rafaga: int = DETALLES_RAFAGA,
+                           reintentos: int = DETALLES_REINTENTOS, checkpoint=None):
+    """Descarga los detalles de `job_ids` en paralelo.
+
+    Devuelve (detalles en el orden de job_ids, reporte). El reporte resume la
+    corrida y lista cada fallo con su motivo, último estado HTTP e intentos.
+    Con `checkpoint` cada detalle se anota apenas llega y los ya anotados en
+    una corrida anterior no se vuelven a pedir.
+    """
+    semaforo = asyncio.Semaphore(concurrencia)
+    limitador = LimitadorTasa(tasa, rafaga)
+    contador = {"reintentos": 0}
+    inicio = time.perf_counter()
+
+    previos = {}
+    if checkpoint is not None:
+        previos = {registro["job_id"]: registro["detalle"] for registro in checkpoint.leer() if registro.get("job_id")}
+    retomados = sum(1 for job_id in job_ids if job_id in previos)
+    if retomados:
+        print(f"♻️ {retomados} detalles retomados del checkpoint")
+
+    async with crear_cliente(base_url, cookies, user_agent, concurrencia, timeout) as cliente:
+        async def descargar(idx: int, job_id: str):
+            detalle, fallo = await con_reintentos(lambda: obtener_detalle(cliente, job_id), semaforo, limitador,
+                                                  reintentos, f"({idx}) ID {job_id}", contador)
+            if fallo:
+                print(f"❌ ({idx}) Error con ID {job_id}: {fallo['error']}")
+                return None, {"job_id": job_id, **fallo}
+            print(f"✅ ({idx}) Detalle extraído para ID {job_id}")
+            if checkpoint is not None:
+                checkpoint.agregar({"job_id": job_id, "detalle": detalle})
+            return detalle, None
+
+        async def resolver(idx: int, job_id: str):
+            if job_id in previos:
+                return previos[job_id], None
+            return await descargar(idx, job_id)
+
+        resultados = await asyncio.gather(*(resolver(idx, job_id) for idx, job_id in enumerate(job_ids, 1)))
+
+    detalles = [detalle for detalle, _ in resultados if detalle is not None]
+    fallidos = [fallo for _, fallo in resultados if fallo is not None]
+    reporte = {
+        "total": len(job_ids),
+        "descargados": len(detalles) - retomados,
+        "retomados": retomados,
+        "fallidos": fallidos,
+        "fallidos_por_motivo": dict(Counter(fallo["motivo"] for fallo in fallidos)),
+        "reintentos": contador["reintentos"],
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "parametros": {"concurrencia": concurrencia, "tasa": tasa, "rafaga": rafaga, "reintentos": reintentos},
+    }
+    return detalles, reporte
+
+
+def guardar_reporte(reporte: dict, ruta: str = RUTA_REPORTE):
+    """Guarda el reporte de la descarga y muestra el resumen"""
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, ensure_ascii=False, indent=2)
+    segundos = reporte["segundos"] or 1e-9
+    retomados = f" + {reporte['retomados']} del checkpoint" if reporte.get("retomados") else ""
+    print(f"\n📊 {reporte['descargados']}{retomados}/{reporte['total']} detalles en {reporte['segundos']:.2f}s "
+          f"({reporte['descargados'] / segundos:.1f}/s), {reporte['reintentos']} reintentos")
+    if reporte["fallidos"]:
+        motivos = ", ".join(f"{motivo}: {n}" for motivo, n in reporte["fallidos_por_motivo"].items())
+        print(f"⚠️ Fallaron {len(reporte['fallidos'])} empleos ({motivos}). Detalle en '{ruta}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descarga detalles de empleos y mide el throughput")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--listado", help="JSON del listado (p. ej. jobs_raw.json) del que tomar los job_id")
+    parser.add_argument("--cantidad", type=int, default=100, help="IDs de prueba si no se indica --listado")
+    parser.add_argument("--concurrencia", type=int, default=DETALLES_CONCURRENCIA)
+    parser.add_argument("--tasa", type=float, default=DETALLES_TASA, help="Peticiones por segundo (0 = sin límite)")
+    parser.add_argument("--rafaga", type=int, default=DETALLES_RAFAGA)
+    parser.add_argument("--reintentos", type=int, default=DETALLES_REINTENTOS)
+    parser.add_argument("--timeout", type=float, default=DETALLES_TIMEOUT)
+    parser.add_argument("--salida", help="Archivo donde guardar los detalles descargados")
+    parser.add_argument("--reporte", default=RUTA_REPORTE)
+    args = parser.parse_args()
+
+    if args.listado:
+        with open(args.listado, "r", encoding="utf-8") as f:
+            job_ids = [job["job_id"] for job in json.load(f) if job.get("job_id")]
+    else:
+        job_ids = [f"{i:032x}" for i in range(args.cantidad)]
+
+    detalles, reporte = asyncio.run(obtener_detalles(
+        job_ids, base_url=args.base_url, concurrencia=args.concurrencia, timeout=args.timeout,
+        tasa=args.tasa, rafaga=args.rafaga, reintentos=args.reintentos,
+    ))
+    guardar_reporte(reporte, args.reporte)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(detalles, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
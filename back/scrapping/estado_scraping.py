@@ -0,0 +1,130 @@
+"""Estado del scraping entre corridas, en SQLite.
+
+Guarda cada empleo visto con la huella de su entrada en el listado, la huella
+con la que se descargó su detalle y el detalle mismo. Así una corrida diaria
+solo pide el detalle de los empleos nuevos o cuyo listado cambió, y los que ya
+no aparecen en el listado quedan marcados como expirados.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+RUTA_ESTADO = os.getenv("SCRAPING_ESTADO_PATH", "./data/estado_scraping.sqlite3")
+# Campos del listado que se guardan como marca de tiempo, el primero que exista
+CAMPOS_MARCA = ("updated", "modified", "last_modified", "postdate")
+
+
+def huella_listado(empleo: dict) -> str:
+    """SHA-256 de la entrada del listado con las claves ordenadas"""
+    contenido = json.dumps(empleo, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def marca_listado(empleo: dict):
+    for campo in CAMPOS_MARCA:
+        if empleo.get(campo):
+            return str(empleo[campo])
+    return None
+
+
+class EstadoScraping:
+    """Empleos conocidos y sus detalles. `pendiente` = sin detalle o con detalle de un listado anterior"""
+
+    def __init__(self, ruta: str = RUTA_ESTADO):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._conn = sqlite3.connect(ruta)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS empleos ("
+            "job_id TEXT PRIMARY KEY, huella TEXT NOT NULL, marca TEXT, listado TEXT NOT NULL, "
+            "huella_detalle TEXT, detalle TEXT, posicion INTEGER, "
+            "visto_primero REAL NOT NULL, visto_ultimo REAL NOT NULL, "
+            "detalle_actualizado REAL, expirado REAL)"
+        )
+        self._conn.commit()
+
+    def registrar_listado(self, empleos, completo: bool = True) -> dict:
+        """Actualiza el estado con el listado de esta corrida y devuelve qué cambió.
+
+        Con `completo=False` (faltaron páginas) no se marca ningún empleo como
+        expirado, porque su ausencia puede deberse a la página que falló.
+        """
+        ahora = time.time()
+        anteriores = {
+            job_id: (huella, expirado)
+            for job_id, huella, expirado in self._conn.execute("SELECT job_id, huella, expirado FROM empleos")
+        }
+        cambios = {"nuevos": [], "cambiados": [], "sin_cambios": 0, "reaparecidos": [], "expirados": []}
+        vistos = set()
+
+        with self._conn:
+            for posicion, empleo in enumerate(empleos):
+                job_id = empleo.get("job_id")
+                if not job_id or job_id in vistos:
+                    continue
+                vistos.add(job_id)
+                huella = huella_listado(empleo)
+                if job_id not in anteriores:
+                    cambios["nuevos"].append(job_id)
+                elif anteriores[job_id][0] != huella:
+                    cambios["cambiados"].append(job_id)
+                else:
+                    cambios["sin_cambios"] += 1
+                if job_id in anteriores and anteriores[job_id][1] is not None:
+                    cambios["reaparecidos"].append(job_id)
+                self._conn.execute(
+                    "INSERT INTO empleos (job_id, huella, marca, listado, posicion, visto_primero, visto_ultimo) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(job_id) DO UPDATE SET huella = excluded.huella, marca = excluded.marca, "
+                    "listado = excluded.listado, posicion = excluded.posicion, "
+                    "visto_ultimo = excluded.visto_ultimo, expirado = NULL",
+                    (job_id, huella, marca_listado(empleo), json.dumps(empleo, ensure_ascii=False),
+                     posicion, ahora, ahora),
+                )
+
+            if completo:
+                cambios["expirados"] = [
+                    job_id for job_id, (_, expirado) in anteriores.items() if job_id not in vistos and expirado is None
+                ]
+                self._conn.executemany("UPDATE empleos SET expirado = ?, posicion = NULL WHERE job_id = ?",
+                                       [(ahora, job_id) for job_id in cambios["expirados"]])
+        return cambios
+
+    def pendientes(self) -> list:
+        """job_id vigentes sin detalle o con un detalle anterior al listado actual, en orden del listado"""
+        filas = self._conn.execute(
+            "SELECT job_id FROM empleos WHERE expirado IS NULL "
+            "AND (detalle IS NULL OR huella_detalle IS NOT huella) ORDER BY posicion"
+        )
+        return [job_id for (job_id,) in filas]
+
+    def guardar_detalles(self, detalles):
+        """Guarda los detalles descargados junto con la huella del listado con que se pidieron"""
+        ahora = time.time()
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE empleos SET detalle = ?, huella_detalle = huella, detalle_actualizado = ? WHERE job_id = ?",
+                [(json.dumps(detalle, ensure_ascii=False), ahora, detalle["job_id"])
+                 for detalle in detalles if detalle.get("job_id")],
+            )
+
+    def detalles_vigentes(self) -> list:
+        """Detalles de los empleos no expirados, en el orden del último listado"""
+        filas = self._conn.execute(
+            "SELECT detalle FROM empleos WHERE expirado IS NULL AND detalle IS NOT NULL ORDER BY posicion"
+        )
+        return [json.loads(detalle) for (detalle,) in filas]
+
+    def resumen(self) -> dict:
+        vigentes, expirados, sin_detalle = self._conn.execute(
+            "SELECT SUM(expirado IS NULL), SUM(expirado IS NOT NULL), SUM(expirado IS NULL AND detalle IS NULL) "
+            "FROM empleos"
+        ).fetchone()
+        return {"vigentes": vigentes or 0, "expirados": expirados or 0, "sin_detalle": sin_detalle or 0}
+
+    def cerrar(self):
+        self._conn.close()
@@ -0,0 +1,183 @@
+"""Listado de empleos paginando directamente `/api/v2/jobs` con la sesión de Selenium.
+
+Reemplaza el scroll, el clic en "Siguiente" y las esperas fijas: se pide la
+primera página, se calcula cuántas hay a partir del total y el resto se
+descarga en paralelo con el mismo cliente, límite de tasa y reintentos que los
+detalles. Si la respuesta no trae el total se piden tandas de páginas hasta
+encontrar una vacía.
+
+Para probarlo sin Symplicity (desde back/):
+    python scrapping/api_simulada.py --puerto 8765 --empleos 2000
+    python scrapping/listado_http.py --base-url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from urllib.parse import parse_qsl, urlparse
+
+from detalles_http import (BASE_URL, DETALLES_RAFAGA, DETALLES_REINTENTOS, DETALLES_TASA, DETALLES_TIMEOUT,
+                           LimitadorTasa, con_reintentos, crear_cliente, pedir_json)
+
+RUTA_LISTADO = "/api/v2/jobs"
+# Parámetros de la búsqueda de la web; se reemplazan por los que capture el navegador si los hay
+PARAMETROS_LISTADO = {"sort": "!postdate", "json_mode": "read_only"}
+# Empleos por página y páginas pedidas a la vez
+LISTADO_POR_PAGINA = int(os.getenv("LISTADO_POR_PAGINA", "20"))
+LISTADO_CONCURRENCIA = int(os.getenv("LISTADO_CONCURRENCIA", "4"))
+# api = paginar la API directamente | navegador = clics en "Siguiente" (modo anterior)
+LISTADO_MODO = os.getenv("LISTADO_MODO", "api")
+RUTA_LISTADO_JSON = "jobs_raw.json"
+
+
+def parametros_desde_url(url: str) -> dict:
+    """Parámetros de una URL de `/api/v2/jobs` capturada en el navegador, sin la paginación"""
+    parametros = dict(parse_qsl(urlparse(url).query, keep_blank_values=True))
+    parametros.pop("page", None)
+    parametros.pop("perPage", None)
+    parametros.setdefault("json_mode", "read_only")
+    return parametros
+
+
+def ruta_marca_listado(ruta: str) -> str:
+    """jobs_raw.json -> jobs_raw.estado.json, donde se anota si el listado está completo"""
+    return os.path.splitext(ruta)[0] + ".estado.json"
+
+
+def guardar_listado(empleos, completo: bool, ruta: str = RUTA_LISTADO_JSON):
+    """Guarda el listado y, al lado, si se llegó a todas sus páginas"""
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(empleos, f, ensure_ascii=False, indent=2)
+    with open(ruta_marca_listado(ruta), "w", encoding="utf-8") as f:
+        json.dump({"completo": completo, "empleos": len(empleos)}, f)
+
+
+def listado_guardado_completo(empleos, ruta: str = RUTA_LISTADO_JSON) -> bool:
+    """True solo si la marca dice que el listado guardado en `ruta` está completo.
+
+    Sin marca (un jobs_raw.json anterior) o si no corresponde a esos empleos, se
+    asume incompleto para no dar por expirados empleos que solo faltan en él.
+    """
+    try:
+        with open(ruta_marca_listado(ruta), "r", encoding="utf-8") as f:
+            marca = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return False
+    return bool(empleos) and marca.get("completo") is True and marca.get("empleos") == len(empleos)
+
+
+def total_de(datos: dict):
+    """Total de empleos que informa la respuesta, o None si no lo trae"""
+    for campo in ("total", "count", "total_count"):
+        if isinstance(datos.get(campo), int):
+            return datos[campo]
+    return None
+
+
+async def obtener_listado(cookies=None, user_agent: str = None, base_url: str = BASE_URL, parametros: dict = None,
+                          por_pagina: int = LISTADO_POR_PAGINA, concurrencia: int = LISTADO_CONCURRENCIA,
+                          timeout: float = DETALLES_TIMEOUT, tasa: float = DETALLES_TASA,
+                          rafaga: int = DETALLES_RAFAGA, reintentos: int = DETALLES_REINTENTOS, checkpoint=None):
+    """Descarga todas las páginas del listado.
+
+    Devuelve (empleos sin job_id repetidos, en orden de página, reporte). Con
+    `checkpoint` cada página se anota apenas llega y las ya anotadas con el
+    mismo tamaño de página no se vuelven a pedir.
+    """
+    parametros = {**PARAMETROS_LISTADO, **(parametros or {})}
+    semaforo = asyncio.Semaphore(concurrencia)
+    limitador = LimitadorTasa(tasa, rafaga)
+    contador = {"reintentos": 0}
+    paginas = {}
+    fallidas = []
+    inicio = time.perf_counter()
+
+    hechas = {}
+    if checkpoint is not None:
+        hechas = {registro["pagina"]: registro for registro in checkpoint.leer()
+                  if registro.get("por_pagina") == por_pagina}
+    if hechas:
+        print(f"♻️ {len(hechas)} páginas del listado retomadas del checkpoint")
+
+    async with crear_cliente(base_url, cookies, user_agent, concurrencia, timeout) as cliente:
+        async def pedir(pagina: int):
+            if pagina in hechas:
+                paginas[pagina] = hechas[pagina]["models"]
+                return hechas[pagina]
+            params = {**parametros, "page": pagina, "perPage": por_pagina}
+            datos, fallo = await con_reintentos(lambda: pedir_json(cliente, RUTA_LISTADO, params), semaforo,
+                                                limitador, reintentos, f"Página {pagina}", contador)
+            if fallo:
+                print(f"❌ Página {pagina}: {fallo['error']}")
+                fallidas.append({"pagina": pagina, **fallo})
+                return None
+            modelos = datos.get("models") or []
+            print(f"📄 Página {pagina}: {len(modelos)} empleos")
+            paginas[pagina] = modelos
+            if checkpoint is not None:
+                checkpoint.agregar({"pagina": pagina, "por_pagina": por_pagina, "total": total_de(datos),
+                                    "models": modelos})
+            return datos
+
+        primera = await pedir(1)
+        total = total_de(primera) if primera else None
+        if total is not None:
+            ultima = math.ceil(total / por_pagina)
+            await asyncio.gather(*(pedir(pagina) for pagina in range(2, ultima + 1)))
+        elif primera and paginas[1]:
+            # Sin total: tandas de páginas hasta que una llegue vacía o falle la tanda entera
+            siguiente = 2
+            while True:
+                tanda = range(siguiente, siguiente + concurrencia)
+                await asyncio.gather(*(pedir(pagina) for pagina in tanda))
+                if any(pagina in paginas and not paginas[pagina] for pagina in tanda):
+                    break
+                if not any(pagina in paginas for pagina in tanda):
+                    break
+                siguiente += concurrencia
+
+    # Si se publica un empleo mientras se pagina, otro se corre de página y puede aparecer dos veces
+    empleos, vistos = [], set()
+    for pagina in sorted(paginas):
+        for empleo in paginas[pagina]:
+            job_id = empleo.get("job_id")
+            if job_id and job_id in vistos:
+                continue
+            vistos.add(job_id)
+            empleos.append(empleo)
+
+    reporte = {
+        "total_informado": total,
+        "empleos": len(empleos),
+        "paginas": len(paginas),
+        "paginas_retomadas": len(hechas.keys() & paginas.keys()),
+        "paginas_fallidas": sorted(fallidas, key=lambda fallo: fallo["pagina"]),
+        "reintentos": contador["reintentos"],
+        "segundos": round(time.perf_counter() - inicio, 2),
+        "parametros": {"por_pagina": por_pagina, "concurrencia": concurrencia, "tasa": tasa, "rafaga": rafaga},
+    }
+    return empleos, reporte
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descarga el listado de empleos y mide el tiempo")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--por-pagina", type=int, default=LISTADO_POR_PAGINA)
+    parser.add_argument("--concurrencia", type=int, default=LISTADO_CONCURRENCIA)
+    parser.add_argument("--tasa", type=float, default=DETALLES_TASA, help="Peticiones por segundo (0 = sin límite)")
+    parser.add_argument("--salida", help="Archivo donde guardar el listado (p. ej. jobs_raw.json)")
+    args = parser.parse_args()
+
+    empleos, reporte = asyncio.run(obtener_listado(base_url=args.base_url, por_pagina=args.por_pagina,
+                                                   concurrencia=args.concurrencia, tasa=args.tasa))
+    print(f"\n📦 {reporte['empleos']} empleos de {reporte['paginas']} páginas en {reporte['segundos']:.2f}s, "
+          f"{len(reporte['paginas_fallidas'])} páginas fallidas, {reporte['reintentos']} reintentos")
+
+    if args.salida:
+        guardar_listado(empleos, not reporte["paginas_fallidas"], args.salida)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,26 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, JavascriptException
 from webdriver_manager.chrome import ChromeDriverManager
+import argparse
+import asyncio
 import json
 import time
 import os
 from dotenv import load_dotenv
 from selenium.webdriver.common.keys import Keys
 
+from checkpoints import Checkpoint
+from detalles_http import guardar_reporte, obtener_detalles, sesion_desde_driver
+from estado_scraping import EstadoScraping
+from listado_http import LISTADO_MODO, guardar_listado, obtener_listado, parametros_desde_url
+
+parser = argparse.ArgumentParser(description="Scraper de empleos de Symplicity")
+parser.add_argument("--completo", action="store_true",
+                    help="Descarga el detalle de todos los empleos, no solo de los nuevos o modificados")
+parser.add_argument("--resume", action="store_true",
+                    help="Retoma la corrida interrumpida saltando las páginas y detalles ya descargados")
+args = parser.parse_args()
+
 # Cargar variables de entorno
 load_dotenv()
 
@@ -43,6 +57,7 @@ xhr_interceptor = """
 (function() {
   const open = XMLHttpRequest.prototype.open;
   window._xhrResults = [];
+  window._xhrUrls = [];
 
   XMLHttpRequest.prototype.open = function(method, url) {
     this._url = url;
@@ -55,6 +70,7 @@ xhr_interceptor = """
     this.addEventListener("load", function() {
       try {
         if (_this._url.includes("/api/v2/jobs") && _this._url.includes("json_mode=read_only")) {
+          window._xhrUrls.push(_this._url);
           const json = JSON.parse(_this.response);
           if (json.models && json.models.length > 0) {
             window._xhrResults.push(...json.models);
@@ -172,99 +188,134 @@ if not hacer_login():
     driver.quit()
     exit(1)
 
-print("🧭 Iniciando scraping navegando con clics en 'Siguiente'...")
+# --- Checkpoints de la corrida: sin --resume se empieza de cero ---
+checkpoint_listado = Checkpoint("listado")
+checkpoint_detalles = Checkpoint("detalles")
+if not args.resume:
+    checkpoint_listado.reiniciar()
+    checkpoint_detalles.reiniciar()
+
+# --- Listado de empleos ---
+def listar_con_clics():
+    """Modo anterior: recorre las páginas con clics en 'Siguiente' y lee lo capturado por el interceptor.
+
+    Devuelve (empleos, completo); completo solo si se llegó a la última página.
+    No deja checkpoints: con clics no se puede saltar directo a una página.
+    """
+    print("🧭 Iniciando scraping navegando con clics en 'Siguiente'...")
+
+    page = 1
+    max_espera = 10
+    completo = False
+
+    while True:
+        print(f"\n📄 Página {page}")
+
+        # Scroll para activar carga de empleos
+        try:
+            scroll_area = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CLASS_NAME, "list-page-job-search"))
+            )
+            for _ in range(5):
+                driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_area)
+                time.sleep(0.3)
+        except TimeoutException:
+            print("❌ No se pudo hacer scroll. Terminando.")
+            break
 
-page = 1
-max_espera = 10
+        prev_count = driver.execute_script("return window._xhrResults.length")
+
+        # Clic en botón "Siguiente"
+        try:
+            btn_siguiente = WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.XPATH, "//button[span[text()='Siguiente']]"))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", btn_siguiente)
+            time.sleep(0.5)
+            driver.execute_script("arguments[0].click();", btn_siguiente)
+            print(f"✅ Clic en 'Siguiente' hecho (página {page})")
+        except TimeoutException:
+            print("✅ No se encontró botón 'Siguiente'. Fin del scraping.")
+            completo = True
+            break
+        except JavascriptException as e:
+            print("❌ Falló el clic con JS:", e)
+            break
 
-while True:
-    print(f"\n📄 Página {page}")
+        for _ in range(max_espera * 2):
+            time.sleep(0.5)
+            new_count = driver.execute_script("return window._xhrResults.length")
+            if new_count > prev_count:
+                break
 
-    # Scroll para activar carga de empleos
-    try:
-        scroll_area = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "list-page-job-search"))
-        )
-        for _ in range(5):
-            driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", scroll_area)
-            time.sleep(0.3)
-    except TimeoutException:
-        print("❌ No se pudo hacer scroll. Terminando.")
-        break
+        if new_count == prev_count:
+            print("⚠️ No se cargaron nuevos empleos tras hacer clic. Deteniendo.")
+            break
 
-    prev_count = driver.execute_script("return window._xhrResults.length")
+        page += 1
 
-    # Clic en botón "Siguiente"
-    try:
-        btn_siguiente = WebDriverWait(driver, 5).until(
-            EC.presence_of_element_located((By.XPATH, "//button[span[text()='Siguiente']]"))
-        )
-        driver.execute_script("arguments[0].scrollIntoView(true);", btn_siguiente)
-        time.sleep(0.5)
-        driver.execute_script("arguments[0].click();", btn_siguiente)
-        print(f"✅ Clic en 'Siguiente' hecho (página {page})")
-    except TimeoutException:
-        print("✅ No se encontró botón 'Siguiente'. Fin del scraping.")
-        break
-    except JavascriptException as e:
-        print("❌ Falló el clic con JS:", e)
-        break
-
-    for _ in range(max_espera * 2):
-        time.sleep(0.5)
-        new_count = driver.execute_script("return window._xhrResults.length")
-        if new_count > prev_count:
-            break
+    return driver.execute_script("return window._xhrResults.filter(x => typeof x === 'object')"), completo
 
-    if new_count == prev_count:
-        print("⚠️ No se cargaron nuevos empleos tras hacer clic. Deteniendo.")
-        break
 
-    page += 1
+def listar_por_api():
+    """Pagina `/api/v2/jobs` directamente con las cookies de la sesión. Devuelve (empleos, completo)"""
+    print("🧭 Listando empleos directamente desde la API...")
+    # Se reutilizan los parámetros de la búsqueda que hizo la propia web, si alcanzó a hacerla
+    try:
+        WebDriverWait(driver, 5).until(lambda d: d.execute_script("return window._xhrUrls.length > 0"))
+        parametros = parametros_desde_url(driver.execute_script("return window._xhrUrls[0]"))
+    except TimeoutException:
+        parametros = None
+    cookies, user_agent = sesion_desde_driver(driver)
+    empleos, reporte = asyncio.run(obtener_listado(cookies, user_agent, parametros=parametros,
+                                                   checkpoint=checkpoint_listado))
+    if reporte["paginas_fallidas"]:
+        print(f"⚠️ Fallaron {len(reporte['paginas_fallidas'])} páginas del listado: "
+              f"{[fallo['pagina'] for fallo in reporte['paginas_fallidas']]}")
+    return empleos, not reporte["paginas_fallidas"]
+
+
+resultados, listado_completo = listar_por_api() if LISTADO_MODO == "api" else ([], False)
+if not resultados:
+    if LISTADO_MODO == "api":
+        print("⚠️ La API no devolvió empleos, se usa la navegación con clics")
+    resultados, listado_completo = listar_con_clics()
+# Un listado vacío casi siempre es un error de la sesión, no que no haya empleos
+listado_completo = listado_completo and bool(resultados)
 
 # --- Guardar resultados de empleos listados ---
-resultados = driver.execute_script("return window._xhrResults.filter(x => typeof x === 'object')")
 print(f"\n📦 Total empleos recolectados: {len(resultados)}")
-with open("jobs_raw.json", "w", encoding="utf-8") as f:
-    json.dump(resultados, f, ensure_ascii=False, indent=2)
+guardar_listado(resultados, listado_completo)
 print("✅ Empleos guardados en 'jobs_raw.json'")
 
-# --- Paso 2: Extraer detalles individuales de cada empleo ---
-print(f"\n🔎 Procesando {len(resultados)} empleos para extraer detalles...")
-
-driver.execute_script("window.open('');")
-driver.switch_to.window(driver.window_handles[1])
-
-detalles = []
-fallidos = []
-
+# --- Paso 2: Extraer detalles de los empleos nuevos o modificados ---
+job_ids = []
 for idx, job in enumerate(resultados, 1):
-    job_id = job.get("job_id")
-    if not job_id:
+    if not job.get("job_id"):
         print(f"⚠️ ({idx}) Empleo sin 'job_id': {job.get('job_title', 'Sin título')}")
         continue
+    job_ids.append(job["job_id"])
 
-    url = f"https://pucp-csm.symplicity.com/api/v3/jobs/{job_id}"
-
-    try:
-        driver.get(url)
-        driver.implicitly_wait(3)
-
-        pre = driver.find_elements("tag name", "pre")
-        if not pre:
-            print(f"⚠️ ({idx}) No se encontró JSON visible en: {url}")
-            fallidos.append(job_id)
-            continue
+# El estado de corridas anteriores dice qué empleos ya tienen su detalle al día
+estado = EstadoScraping()
+cambios = estado.registrar_listado(resultados, completo=listado_completo)
+print(f"\n🆕 {len(cambios['nuevos'])} nuevos, ✏️ {len(cambios['cambiados'])} modificados, "
+      f"{cambios['sin_cambios']} sin cambios, 🗓️ {len(cambios['expirados'])} expirados")
+if not listado_completo:
+    print("⚠️ El listado quedó incompleto: no se marca ningún empleo como expirado")
+if not args.completo:
+    job_ids = estado.pendientes()
 
-        raw_text = pre[0].text.strip()
-        job_detail = json.loads(raw_text)
-        detalles.append(job_detail)
+print(f"\n🔎 Procesando {len(job_ids)} empleos para extraer detalles...")
 
-        print(f"✅ ({idx}) Detalle extraído para ID {job_id}")
+# La API se llama directamente con las cookies de la sesión de Selenium
+cookies, user_agent = sesion_desde_driver(driver)
+descargados, reporte = asyncio.run(obtener_detalles(job_ids, cookies, user_agent, checkpoint=checkpoint_detalles))
+estado.guardar_detalles(descargados)
 
-    except Exception as e:
-        print(f"❌ ({idx}) Error con ID {job_id}: {e}")
-        fallidos.append(job_id)
+# Los detalles de los empleos sin cambios salen del estado
+detalles = estado.detalles_vigentes()
+estado.cerrar()
 
 # --- Guardar detalles ---
 with open("detalles_empleos.json", "w", encoding="utf-8") as f:
@@ -272,8 +323,7 @@ with open("detalles_empleos.json", "w", encoding="utf-8") as f:
 
 print(f"\n📦 Detalles guardados: {len(detalles)} empleos en 'detalles_empleos.json'")
 
-if fallidos:
-    print(f"⚠️ Fallaron {len(fallidos)} empleos: {fallidos}")
+guardar_reporte(reporte)
 
 # --- Guardar detalles formateados para chatbot ---
 print(f"\n🔎 Formateando {len(detalles)} empleos para chatbot...")
@@ -429,5 +479,9 @@ print(f"\n✅ Formateo completado!")
 print(f"📦 Empleos formateados guardados en 'jobs_for_chatbot.json'")
 print(f"📊 Total de empleos formateados: {len(formatted_jobs)}")
 
+# La corrida terminó: la próxima con --resume no debe reutilizar estos checkpoints
+checkpoint_listado.borrar()
+checkpoint_detalles.borrar()
+
 
 driver.quit()
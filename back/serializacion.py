@@ -0,0 +1,83 @@
+import gzip
+import json
+
+# orjson y brotli son opcionales: sin ellos se usa json y solo gzip
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Cuerpos más pequeños no compensan el costo de comprimir
+TAMANO_MINIMO_COMPRESION = 1024
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+
+
+def dumps(datos) -> bytes:
+    """Serializa a JSON en UTF-8, con orjson si está instalado"""
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def comprimir(cuerpo: bytes, codificacion: str) -> bytes:
+    if codificacion == "br":
+        return brotli.compress(cuerpo, quality=CALIDAD_BROTLI)
+    if codificacion == "gzip":
+        return gzip.compress(cuerpo, compresslevel=NIVEL_GZIP, mtime=0)
+    return cuerpo
+
+
+def codificaciones_disponibles():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def codificaciones_aceptadas(accept_encoding: str) -> set:
+    """Codificaciones del header Accept-Encoding, sin las marcadas con q=0"""
+    aceptadas = set()
+    for parte in (accept_encoding or "").lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        if parametros.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        aceptadas.add(nombre.strip())
+    return aceptadas
+
+
+def elegir_codificacion(accept_encoding: str) -> str:
+    """Mejor Content-Encoding aceptado por el cliente: br > gzip > identity"""
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    for codificacion in codificaciones_disponibles():
+        if codificacion in aceptadas or "*" in aceptadas:
+            return codificacion
+    return "identity"
+
+
+class CuerpoPrecomprimido:
+    """Un cuerpo JSON ya serializado junto con sus variantes comprimidas"""
+
+    def __init__(self, cuerpo: bytes):
+        self.variantes = {"identity": cuerpo}
+        if len(cuerpo) >= TAMANO_MINIMO_COMPRESION:
+            for codificacion in codificaciones_disponibles():
+                self.variantes[codificacion] = comprimir(cuerpo, codificacion)
+
+    def para(self, accept_encoding: str):
+        """Devuelve (bytes, codificación) según lo que acepte el cliente"""
+        codificacion = elegir_codificacion(accept_encoding)
+        if codificacion not in self.variantes:
+            codificacion = "identity"
+        return self.variantes[codificacion], codificacion
+
+
+def comprimir_para(cuerpo: bytes, accept_encoding: str):
+    """Comprime al vuelo un cuerpo dinámico con gzip si es grande y el cliente lo acepta"""
+    aceptadas = codificaciones_aceptadas(accept_encoding)
+    if len(cuerpo) < TAMANO_MINIMO_COMPRESION or not ({"gzip", "*"} & aceptadas):
+        return cuerpo, "identity"
+    # Al vuelo se usa solo gzip: brotli es más lento y gana poco en páginas chicas
+    return comprimir(cuerpo, "gzip"), "gzip"
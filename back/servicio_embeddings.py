@@ -0,0 +1,112 @@
+"""Embeddings de consulta compartidos entre los workers de uvicorn.
+
+El proceso cargador ya tiene MiniLM en memoria para construir el índice; con
+`ServidorEmbeddings` atiende también los embeddings de consulta de los workers
+por una conexión local (multiprocessing.connection). Así los workers no cargan
+su propia copia del modelo ni importan torch.
+"""
+import os
+import threading
+from multiprocessing.connection import Client, Listener
+
+# host:puerto del servidor de embeddings del cargador; vacío = cada proceso carga su modelo
+EMBED_SERVIDOR = os.getenv("EMBED_SERVIDOR", "")
+# Clave compartida entre el cargador y los workers para autenticar la conexión
+EMBED_CLAVE = os.getenv("EMBED_CLAVE", "")
+
+# Métodos del modelo que se pueden pedir al servidor
+METODOS = ("embed_query", "embed_documents")
+
+
+def direccion_de(texto: str):
+    """'127.0.0.1:5001' -> ('127.0.0.1', 5001); sin host se usa 127.0.0.1"""
+    host, _, puerto = texto.rpartition(":")
+    return host or "127.0.0.1", int(puerto)
+
+
+class ServidorEmbeddings:
+    """Atiende `embed_query`/`embed_documents` de otros procesos con el modelo ya cargado en este.
+
+    Cada conexión (una por hilo de búsqueda de cada worker) se atiende en su
+    propio hilo; torch suelta el GIL mientras calcula, así las consultas de
+    distintos workers no se esperan entre sí.
+    """
+
+    def __init__(self, embeddings, direccion: str, clave: str):
+        self.embeddings = embeddings
+        self.clave = clave
+        self._listener = Listener(direccion_de(direccion), authkey=clave.encode())
+        host, puerto = self._listener.address
+        # Con puerto 0 el sistema elige uno libre; esta es la dirección real
+        self.direccion = f"{host}:{puerto}"
+        self._cerrado = False
+
+    def iniciar(self) -> "ServidorEmbeddings":
+        threading.Thread(target=self._aceptar, name="servidor-embeddings", daemon=True).start()
+        return self
+
+    def _aceptar(self):
+        while not self._cerrado:
+            try:
+                conexion = self._listener.accept()
+            except Exception as e:
+                if not self._cerrado:
+                    print(f"Conexión rechazada por el servidor de embeddings: {e}")
+                continue
+            threading.Thread(target=self._atender, args=(conexion,), name="embeddings-conexion",
+                             daemon=True).start()
+
+    def _atender(self, conexion):
+        with conexion:
+            while True:
+                try:
+                    metodo, argumento = conexion.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if metodo not in METODOS:
+                        raise ValueError(f"Método desconocido: {metodo}")
+                    conexion.send(("ok", getattr(self.embeddings, metodo)(argumento)))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    conexion.send(("error", str(e)))
+
+    def cerrar(self):
+        self._cerrado = True
+        self._listener.close()
+
+
+class EmbeddingsRemotos:
+    """Cliente de `ServidorEmbeddings` con la misma interfaz que los embeddings de LangChain.
+
+    Mantiene una conexión por hilo y reconecta una vez si el cargador se reinició.
+    """
+
+    def __init__(self, direccion: str, clave: str):
+        self.direccion = direccion_de(direccion)
+        self.clave = clave.encode()
+        self._local = threading.local()
+
+    def _pedir(self, metodo: str, argumento):
+        for intento in range(2):
+            conexion = getattr(self._local, "conexion", None)
+            try:
+                if conexion is None:
+                    conexion = self._local.conexion = Client(self.direccion, authkey=self.clave)
+                conexion.send((metodo, argumento))
+                estado, valor = conexion.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conexion = None
+                if intento:
+                    raise
+        if estado == "error":
+            raise RuntimeError(f"Error en el servidor de embeddings: {valor}")
+        return valor
+
+    def embed_query(self, texto: str):
+        return self._pedir("embed_query", texto)
+
+    def embed_documents(self, textos):
+        return self._pedir("embed_documents", list(textos))
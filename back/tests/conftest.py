@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos de back/ y de back/scrapping se importan por nombre, igual que al
+# correr el servidor o los scrapers desde back/
+DIRECTORIO_BACK = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(DIRECTORIO_BACK, "scrapping"))
+sys.path.insert(0, DIRECTORIO_BACK)
+
+
+UBICACIONES = ["San Isidro, Lima, Perú", "Arequipa, Perú", "Miraflores, Lima, Perú"]
+TIPOS = ["Práctica Preprofesional", "Práctica Profesional", "Tiempo Completo"]
+MODALIDADES = ["Remoto", "En instalaciones", "Híbrido"]
+NIVELES = ["Practicante", "Analista", "Asistente", "Jefe"]
+CARRERAS = [["PREGRADO/INGENIERÍA INDUSTRIAL"], ["PREGRADO/INGENIERÍA INFORMÁTICA", "PREGRADO/ESTADÍSTICA"],
+            ["PREGRADO/ECONOMÍA"], ["PREGRADO/COMUNICACIÓN PARA EL DESARROLLO"]]
+
+
+def empleo_de_prueba(i: int) -> dict:
+    return {
+        "id": f"job-{i}",
+        "visual_id": f"V{i:04d}",
+        "title": f"Puesto {i}",
+        "company": f"Empresa {i % 7}",
+        "location": UBICACIONES[i % 3],
+        "job_type": TIPOS[i % 3],
+        "remote_type": MODALIDADES[(i // 3) % 3],
+        "experience_level": NIVELES[i % 4],
+        "majors": CARRERAS[i % 4],
+        "description": f"Descripción del puesto {i}. " * 5,
+    }
+
+
+@pytest.fixture
+def catalogo():
+    """Catálogo de 120 empleos sintéticos con todas las combinaciones de facetas"""
+    from catalogo import JobCatalog
+    return JobCatalog([empleo_de_prueba(i) for i in range(120)], huella="ab" * 32)
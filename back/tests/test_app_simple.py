@@ -0,0 +1,110 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app_simple
+from catalogo import JobCatalog
+from recarga import Recursos
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(app_simple.recargador, "actual", Recursos(JobCatalog.desde_archivo()))
+    # Sin `with`: no corre el evento de arranque (modelo, proveedores, observador)
+    return TestClient(app_simple.app)
+
+
+@pytest.mark.parametrize("ruta, metodo", [("/admin/recargar", "post"), ("/admin/cache", "get"),
+                                          ("/admin/proveedores", "get")])
+def test_admin_desactivado_sin_token_configurado(cliente, monkeypatch, ruta, metodo):
+    monkeypatch.setattr(app_simple, "ADMIN_TOKEN", None)
+    assert getattr(cliente, metodo)(ruta).status_code == 403
+    assert getattr(cliente, metodo)(ruta, headers={"X-Admin-Token": ""}).status_code == 403
+
+
+def test_admin_exige_el_token(cliente, monkeypatch):
+    monkeypatch.setattr(app_simple, "ADMIN_TOKEN", "secreto")
+    assert cliente.get("/admin/cache").status_code == 403
+    assert cliente.get("/admin/cache", headers={"X-Admin-Token": "otro"}).status_code == 403
+    respuesta = cliente.get("/admin/cache", headers={"X-Admin-Token": "secreto"})
+    assert respuesta.status_code == 200
+    assert "resultados" in respuesta.json()
+
+
+@pytest.fixture
+def cliente_sintetico(monkeypatch, catalogo):
+    monkeypatch.setattr(app_simple.recargador, "actual", Recursos(catalogo))
+    return TestClient(app_simple.app)
+
+
+def recorrer_paginas(cliente, parametros: str = ""):
+    """Sigue next_cursor hasta el final y devuelve todos los resultados"""
+    resultados, cursor = [], None
+    while True:
+        url = f"/get_all_jobs?{parametros}" + (f"&cursor={cursor}" if cursor else "")
+        cuerpo = cliente.get(url).json()
+        resultados += cuerpo["results"]
+        cursor = cuerpo["next_cursor"]
+        if cursor is None:
+            return resultados, cuerpo["total"]
+
+
+def test_cursor_recorre_todo_el_catalogo_sin_repetir(cliente_sintetico, catalogo):
+    resultados, total = recorrer_paginas(cliente_sintetico, "limit=17")
+    assert total == 120
+    assert resultados == catalogo.empleos
+
+
+def test_cursor_con_filtros(cliente_sintetico, catalogo):
+    resultados, total = recorrer_paginas(cliente_sintetico, "limit=7&remote_type=remoto&location=lima")
+    esperados = catalogo.filtrar({"remote_type": "remoto", "location": "lima"})
+    assert resultados == esperados
+    assert total == len(esperados)
+
+
+def test_cursor_invalido_o_de_otra_version(cliente_sintetico):
+    assert cliente_sintetico.get("/get_all_jobs?cursor=basura").status_code == 400
+    cursor = app_simple.codificar_cursor("otra-version", 50)
+    assert cliente_sintetico.get(f"/get_all_jobs?cursor={cursor}").status_code == 400
+
+
+def test_proyeccion_de_campos_en_el_listado(cliente_sintetico):
+    cuerpo = cliente_sintetico.get("/get_all_jobs?limit=3&fields=id,company").json()
+    assert cuerpo["results"] == [{"id": f"job-{i}", "company": f"Empresa {i}"} for i in range(3)]
+
+
+def test_etag_debil_y_304(cliente_sintetico):
+    respuesta = cliente_sintetico.get("/get_all_jobs")
+    etag = respuesta.headers["etag"]
+    assert etag.startswith('W/"')
+    for enviado in (etag, etag.removeprefix("W/"), f'"otro", {etag}', "*"):
+        no_modificado = cliente_sintetico.get("/get_all_jobs", headers={"If-None-Match": enviado})
+        assert no_modificado.status_code == 304
+        assert no_modificado.headers["etag"] == etag
+        assert "Accept-Encoding" in no_modificado.headers["vary"]
+    assert cliente_sintetico.get("/get_all_jobs", headers={"If-None-Match": '"otro"'}).status_code == 200
+
+
+def test_etag_cambia_con_la_version_del_catalogo(cliente_sintetico, monkeypatch):
+    etag = cliente_sintetico.get("/get_all_jobs").headers["etag"]
+    nuevo = JobCatalog([{"id": "x"}], huella="cd" * 32)
+    monkeypatch.setattr(app_simple.recargador, "actual", Recursos(nuevo))
+    respuesta = cliente_sintetico.get("/get_all_jobs", headers={"If-None-Match": etag})
+    assert respuesta.status_code == 200
+    assert respuesta.json()["results"] == [{"id": "x"}]
+
+
+def test_detalle_de_empleo(cliente_sintetico, catalogo):
+    respuesta = cliente_sintetico.get("/job/V0009")
+    assert respuesta.json() == {"job": catalogo.buscar("job-9"), "found": True}
+    assert cliente_sintetico.get("/job/V0009", headers={"If-None-Match": respuesta.headers["etag"]}).status_code == 304
+    assert cliente_sintetico.get("/job/nada").json() == {"job": None, "found": False}
+
+
+def test_listado_comprimido_segun_accept_encoding(cliente_sintetico):
+    # La primera página sale precomprimida y las demás se comprimen al vuelo
+    for url in ("/get_all_jobs", "/get_all_jobs?remote_type=remoto"):
+        comprimida = cliente_sintetico.get(url, headers={"Accept-Encoding": "gzip"})
+        plana = cliente_sintetico.get(url, headers={"Accept-Encoding": "identity"})
+        assert comprimida.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plana.headers
+        assert comprimida.json() == plana.json()
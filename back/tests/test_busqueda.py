@@ -0,0 +1,164 @@
+import pytest
+
+from busqueda import (AnalizadorConsulta, IndiceBM25, agrupar_por_empleo, candidatos_por_facetas, fusion_rrf,
+                      priorizar_facetas, separar_facetas)
+from catalogo import JobCatalog
+from texto import raiz, terminos
+
+
+@pytest.fixture
+def analizador(catalogo):
+    return AnalizadorConsulta(catalogo)
+
+
+def test_analiza_facetas_sin_tildes(analizador):
+    facetas = analizador.analizar("Prácticas remotas de ingeniería informática en AREQUIPA para analista")
+    assert facetas == {
+        "remote_type": {"Remoto"},
+        "job_type": {"Práctica Preprofesional", "Práctica Profesional"},
+        "experience_level": {"Analista"},
+        "majors": {"PREGRADO/INGENIERÍA INFORMÁTICA"},
+        "location": {"Arequipa, Perú"},
+    }
+
+
+def test_frase_mas_especifica_gana(analizador):
+    facetas = analizador.analizar("practica preprofesional de ingenieria industrial en lima")
+    assert facetas["job_type"] == {"Práctica Preprofesional"}
+    assert facetas["majors"] == {"PREGRADO/INGENIERÍA INDUSTRIAL"}
+    assert facetas["location"] == {"San Isidro, Lima, Perú", "Miraflores, Lima, Perú"}
+
+
+def test_consulta_sin_facetas(analizador):
+    assert analizador.analizar("me gusta programar en python") == {}
+
+
+def test_nivel_es_faceta_suave(analizador):
+    duras, suaves = separar_facetas(analizador.analizar("analista remoto"))
+    assert duras == {"remote_type": {"Remoto"}}
+    assert suaves == {"experience_level": {"Analista"}}
+
+
+def test_facetas_duras_filtran_candidatos(catalogo, analizador):
+    duras, _ = separar_facetas(analizador.analizar("analista híbrido en arequipa"))
+    ids, aplicadas = candidatos_por_facetas(catalogo, duras)
+    esperados = [e["id"] for e in catalogo.empleos if e["location"] == "Arequipa, Perú" and e["remote_type"] == "Híbrido"]
+    assert ids == esperados
+    assert aplicadas == duras
+    # El nivel no recorta: entre los candidatos hay empleos de todos los niveles
+    assert {catalogo.buscar(i)["experience_level"] for i in ids} == {"Practicante", "Analista", "Asistente", "Jefe"}
+
+
+def test_relaja_ubicacion_antes_que_el_resto(catalogo):
+    # En el catálogo de prueba Arequipa solo tiene prácticas profesionales
+    facetas = {"location": {"Arequipa, Perú"}, "job_type": {"Tiempo Completo"}}
+    ids, aplicadas = candidatos_por_facetas(catalogo, facetas)
+    assert aplicadas == {"job_type": {"Tiempo Completo"}}
+    assert ids == [e["id"] for e in catalogo.empleos if e["job_type"] == "Tiempo Completo"]
+
+
+def test_relaja_modalidad_antes_que_tipo_de_puesto():
+    catalogo = JobCatalog([
+        {"id": "a", "job_type": "Práctica Profesional", "remote_type": "Remoto"},
+        {"id": "b", "job_type": "Tiempo Completo", "remote_type": "Híbrido"},
+    ])
+    facetas = {"job_type": {"Práctica Profesional"}, "remote_type": {"Híbrido"}}
+    ids, aplicadas = candidatos_por_facetas(catalogo, facetas)
+    assert ids == ["a"]
+    assert aplicadas == {"job_type": {"Práctica Profesional"}}
+
+
+def test_sin_filtro_si_todos_cumplen_o_nada_cumple(catalogo):
+    assert candidatos_por_facetas(catalogo, {"majors": set(catalogo.valores_faceta("majors"))})[0] is None
+    assert candidatos_por_facetas(catalogo, {"location": {"Cusco"}}) == (None, {})
+
+
+@pytest.mark.parametrize("palabras", [
+    ("prácticas", "práctica", "practicante"),
+    ("ingeniería", "ingeniero", "ingenieros"),
+    ("programación", "programador"),
+    ("analista", "analistas"),
+])
+def test_raiz_une_variantes(palabras):
+    assert len({raiz(t) for p in palabras for t in terminos(p)}) == 1
+
+
+@pytest.mark.parametrize("palabra, otra", [("excelencia", "excel"), ("calidad", "cal"), ("contable", "cont")])
+def test_raiz_no_recorta_sufijos_derivativos_a_raices_cortas(palabra, otra):
+    assert raiz(palabra) != raiz(otra)
+
+
+def test_terminos_sin_palabras_vacias():
+    assert terminos("Busco prácticas de Ingeniería en Lima") == ["practic", "ingenier", "lima"]
+
+
+@pytest.fixture
+def indice_bm25():
+    return IndiceBM25(JobCatalog([
+        {"id": "excel", "title": "Asistente administrativo", "description": "Manejo de Excel avanzado y tablas dinámicas"},
+        {"id": "calidad", "title": "Analista de calidad", "description": "Excelencia operativa y mejora continua"},
+        {"id": "datos", "title": "Practicante de datos", "description": "Prácticas en ingeniería de datos con Python"},
+        {"id": "ventas", "searchable_text": "Ejecutivo de ventas corporativas"},
+    ]))
+
+
+def test_bm25_con_tildes_y_raices(indice_bm25):
+    assert indice_bm25.buscar("practica ingenieria")[0][0] == "datos"
+    assert indice_bm25.buscar("VENTA")[0][0] == "ventas"
+
+
+def test_bm25_excel_no_trae_excelencia(indice_bm25):
+    assert [i for i, _ in indice_bm25.buscar("excel")] == ["excel"]
+
+
+def test_bm25_respeta_permitidos_y_k(indice_bm25):
+    assert indice_bm25.buscar("datos calidad", permitidos=["calidad"]) == indice_bm25.buscar("calidad")
+    assert len(indice_bm25.buscar("de datos calidad excel", k=2)) == 2
+    assert indice_bm25.buscar("inexistente") == []
+
+
+def test_fusion_rrf_premia_a_los_que_aparecen_en_ambas_listas():
+    fusion = fusion_rrf([["a", "b", "c"], ["b", "d"]], k=60)
+    assert [clave for clave, _ in fusion] == ["b", "a", "d", "c"]
+    assert fusion[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_fusion_rrf_de_una_lista_conserva_el_orden():
+    assert [clave for clave, _ in fusion_rrf([["x", "y", "z"]])] == ["x", "y", "z"]
+
+
+CHUNKS = [
+    ("a", {"chunk": 0}, 0.9),
+    ("b", {"chunk": 0}, 0.8),
+    ("a", {"chunk": 1}, 0.7),
+    ("b", {"chunk": 1}, 0.6),
+    ("c", {"chunk": 0}, 0.5),
+    ("", {"chunk": 0}, 0.99),
+    ("b", {"chunk": 2}, 0.4),
+]
+
+
+def test_agrupa_chunks_por_empleo_con_max():
+    agrupados = agrupar_por_empleo(CHUNKS, 5)
+    assert [(i, p) for i, _, p in agrupados] == [("a", 0.9), ("b", 0.8), ("c", 0.5)]
+    # Cada empleo conserva los metadatos de su primer chunk
+    assert agrupados[0][1] == {"chunk": 0}
+
+
+def test_agrupa_chunks_por_empleo_con_sum():
+    agrupados = agrupar_por_empleo(CHUNKS, 2, agregacion="sum")
+    assert [i for i, _, _ in agrupados] == ["b", "a"]
+    assert agrupados[0][2] == pytest.approx(1.8)
+
+
+def test_agrupar_devuelve_empleos_distintos_hasta_n():
+    assert [i for i, _, _ in agrupar_por_empleo(CHUNKS, 2)] == ["a", "b"]
+    with pytest.raises(ValueError):
+        agrupar_por_empleo(CHUNKS, 2, agregacion="media")
+
+
+def test_priorizar_faceta_suave_sube_sin_descartar(catalogo):
+    ranking = [(f"job-{i}", {}, 1.0 - i / 10) for i in range(4)]
+    priorizado = priorizar_facetas(catalogo, ranking, {"experience_level": {"Jefe"}})
+    assert [i for i, _, _ in priorizado] == ["job-3", "job-0", "job-1", "job-2"]
+    assert priorizar_facetas(catalogo, ranking, {}) is ranking
@@ -0,0 +1,63 @@
+import json
+
+from catalogo import JobCatalog, codificar_cursor, proyectar
+
+
+def test_busca_por_id_y_visual_id(catalogo):
+    assert catalogo.buscar("job-7")["visual_id"] == "V0007"
+    assert catalogo.buscar("V0007") is catalogo.buscar("job-7")
+    assert catalogo.buscar("no-existe") is None
+
+
+def test_duplicados_conservan_el_primero():
+    catalogo = JobCatalog([{"id": "a", "title": "primero"}, {"id": "a", "title": "segundo"}])
+    assert catalogo.buscar("a")["title"] == "primero"
+
+
+def test_filtro_sin_tildes_ni_mayusculas(catalogo):
+    remotos = catalogo.filtrar({"remote_type": "remoto"})
+    assert remotos and all(e["remote_type"] == "Remoto" for e in remotos)
+    assert catalogo.filtrar({"job_type": "PRACTICA"}) == catalogo.filtrar({"job_type": "práctica"})
+
+
+def test_filtro_con_varios_valores_es_o(catalogo):
+    empleos = catalogo.filtrar({"location": "Arequipa,Miraflores"})
+    assert {e["location"] for e in empleos} == {"Arequipa, Perú", "Miraflores, Lima, Perú"}
+
+
+def test_combinacion_de_filtros_es_y(catalogo):
+    empleos = catalogo.filtrar({"location": "arequipa", "remote_type": "hibrido", "majors": "informatica"})
+    esperados = [e for e in catalogo.empleos if e["location"] == "Arequipa, Perú" and e["remote_type"] == "Híbrido"
+                 and "PREGRADO/INGENIERÍA INFORMÁTICA" in e["majors"]]
+    assert empleos == esperados
+    assert empleos
+
+
+def test_filtros_vacios_o_desconocidos_no_filtran(catalogo):
+    assert catalogo.filtrar({"location": "", "salario": "alto"}) is catalogo.empleos
+
+
+def test_proyeccion_de_campos(catalogo):
+    empleo = catalogo.buscar("job-3")
+    assert proyectar(empleo, ["id", "title", "inexistente"]) == {"id": "job-3", "title": "Puesto 3"}
+    assert proyectar(empleo, []) is empleo
+
+
+def test_pagina_preserializada_equivale_a_serializar(catalogo):
+    pagina = catalogo.empleos[10:15]
+    cuerpo = json.loads(catalogo.cuerpo_pagina(pagina, 120, "cursor"))
+    assert cuerpo == {"results": pagina, "total": 120, "next_cursor": "cursor"}
+
+
+def test_primera_pagina_precomprimida(catalogo):
+    cuerpo = json.loads(catalogo.cuerpo_primera_pagina.variantes["identity"])
+    assert cuerpo["results"] == catalogo.empleos[:50]
+    assert cuerpo["total"] == 120
+    assert cuerpo["next_cursor"] == codificar_cursor(catalogo.huella[:16], 50)
+
+
+def test_detalle_precomprimido_compartido_por_id_y_visual_id(catalogo):
+    assert catalogo.cuerpo_detalle("job-5") is catalogo.cuerpo_detalle("V0005")
+    assert json.loads(catalogo.cuerpo_detalle("job-5").variantes["identity"]) == {
+        "job": catalogo.buscar("job-5"), "found": True}
+    assert catalogo.cuerpo_detalle("nada") is None
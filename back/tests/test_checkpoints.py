@@ -0,0 +1,41 @@
+from checkpoints import Checkpoint
+
+
+def test_agrega_y_lee_registros(tmp_path):
+    checkpoint = Checkpoint("detalles", str(tmp_path))
+    checkpoint.agregar({"job_id": "a"})
+    checkpoint.agregar({"job_id": "b"})
+    checkpoint.cerrar()
+    assert Checkpoint("detalles", str(tmp_path)).leer() == [{"job_id": "a"}, {"job_id": "b"}]
+
+
+def test_retomar_tras_escritura_cortada_no_pierde_el_registro_nuevo(tmp_path):
+    ruta = tmp_path / "detalles.jsonl"
+    # Caída a mitad del segundo registro: la última línea quedó sin terminar
+    ruta.write_text('{"job_id": "a"}\n{"job_id": "b", "tit', encoding="utf-8")
+
+    checkpoint = Checkpoint("detalles", str(tmp_path))
+    assert checkpoint.leer() == [{"job_id": "a"}]
+    checkpoint.agregar({"job_id": "c"})
+    checkpoint.cerrar()
+
+    assert Checkpoint("detalles", str(tmp_path)).leer() == [{"job_id": "a"}, {"job_id": "c"}]
+    assert ruta.read_text(encoding="utf-8") == '{"job_id": "a"}\n{"job_id": "c"}\n'
+
+
+def test_retomar_con_un_unico_registro_cortado(tmp_path):
+    (tmp_path / "listado.jsonl").write_text('{"pagina": 1, "mod', encoding="utf-8")
+    checkpoint = Checkpoint("listado", str(tmp_path))
+    checkpoint.agregar({"pagina": 2})
+    checkpoint.cerrar()
+    assert checkpoint.leer() == [{"pagina": 2}]
+
+
+def test_reiniciar_y_borrar(tmp_path):
+    checkpoint = Checkpoint("detalles", str(tmp_path))
+    checkpoint.agregar({"job_id": "a"})
+    checkpoint.reiniciar()
+    assert checkpoint.leer() == []
+    checkpoint.agregar({"job_id": "b"})
+    checkpoint.borrar()
+    assert checkpoint.leer() == []
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from estado_scraping import EstadoScraping
+from listado_http import guardar_listado, listado_guardado_completo, ruta_marca_listado
+
+
+def empleo(job_id: str, titulo: str = "Analista", **extra) -> dict:
+    return {"job_id": job_id, "job_title": titulo, "postdate": "2026-01-01", **extra}
+
+
+def detalle(job_id: str) -> dict:
+    return {"job_id": job_id, "job_desc": f"Detalle de {job_id}"}
+
+
+@pytest.fixture
+def estado(tmp_path):
+    estado = EstadoScraping(str(tmp_path / "estado.sqlite3"))
+    yield estado
+    estado.cerrar()
+
+
+def test_primera_corrida_todo_es_nuevo_y_pendiente(estado):
+    cambios = estado.registrar_listado([empleo("a"), empleo("b"), empleo("a")])
+    # Un job_id repetido en el listado cuenta una sola vez
+    assert cambios["nuevos"] == ["a", "b"]
+    assert cambios["expirados"] == []
+    assert estado.pendientes() == ["a", "b"]
+
+
+def test_segunda_corrida_solo_pide_nuevos_y_cambiados(estado):
+    estado.registrar_listado([empleo("a"), empleo("b"), empleo("c")])
+    estado.guardar_detalles([detalle("a"), detalle("b"), detalle("c")])
+    assert estado.pendientes() == []
+
+    cambios = estado.registrar_listado([empleo("d"), empleo("a"), empleo("b", titulo="Analista Senior"), empleo("c")])
+    assert cambios["nuevos"] == ["d"]
+    assert cambios["cambiados"] == ["b"]
+    assert cambios["sin_cambios"] == 2
+    # En el orden del listado nuevo
+    assert estado.pendientes() == ["d", "b"]
+
+
+def test_listado_completo_expira_los_ausentes(estado):
+    estado.registrar_listado([empleo("a"), empleo("b")])
+    estado.guardar_detalles([detalle("a"), detalle("b")])
+
+    cambios = estado.registrar_listado([empleo("a")], completo=True)
+    assert cambios["expirados"] == ["b"]
+    assert estado.detalles_vigentes() == [detalle("a")]
+    assert estado.resumen() == {"vigentes": 1, "expirados": 1, "sin_detalle": 0}
+
+
+def test_listado_incompleto_no_expira_nada(estado):
+    estado.registrar_listado([empleo("a"), empleo("b")])
+    cambios = estado.registrar_listado([empleo("a")], completo=False)
+    assert cambios["expirados"] == []
+    assert estado.resumen()["expirados"] == 0
+
+
+def test_un_expirado_que_reaparece_vuelve_a_estar_vigente(estado):
+    estado.registrar_listado([empleo("a"), empleo("b")])
+    estado.guardar_detalles([detalle("a"), detalle("b")])
+    estado.registrar_listado([empleo("a")])
+
+    cambios = estado.registrar_listado([empleo("b"), empleo("a")])
+    assert cambios["reaparecidos"] == ["b"]
+    assert cambios["sin_cambios"] == 2
+    # Su detalle sigue al día: no hay que volver a pedirlo
+    assert estado.pendientes() == []
+    assert estado.detalles_vigentes() == [detalle("b"), detalle("a")]
+
+
+def test_el_estado_persiste_entre_corridas(tmp_path):
+    ruta = str(tmp_path / "estado.sqlite3")
+    estado = EstadoScraping(ruta)
+    estado.registrar_listado([empleo("a"), empleo("b")])
+    estado.guardar_detalles([detalle("a")])
+    estado.cerrar()
+
+    estado = EstadoScraping(ruta)
+    assert estado.pendientes() == ["b"]
+    estado.cerrar()
+
+
+def test_marca_de_listado_completo(tmp_path):
+    ruta = str(tmp_path / "jobs_raw.json")
+    empleos = [empleo("a"), empleo("b")]
+
+    # Un jobs_raw.json sin marca (de una versión anterior) se trata como incompleto
+    (tmp_path / "jobs_raw.json").write_text(json.dumps(empleos), encoding="utf-8")
+    assert not listado_guardado_completo(empleos, ruta)
+
+    guardar_listado(empleos, True, ruta)
+    assert ruta_marca_listado(ruta) == str(tmp_path / "jobs_raw.estado.json")
+    assert json.loads((tmp_path / "jobs_raw.json").read_text(encoding="utf-8")) == empleos
+    assert listado_guardado_completo(empleos, ruta)
+    # La marca no corresponde si el archivo cambió después
+    assert not listado_guardado_completo(empleos[:1], ruta)
+
+    guardar_listado(empleos, False, ruta)
+    assert not listado_guardado_completo(empleos, ruta)
+    guardar_listado([], True, ruta)
+    assert not listado_guardado_completo([], ruta)
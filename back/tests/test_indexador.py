@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import indexador
+from indexador import PipelineEmbeddings
+
+
+class EmbeddingsLocales:
+    def __init__(self):
+        self.llamadas = 0
+
+    def embed_documents(self, textos):
+        self.llamadas += 1
+        return [[float(len(t))] for t in textos]
+
+
+@pytest.fixture
+def pools_creados(monkeypatch):
+    """Sustituye el pool de procesos por uno de hilos y registra cuántos se crean"""
+    creados = []
+
+    class PoolDeHilos(ThreadPoolExecutor):
+        def __init__(self, max_workers, mp_context, initializer, initargs):
+            super().__init__(max_workers=max_workers)
+            creados.append(self)
+
+    monkeypatch.setattr(indexador, "ProcessPoolExecutor", PoolDeHilos)
+    monkeypatch.setattr(indexador, "_embeber_en_proceso", lambda textos: [[-float(len(t))] for t in textos])
+    return creados
+
+
+def lotes(cantidad):
+    return [[f"texto {i}", "x" * i] for i in range(cantidad)]
+
+
+def test_delta_chico_se_embebe_sin_pool(pools_creados):
+    embeddings = EmbeddingsLocales()
+    pipeline = PipelineEmbeddings(embeddings, procesos=2, min_lotes_pool=4)
+    assert list(pipeline.embeber(lotes(3))) == [[[7.0], [0.0]], [[7.0], [1.0]], [[7.0], [2.0]]]
+    assert embeddings.llamadas == 3
+    assert pools_creados == []
+
+
+def test_pool_se_reutiliza_entre_sincronizaciones(pools_creados):
+    embeddings = EmbeddingsLocales()
+    pipeline = PipelineEmbeddings(embeddings, procesos=2, min_lotes_pool=4)
+    for _ in range(3):
+        resultado = list(pipeline.embeber(lotes(10)))
+        # En orden, aunque se repartan entre varios procesos
+        assert resultado == [[[-7.0], [-float(i)]] for i in range(10)]
+    assert len(pools_creados) == 1
+    assert embeddings.llamadas == 0
+
+    pipeline.cerrar()
+    list(pipeline.embeber(lotes(10)))
+    assert len(pools_creados) == 2
+    pipeline.cerrar()
@@ -0,0 +1,203 @@
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from benchmark_indices import generar_consultas, generar_sintetico
+import indice_vectorial
+from indice_vectorial import (ARCHIVO_INT8, IndiceHNSW, IndiceIVF, IndicePlano, abrir_indice_local, asegurar_cuantizado,
+                              eliminar_indices_planos_antiguos, guardar_hnsw, guardar_indice_plano, guardar_ivf, mejores_k)
+from texto import tokenizar
+
+DIMENSION = 64
+
+
+class EmbeddingsFalsos:
+    """Bolsa de palabras con hashing: textos con palabras en común quedan cerca"""
+
+    def embed_query(self, texto):
+        vector = np.zeros(DIMENSION, dtype=np.float32)
+        for token in tokenizar(texto):
+            vector[int(hashlib.md5(token.encode()).hexdigest(), 16) % DIMENSION] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, textos):
+        return [self.embed_query(t) for t in textos]
+
+
+class PipelineFalso:
+    tamano_lote = 8
+
+    def __init__(self):
+        self.embeddings = EmbeddingsFalsos()
+
+    def embeber(self, lotes):
+        for textos in lotes:
+            yield self.embeddings.embed_documents(textos)
+
+
+@pytest.fixture
+def matriz_sintetica(tmp_path):
+    """Directorio con 2000 vectores sintéticos agrupados, siempre los mismos"""
+    directorio = str(tmp_path / "sintetico")
+    (tmp_path / "sintetico").mkdir()
+    generar_sintetico(directorio, 2000, dimension=32, grupos=40)
+    return directorio
+
+
+def top_k_exacto(vectores, consultas, k):
+    return [set(np.argsort(-(np.asarray(vectores) @ c))[:k].tolist()) for c in consultas]
+
+
+def recall(indice, consultas, exactos, k):
+    aciertos = sum(len(set(indice.buscar_vector(c, k)[0].tolist()) & e) for c, e in zip(consultas, exactos))
+    return aciertos / (k * len(consultas))
+
+
+def test_mejores_k_ordenado():
+    puntajes = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert mejores_k(puntajes, 2).tolist() == [1, 3]
+    assert mejores_k(puntajes, 10).tolist() == [1, 3, 2, 0]
+    assert len(mejores_k(puntajes, 0)) == 0
+
+
+def test_indice_plano_desde_empleos(tmp_path, catalogo):
+    directorio = str(tmp_path / "empleos_v1")
+    empleos = catalogo.empleos[:30]
+    chunks = guardar_indice_plano(directorio, empleos, PipelineFalso())
+    indice = IndicePlano.abrir(directorio, EmbeddingsFalsos())
+    assert len(indice) == chunks
+    assert np.allclose(np.linalg.norm(indice.vectores, axis=1), 1.0, atol=1e-5)
+
+    resultados = indice.buscar("Puesto 17 Empresa 3", k=3)
+    assert resultados[0][0]["id"] == "job-17"
+    assert [p for _, p in resultados] == sorted((p for _, p in resultados), reverse=True)
+
+    permitidos = indice.buscar("Puesto 17 Empresa 3", k=5, permitidos=["job-4", "job-9"])
+    assert {m["id"] for m, _ in permitidos} <= {"job-4", "job-9"}
+    assert indice.buscar("Puesto 17", k=3, permitidos=["no-existe"]) == []
+    assert indice.buscar("Puesto 17", k=0) == []
+
+
+def test_indice_plano_es_exacto(matriz_sintetica):
+    indice = IndicePlano.abrir(matriz_sintetica, None, precision="float32")
+    consultas = generar_consultas(indice.vectores, 50)
+    assert recall(indice, consultas, top_k_exacto(indice.vectores, consultas, 10), 10) == 1.0
+
+
+def test_indice_plano_filtrado_por_filas(matriz_sintetica):
+    indice = IndicePlano.abrir(matriz_sintetica, None, precision="float32")
+    consulta = generar_consultas(indice.vectores, 1)[0]
+    filas = np.arange(0, 2000, 7)
+    mejores, _ = indice.buscar_vector(consulta, 5, filas)
+    esperadas = filas[np.argsort(-(np.asarray(indice.vectores)[filas] @ consulta))[:5]]
+    assert mejores.tolist() == esperadas.tolist()
+
+
+def test_ivf_recall_contra_busqueda_exacta(matriz_sintetica):
+    assert guardar_ivf(matriz_sintetica, listas=16) == 16
+    consultas = generar_consultas(IndicePlano.abrir(matriz_sintetica, None, precision="float32").vectores, 50)
+    completo = IndiceIVF.abrir(matriz_sintetica, None, nprobe=16, precision="float32")
+    exactos = top_k_exacto(completo.vectores, consultas, 10)
+    # Revisando todas las listas IVF es exacto; con pocas listas el recall baja pero sigue alto
+    assert recall(completo, consultas, exactos, 10) == 1.0
+    assert recall(IndiceIVF.abrir(matriz_sintetica, None, nprobe=4, precision="float32"), consultas, exactos, 10) >= 0.9
+    assert recall(IndiceIVF.abrir(matriz_sintetica, None, nprobe=1, precision="float32"), consultas, exactos, 10) < 1.0
+
+
+def test_ivf_con_filas_permitidas_es_exacto(matriz_sintetica):
+    guardar_ivf(matriz_sintetica, listas=16)
+    indice = IndiceIVF.abrir(matriz_sintetica, None, nprobe=1, precision="float32")
+    consulta = generar_consultas(indice.vectores, 1)[0]
+    filas = np.arange(1, 2000, 5)
+    esperadas = filas[np.argsort(-(np.asarray(indice.vectores)[filas] @ consulta))[:5]]
+    assert indice.buscar_vector(consulta, 5, filas)[0].tolist() == esperadas.tolist()
+
+
+def test_hnsw_recall_contra_busqueda_exacta(matriz_sintetica):
+    pytest.importorskip("hnswlib")
+    guardar_hnsw(matriz_sintetica, m=16, ef_construccion=100)
+    indice = IndiceHNSW.abrir(matriz_sintetica, None, ef=64, precision="float32")
+    consultas = generar_consultas(indice.vectores, 50)
+    assert recall(indice, consultas, top_k_exacto(indice.vectores, consultas, 10), 10) >= 0.95
+    filas, puntajes = indice.buscar_vector(consultas[0], 10)
+    # Los puntajes son productos punto, igual que en el índice plano
+    assert np.allclose(puntajes, np.asarray(indice.vectores)[filas] @ consultas[0], atol=1e-4)
+
+
+@pytest.mark.parametrize("tipo, clase", [("plano", IndicePlano), ("ivf", IndiceIVF), ("hnsw", IndiceHNSW)])
+def test_abrir_indice_local_genera_lo_que_falta(matriz_sintetica, tipo, clase):
+    if tipo == "hnsw":
+        pytest.importorskip("hnswlib")
+    indice = abrir_indice_local(matriz_sintetica, tipo, None)
+    assert type(indice) is clase
+    consulta = generar_consultas(indice.vectores, 1)[0]
+    assert len(indice.buscar_vector(consulta, 10)[0]) == 10
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_cuantizado_con_rerank_recupera_el_top_k_exacto(matriz_sintetica, precision):
+    asegurar_cuantizado(matriz_sintetica, precision)
+    exacto = IndicePlano.abrir(matriz_sintetica, None, precision="float32")
+    consultas = generar_consultas(exacto.vectores, 50)
+    exactos = top_k_exacto(exacto.vectores, consultas, 10)
+
+    sin_rerank = IndicePlano.abrir(matriz_sintetica, None, precision=precision, rerank=0)
+    con_rerank = IndicePlano.abrir(matriz_sintetica, None, precision=precision, rerank=4)
+    assert sin_rerank.matriz_busqueda.dtype == np.dtype(precision)
+    assert recall(sin_rerank, consultas, exactos, 10) >= 0.9
+    assert recall(con_rerank, consultas, exactos, 10) >= 0.99
+    # Con re-ranking los puntajes son los float32 exactos
+    filas, puntajes = con_rerank.buscar_vector(consultas[0], 10)
+    assert np.allclose(puntajes, np.asarray(exacto.vectores)[filas] @ consultas[0], atol=1e-6)
+
+
+def test_int8_ocupa_la_cuarta_parte(matriz_sintetica):
+    asegurar_cuantizado(matriz_sintetica, "int8")
+    indice = IndicePlano.abrir(matriz_sintetica, None, precision="int8")
+    assert indice.matriz_busqueda.nbytes * 4 == indice.vectores.nbytes
+    assert indice.escalas.shape == (2000,)
+
+
+def test_precision_y_rerank_se_leen_al_abrir(matriz_sintetica, monkeypatch):
+    asegurar_cuantizado(matriz_sintetica, "int8")
+    assert IndicePlano.abrir(matriz_sintetica, None).cuantizados is None
+    monkeypatch.setenv("INDICE_PRECISION", "int8")
+    monkeypatch.setenv("INDICE_RERANK", "2")
+    indice = IndicePlano.abrir(matriz_sintetica, None)
+    assert indice.matriz_busqueda.dtype == np.int8
+    assert indice.rerank == 2
+
+
+def test_abrir_indice_local_genera_la_matriz_cuantizada(matriz_sintetica, monkeypatch):
+    monkeypatch.setenv("INDICE_PRECISION", "int8")
+    indice = abrir_indice_local(matriz_sintetica, "ivf", None)
+    assert os.path.exists(os.path.join(matriz_sintetica, ARCHIVO_INT8))
+    assert indice.matriz_busqueda.dtype == np.int8
+    monkeypatch.setenv("INDICE_PRECISION", "float8")
+    with pytest.raises(ValueError):
+        abrir_indice_local(matriz_sintetica, "plano", None)
+
+
+def test_eliminar_indices_antiguos_reintenta_los_que_estan_en_uso(tmp_path, monkeypatch):
+    for nombre in ("empleos_v1", "empleos_v2", "empleos_v3", "otro"):
+        (tmp_path / nombre).mkdir()
+        (tmp_path / nombre / "vectores.npy").write_bytes(b"")
+    rmtree = shutil.rmtree
+
+    def rmtree_con_archivo_mapeado(ruta, *args, **kwargs):
+        # Como en Windows con un worker que todavía tiene la versión abierta
+        if ruta.endswith("empleos_v1"):
+            raise PermissionError(32, "El archivo está siendo utilizado por otro proceso", ruta)
+        return rmtree(ruta, *args, **kwargs)
+
+    monkeypatch.setattr(indice_vectorial.shutil, "rmtree", rmtree_con_archivo_mapeado)
+    assert eliminar_indices_planos_antiguos(str(tmp_path), {"empleos_v3"}) == ["empleos_v1"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["empleos_v1", "empleos_v3", "otro"]
+
+    # Cuando el worker suelta la versión, la siguiente llamada la borra
+    monkeypatch.setattr(indice_vectorial.shutil, "rmtree", rmtree)
+    assert eliminar_indices_planos_antiguos(str(tmp_path), {"empleos_v3"}) == []
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["empleos_v3", "otro"]
@@ -0,0 +1,209 @@
+import asyncio
+
+import pytest
+
+from proveedores import CircuitoAbiertoError, RouterProveedores, SaludProveedor, SinProveedoresError
+
+
+class ProveedorFalso:
+    """Proveedor asíncrono que tarda `demora` segundos y responde o falla según `fallar`"""
+
+    def __init__(self, nombre: str, demora: float = 0.0, fallar: bool = False, fragmentos=("hola", " mundo"),
+                 fallar_tras=None):
+        self.nombre = nombre
+        self.modelo = f"modelo-{nombre}"
+        self.disponible = True
+        self.demora = demora
+        self.fallar = fallar
+        self.fragmentos = fragmentos
+        self.fallar_tras = fallar_tras
+        self.llamadas = 0
+        self.canceladas = 0
+
+    async def generar(self, prompt: str) -> str:
+        self.llamadas += 1
+        try:
+            await asyncio.sleep(self.demora)
+        except asyncio.CancelledError:
+            self.canceladas += 1
+            raise
+        if self.fallar:
+            raise RuntimeError(f"fallo de {self.nombre}")
+        return f"respuesta de {self.nombre}"
+
+    async def generar_stream(self, prompt: str):
+        self.llamadas += 1
+        await asyncio.sleep(self.demora)
+        if self.fallar:
+            raise RuntimeError(f"fallo de {self.nombre}")
+        for i, fragmento in enumerate(self.fragmentos):
+            if self.fallar_tras is not None and i >= self.fallar_tras:
+                raise RuntimeError(f"corte de {self.nombre}")
+            yield fragmento
+
+
+def crear_router(*proveedores, retardo_hedge="", umbral_fallos: int = 3, enfriamiento: float = 30):
+    router = RouterProveedores(proveedores, retardo_hedge=retardo_hedge)
+    router.salud = {p.nombre: SaludProveedor(umbral_fallos=umbral_fallos, enfriamiento=enfriamiento)
+                    for p in proveedores}
+    return router
+
+
+async def consumir(router, prompt: str = "hola"):
+    return [(proveedor.nombre, fragmento) async for proveedor, fragmento in router.generar_stream(prompt)]
+
+
+def test_usa_el_primer_proveedor_si_responde():
+    a, b = ProveedorFalso("a"), ProveedorFalso("b")
+    respuesta, proveedor = asyncio.run(crear_router(a, b).generar("hola"))
+    assert (respuesta, proveedor) == ("respuesta de a", a)
+    assert b.llamadas == 0
+
+
+def test_pasa_al_siguiente_si_el_primero_falla():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b)
+    respuesta, proveedor = asyncio.run(router.generar("hola"))
+    assert proveedor is b
+    assert router.salud["a"].fallos_seguidos == 1
+    assert router.salud["b"].fallos_seguidos == 0
+
+
+def test_propaga_el_ultimo_error_si_todos_fallan():
+    router = crear_router(ProveedorFalso("a", fallar=True), ProveedorFalso("b", fallar=True))
+    with pytest.raises(RuntimeError, match="fallo de b"):
+        asyncio.run(router.generar("hola"))
+
+
+def test_sin_proveedores_disponibles():
+    a = ProveedorFalso("a")
+    a.disponible = False
+    router = crear_router(a)
+    assert not router.disponible
+    with pytest.raises(SinProveedoresError):
+        asyncio.run(router.generar("hola"))
+
+
+def test_hedging_gana_el_respaldo_si_el_principal_tarda():
+    a, b = ProveedorFalso("a", demora=1.0), ProveedorFalso("b", demora=0.01)
+    router = crear_router(a, b, retardo_hedge="0.05")
+    respuesta, proveedor = asyncio.run(router.generar("hola"))
+    assert proveedor is b
+    assert a.canceladas == 1
+    # Perder la carrera no cuenta como error del principal
+    assert router.salud["a"].fallos_seguidos == 0
+    assert not router.salud["a"].resultados
+
+
+def test_hedging_no_lanza_respaldo_si_el_principal_es_rapido():
+    a, b = ProveedorFalso("a", demora=0.01), ProveedorFalso("b")
+    respuesta, proveedor = asyncio.run(crear_router(a, b, retardo_hedge="0.5").generar("hola"))
+    assert proveedor is a
+    assert b.llamadas == 0
+
+
+def test_hedging_arranca_el_respaldo_si_el_principal_falla_antes_del_retardo():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    respuesta, proveedor = asyncio.run(crear_router(a, b, retardo_hedge="5").generar("hola"))
+    assert proveedor is b
+
+
+def test_hedging_auto_sin_historial_no_lanza_respaldo():
+    a, b = ProveedorFalso("a", demora=0.05), ProveedorFalso("b")
+    respuesta, proveedor = asyncio.run(crear_router(a, b, retardo_hedge="auto").generar("hola"))
+    assert proveedor is a
+    assert b.llamadas == 0
+
+
+def test_circuito_se_abre_tras_fallos_seguidos():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b, umbral_fallos=2)
+
+    async def varias():
+        for _ in range(4):
+            await router.generar("hola")
+
+    asyncio.run(varias())
+    # Tras dos fallos el proveedor se salta sin llamarlo
+    assert a.llamadas == 2
+    assert router.salud["a"].estado == "abierto"
+    assert router.estadisticas()["a"]["circuito"] == "abierto"
+    assert b.llamadas == 4
+
+
+def test_circuito_semiabierto_deja_pasar_una_sola_prueba():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b, umbral_fallos=1, enfriamiento=0.05)
+
+    async def escenario():
+        await router.generar("hola")
+        await asyncio.sleep(0.06)
+        assert router.salud["a"].estado == "semiabierto"
+        a.fallar, a.demora = False, 0.05
+        resultados = await asyncio.gather(*(router.generar("hola") for _ in range(3)))
+        return [proveedor.nombre for _, proveedor in resultados]
+
+    nombres = asyncio.run(escenario())
+    # Solo una de las tres llamadas concurrentes prueba el proveedor; las demás van al respaldo
+    assert a.llamadas == 2
+    assert sorted(nombres) == ["a", "b", "b"]
+    assert router.salud["a"].estado == "cerrado"
+
+
+def test_prueba_fallida_vuelve_a_abrir_el_circuito():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b, umbral_fallos=1, enfriamiento=0.05)
+
+    async def escenario():
+        await router.generar("hola")
+        await asyncio.sleep(0.06)
+        await router.generar("hola")
+        await router.generar("hola")
+
+    asyncio.run(escenario())
+    assert a.llamadas == 2
+    assert router.salud["a"].estado == "abierto"
+
+
+def test_prueba_cancelada_libera_el_paso():
+    salud = SaludProveedor(umbral_fallos=1, enfriamiento=0)
+    salud.registrar_error()
+    assert salud.reservar() is True
+    assert salud.reservar() is None
+    salud.liberar_prueba()
+    assert salud.reservar() is True
+
+
+def test_todos_los_circuitos_abiertos():
+    a = ProveedorFalso("a", fallar=True)
+    router = crear_router(a, ProveedorFalso("b", fallar=True), umbral_fallos=1)
+    with pytest.raises(RuntimeError):
+        asyncio.run(router.generar("hola"))
+    with pytest.raises(SinProveedoresError):
+        asyncio.run(router.generar("hola"))
+    with pytest.raises(CircuitoAbiertoError):
+        asyncio.run(router._llamar(a, "hola"))
+
+
+def test_stream_pasa_al_siguiente_antes_del_primer_fragmento():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b)
+    assert asyncio.run(consumir(router)) == [("b", "hola"), ("b", " mundo")]
+    assert router.salud["a"].fallos_seguidos == 1
+
+
+def test_stream_no_cambia_de_proveedor_tras_emitir():
+    a, b = ProveedorFalso("a", fallar_tras=1), ProveedorFalso("b")
+    router = crear_router(a, b)
+    with pytest.raises(RuntimeError, match="corte de a"):
+        asyncio.run(consumir(router))
+    assert b.llamadas == 0
+
+
+def test_stream_salta_proveedor_con_circuito_abierto():
+    a, b = ProveedorFalso("a", fallar=True), ProveedorFalso("b")
+    router = crear_router(a, b, umbral_fallos=1)
+    asyncio.run(consumir(router))
+    asyncio.run(consumir(router))
+    assert a.llamadas == 1
+    assert b.llamadas == 2
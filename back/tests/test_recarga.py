@@ -0,0 +1,53 @@
+import json
+import threading
+import time
+
+from recarga import Recargador
+
+
+def escribir(ruta, ids):
+    ruta.write_text(json.dumps([{"id": i} for i in ids]), encoding="utf-8")
+
+
+def esperar(condicion, timeout: float = 5.0):
+    limite = time.monotonic() + timeout
+    while not condicion() and time.monotonic() < limite:
+        time.sleep(0.02)
+    return condicion()
+
+
+def test_calentamiento_lento_no_pisa_una_version_mas_nueva(tmp_path):
+    ruta = tmp_path / "empleos.json"
+    escribir(ruta, ["1"])
+
+    def construir(catalogo):
+        time.sleep(0.3 if len(catalogo) == 1 else 0.01)
+        return f"indice-{len(catalogo)}"
+
+    recargador = Recargador(construir, str(ruta))
+    recargador.cargar_catalogo()
+    calentamiento = threading.Thread(target=recargador.cargar_inicial)
+    calentamiento.start()
+    time.sleep(0.05)
+    escribir(ruta, ["1", "2"])
+    # La recarga no arranca mientras se calienta, pero el cambio se publica al terminar
+    assert recargador.recargar() is False
+    calentamiento.join()
+    assert esperar(lambda: recargador.actual.vectorstore == "indice-2")
+    assert len(recargador.actual.catalogo) == 2
+
+
+def test_sin_indice_la_recarga_publica_solo_el_catalogo(tmp_path):
+    ruta = tmp_path / "empleos.json"
+    escribir(ruta, ["1"])
+
+    def construir(catalogo):
+        raise RuntimeError("sin modelo")
+
+    recargador = Recargador(construir, str(ruta))
+    recargador.cargar_catalogo()
+    escribir(ruta, ["1", "2"])
+    assert recargador.recargar(forzar=True)
+    assert esperar(lambda: len(recargador.actual.catalogo) == 2 and not recargador.recargando)
+    assert recargador.actual.vectorstore is None
+    assert recargador.ultimo_error == "sin modelo"
@@ -0,0 +1,173 @@
+import asyncio
+import types
+
+import httpx
+import pytest
+
+import detalles_http
+from detalles_http import ErrorDescarga, LimitadorTasa, con_reintentos, espera_backoff, leer_retry_after, pedir_json
+
+
+class RelojFalso:
+    """Reloj que solo avanza cuando el código duerme"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+        self.esperas = []
+
+    def monotonic(self):
+        return self.ahora
+
+    def perf_counter(self):
+        return self.ahora
+
+    async def sleep(self, segundos):
+        self.esperas.append(segundos)
+        self.ahora += segundos
+        await asyncio.sleep(0)
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = RelojFalso()
+    monkeypatch.setattr(detalles_http, "time", reloj)
+    monkeypatch.setattr(detalles_http, "asyncio", types.SimpleNamespace(sleep=reloj.sleep, Lock=asyncio.Lock))
+    return reloj
+
+
+def cliente_falso(respuestas):
+    """Cliente httpx que devuelve las respuestas en orden; la última se repite"""
+    pedidas = []
+
+    def responder(peticion):
+        pedidas.append(peticion)
+        return respuestas[min(len(pedidas), len(respuestas)) - 1]
+
+    cliente = httpx.AsyncClient(base_url="http://api.prueba", transport=httpx.MockTransport(responder))
+    return cliente, pedidas
+
+
+async def pedir_con_reintentos(respuestas, reintentos: int = 3):
+    cliente, pedidas = cliente_falso(respuestas)
+    contador = {"reintentos": 0}
+    async with cliente:
+        resultado = await con_reintentos(lambda: pedir_json(cliente, "/api/v3/jobs/1"), asyncio.Semaphore(1),
+                                         LimitadorTasa(0), reintentos, "prueba", contador)
+    return resultado, contador, pedidas
+
+
+def test_backoff_con_jitter_completo(monkeypatch):
+    limites = []
+    monkeypatch.setattr(detalles_http.random, "uniform", lambda a, b: limites.append((a, b)) or b)
+    for intento in range(5):
+        espera_backoff(intento, base=0.5, maximo=4)
+    # Aleatorio entre 0 y base * 2^intento, acotado por el máximo
+    assert limites == [(0, 0.5), (0, 1.0), (0, 2.0), (0, 4), (0, 4)]
+
+
+def test_backoff_es_aleatorio_dentro_del_rango():
+    esperas = [espera_backoff(3, base=1, maximo=30) for _ in range(200)]
+    assert all(0 <= espera <= 8 for espera in esperas)
+    assert len(set(esperas)) > 1
+
+
+def test_leer_retry_after():
+    assert leer_retry_after(httpx.Response(429, headers={"Retry-After": "2.5"})) == 2.5
+    assert leer_retry_after(httpx.Response(429)) is None
+    # La forma con fecha HTTP no se interpreta: se usa el backoff
+    assert leer_retry_after(httpx.Response(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) is None
+
+
+def test_limitador_respeta_rafaga_y_tasa(reloj):
+    limitador = LimitadorTasa(tasa=10, rafaga=5)
+
+    async def adquirir(n):
+        for _ in range(n):
+            await limitador.adquirir()
+
+    asyncio.run(adquirir(5))
+    # La ráfaga sale sin esperar
+    assert reloj.esperas == []
+    asyncio.run(adquirir(20))
+    # Las 20 siguientes salen a 10 por segundo
+    assert reloj.ahora - 1000.0 == pytest.approx(2.0)
+    assert all(espera == pytest.approx(0.1) for espera in reloj.esperas)
+
+
+def test_limitador_recupera_fichas_con_el_tiempo(reloj):
+    limitador = LimitadorTasa(tasa=10, rafaga=5)
+
+    async def escenario():
+        for _ in range(5):
+            await limitador.adquirir()
+        reloj.ahora += 0.3
+        for _ in range(3):
+            await limitador.adquirir()
+
+    asyncio.run(escenario())
+    # En 0,3 s se recuperaron 3 fichas
+    assert sum(reloj.esperas) == pytest.approx(0, abs=1e-9)
+
+
+def test_limitador_sin_tasa_no_espera(reloj):
+    limitador = LimitadorTasa(tasa=0)
+
+    async def adquirir():
+        for _ in range(100):
+            await limitador.adquirir()
+
+    asyncio.run(adquirir())
+    assert reloj.esperas == []
+
+
+def test_429_con_retry_after_y_luego_200(reloj, monkeypatch):
+    monkeypatch.setattr(detalles_http, "espera_backoff", lambda intento: 0.5)
+    respuestas = [httpx.Response(429, headers={"Retry-After": "3"}), httpx.Response(200, json={"job_id": "1"})]
+    (detalle, fallo), contador, pedidas = asyncio.run(pedir_con_reintentos(respuestas))
+    assert detalle == {"job_id": "1"}
+    assert fallo is None
+    assert len(pedidas) == 2
+    assert contador["reintentos"] == 1
+    # Retry-After manda si es mayor que el backoff
+    assert reloj.esperas == [3.0]
+
+
+def test_backoff_gana_si_retry_after_es_menor(reloj, monkeypatch):
+    monkeypatch.setattr(detalles_http, "espera_backoff", lambda intento: 4.0)
+    respuestas = [httpx.Response(503, headers={"Retry-After": "1"}), httpx.Response(200, json={})]
+    (detalle, fallo), _, _ = asyncio.run(pedir_con_reintentos(respuestas))
+    assert fallo is None
+    assert reloj.esperas == [4.0]
+
+
+def test_reporte_del_fallo_final(reloj):
+    (detalle, fallo), contador, pedidas = asyncio.run(pedir_con_reintentos([httpx.Response(503)], reintentos=3))
+    assert detalle is None
+    assert fallo == {"motivo": "servidor", "estado": 503, "intentos": 4, "error": "HTTP 503"}
+    assert len(pedidas) == 4
+    assert contador["reintentos"] == 3
+    assert len(reloj.esperas) == 3
+
+
+@pytest.mark.parametrize("respuesta, motivo", [
+    (httpx.Response(404), "cliente"),
+    (httpx.Response(302, headers={"Location": "/login"}), "sesion"),
+    (httpx.Response(200, text="<html>"), "json"),
+])
+def test_errores_no_reintentables(reloj, respuesta, motivo):
+    (detalle, fallo), contador, pedidas = asyncio.run(pedir_con_reintentos([respuesta]))
+    assert fallo["motivo"] == motivo
+    assert fallo["intentos"] == 1
+    assert len(pedidas) == 1
+    assert reloj.esperas == []
+
+
+def test_error_de_red_es_reintentable():
+    async def pedir():
+        raise httpx.ConnectError("sin conexión")
+
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(lambda peticion: pedir()))
+    with pytest.raises(ErrorDescarga) as error:
+        asyncio.run(pedir_json(cliente, "http://api.prueba/x"))
+    assert error.value.motivo == "red"
+    assert error.value.reintentable
@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+import pytest
+
+import detalles_http
+from api_simulada import crear_servidor, detalle_simulado, id_simulado
+from checkpoints import Checkpoint
+from detalles_http import obtener_detalles
+from listado_http import obtener_listado
+
+
+@pytest.fixture
+def api_simulada():
+    """Arranca la API simulada en un puerto libre y devuelve una función para crearla con opciones"""
+    servidores = []
+
+    def arrancar(**opciones):
+        servidor = crear_servidor(puerto=0, **opciones)
+        threading.Thread(target=servidor.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servidores.append(servidor)
+        return f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    yield arrancar
+    for servidor in servidores:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+@pytest.fixture
+def sin_espera(monkeypatch):
+    # Los reintentos no esperan: el backoff se prueba aparte
+    monkeypatch.setattr(detalles_http, "espera_backoff", lambda intento, *args: 0.0)
+
+
+def test_listado_paginado_completo(api_simulada):
+    base_url = api_simulada(empleos=95)
+    empleos, reporte = asyncio.run(obtener_listado(base_url=base_url, por_pagina=20, tasa=0))
+    assert [e["job_id"] for e in empleos] == [id_simulado(i) for i in range(95)]
+    assert reporte["total_informado"] == 95
+    assert reporte["paginas"] == 5
+    assert reporte["paginas_fallidas"] == []
+
+
+def test_listado_retoma_paginas_del_checkpoint(api_simulada, tmp_path):
+    base_url = api_simulada(empleos=60)
+    checkpoint = Checkpoint("listado", str(tmp_path))
+    # Página 1 de una corrida anterior, con otro tamaño de página: no sirve y se vuelve a pedir
+    checkpoint.agregar({"pagina": 1, "por_pagina": 50, "total": 60, "models": []})
+    # Página 2 ya descargada con el mismo tamaño: se reutiliza tal cual
+    checkpoint.agregar({"pagina": 2, "por_pagina": 20, "total": 60,
+                        "models": [{"job_id": f"retomado-{i}"} for i in range(20)]})
+
+    empleos, reporte = asyncio.run(obtener_listado(base_url=base_url, por_pagina=20, tasa=0, checkpoint=checkpoint))
+    ids = [e["job_id"] for e in empleos]
+    assert ids[:20] == [id_simulado(i) for i in range(20)]
+    assert ids[20:40] == [f"retomado-{i}" for i in range(20)]
+    assert ids[40:] == [id_simulado(i) for i in range(40, 60)]
+    assert reporte["paginas_retomadas"] == 1
+    # Las páginas descargadas quedan anotadas para una próxima corrida
+    assert {r["pagina"] for r in checkpoint.leer() if r["por_pagina"] == 20} == {1, 2, 3}
+
+
+def test_descarga_de_detalles_en_orden(api_simulada):
+    base_url = api_simulada()
+    job_ids = [id_simulado(i) for i in range(30)]
+    detalles, reporte = asyncio.run(obtener_detalles(job_ids, base_url=base_url, tasa=0, concurrencia=4))
+    assert detalles == [detalle_simulado(job_id) for job_id in job_ids]
+    assert reporte["descargados"] == 30
+    assert reporte["fallidos"] == []
+
+
+def test_detalles_reintenta_errores_del_servidor(api_simulada, sin_espera):
+    base_url = api_simulada(errores=0.3)
+    job_ids = [id_simulado(i) for i in range(30)]
+    detalles, reporte = asyncio.run(obtener_detalles(job_ids, base_url=base_url, tasa=0, reintentos=10))
+    assert len(detalles) == 30
+    assert reporte["fallidos"] == []
+    assert reporte["reintentos"] > 0
+
+
+def test_detalles_reporta_los_fallos_definitivos(api_simulada, sin_espera):
+    base_url = api_simulada(errores=1.0)
+    detalles, reporte = asyncio.run(obtener_detalles(["a", "b"], base_url=base_url, tasa=0, reintentos=2))
+    assert detalles == []
+    assert [fallo["job_id"] for fallo in reporte["fallidos"]] == ["a", "b"]
+    assert all(fallo["motivo"] == "servidor" and fallo["intentos"] == 3 for fallo in reporte["fallidos"])
+    assert reporte["fallidos_por_motivo"] == {"servidor": 2}
+
+
+def test_detalles_retoma_del_checkpoint(api_simulada, tmp_path):
+    base_url = api_simulada()
+    job_ids = [id_simulado(i) for i in range(10)]
+    checkpoint = Checkpoint("detalles", str(tmp_path))
+    for job_id in job_ids[:4]:
+        checkpoint.agregar({"job_id": job_id, "detalle": {"job_id": job_id, "retomado": True}})
+
+    detalles, reporte = asyncio.run(obtener_detalles(job_ids, base_url=base_url, tasa=0, checkpoint=checkpoint))
+    assert [d.get("retomado", False) for d in detalles] == [True] * 4 + [False] * 6
+    assert reporte["retomados"] == 4
+    assert reporte["descargados"] == 6
+    assert len(checkpoint.leer()) == 10
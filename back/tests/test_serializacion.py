@@ -0,0 +1,58 @@
+import gzip
+import json
+
+import pytest
+
+import serializacion
+from serializacion import CuerpoPrecomprimido, comprimir_para, dumps, elegir_codificacion
+
+DATOS = {"results": [{"id": "job-1", "title": "Analista de Datos Júnior", "salario": None}], "total": 1}
+
+
+def test_orjson_y_json_serializan_igual(monkeypatch):
+    pytest.importorskip("orjson")
+    con_orjson = dumps(DATOS)
+    monkeypatch.setattr(serializacion, "orjson", None)
+    assert dumps(DATOS) == con_orjson
+    assert json.loads(con_orjson) == DATOS
+
+
+def test_elegir_codificacion(monkeypatch):
+    monkeypatch.setattr(serializacion, "brotli", None)
+    assert elegir_codificacion("gzip, deflate, br") == "gzip"
+    assert elegir_codificacion("br;q=1.0, gzip;q=0") == "identity"
+    assert elegir_codificacion("*") == "gzip"
+    assert elegir_codificacion("") == "identity"
+
+
+def test_cuerpo_chico_no_se_comprime():
+    cuerpo = CuerpoPrecomprimido(b"{}")
+    assert cuerpo.variantes.keys() == {"identity"}
+    assert cuerpo.para("gzip") == (b"{}", "identity")
+
+
+def test_cuerpo_grande_precomprimido_con_gzip(monkeypatch):
+    monkeypatch.setattr(serializacion, "brotli", None)
+    original = dumps([DATOS] * 100)
+    cuerpo = CuerpoPrecomprimido(original)
+    comprimido, codificacion = cuerpo.para("gzip, deflate")
+    assert codificacion == "gzip"
+    assert gzip.decompress(comprimido) == original
+    assert cuerpo.para("gzip;q=0") == (original, "identity")
+
+
+def test_cuerpo_grande_precomprimido_con_brotli():
+    brotli = pytest.importorskip("brotli")
+    original = dumps([DATOS] * 100)
+    comprimido, codificacion = CuerpoPrecomprimido(original).para("gzip, br")
+    assert codificacion == "br"
+    assert brotli.decompress(comprimido) == original
+
+
+def test_compresion_al_vuelo_solo_gzip():
+    original = dumps([DATOS] * 100)
+    comprimido, codificacion = comprimir_para(original, "br, gzip")
+    assert codificacion == "gzip"
+    assert gzip.decompress(comprimido) == original
+    assert comprimir_para(original, "br") == (original, "identity")
+    assert comprimir_para(b"{}", "gzip") == (b"{}", "identity")
@@ -0,0 +1,57 @@
+import re
+import unicodedata
+
+# Palabras vacías que no cambian la intención de una búsqueda de empleo
+PALABRAS_VACIAS = {
+    "de", "del", "la", "las", "el", "los", "en", "para", "por", "y", "o", "un", "una",
+    "unos", "unas", "con", "a", "al", "que", "me", "mi", "busco", "quiero", "hay",
+}
+
+
+def plegar_acentos(texto: str) -> str:
+    """Quita tildes y diacríticos conservando la ñ"""
+    texto = texto.replace("ñ", "\0").replace("Ñ", "\1")
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_marcas = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_marcas.replace("\0", "ñ").replace("\1", "Ñ")
+
+
+def tokenizar(texto: str):
+    """Minúsculas, sin tildes y separado en palabras alfanuméricas"""
+    return re.findall(r"[a-z0-9ñ]+", plegar_acentos(texto.lower()))
+
+
+def normalizar_consulta(texto: str) -> str:
+    """Forma canónica de una consulta para usarla como clave de cache"""
+    return " ".join(t for t in tokenizar(texto) if t not in PALABRAS_VACIAS)
+
+
+# Sufijos que se recortan para reducir una palabra a su raíz, del más largo al más corto
+SUFIJOS = (
+    "amientos", "imientos", "amiento", "imiento", "aciones", "uciones", "adoras", "adores",
+    "ancias", "encias", "idades", "mente", "acion", "ucion", "adora", "ador", "ancia", "encia",
+    "idad", "istas", "ista", "antes", "ante", "ables", "ibles", "able", "ible", "ivas", "ivos",
+    "iva", "ivo", "osas", "osos", "osa", "oso", "ias", "ia", "es", "os", "as", "s", "a", "o", "e",
+)
+
+# Los sufijos derivativos (4 letras o más) solo se recortan si la raíz que queda es
+# larga: con raíces cortas "excelencia" acabaría igual que "excel" y "calidad" en "cal"
+LARGO_SUFIJO_DERIVATIVO = 4
+RAIZ_MINIMA_DERIVATIVA = 6
+
+
+def raiz(palabra: str) -> str:
+    """Stemmer ligero para español: recorta el sufijo más largo dejando al menos 3 letras
+    (6 si el sufijo es derivativo)"""
+    if len(palabra) <= 4 or palabra.isdigit():
+        return palabra
+    for sufijo in SUFIJOS:
+        minimo = RAIZ_MINIMA_DERIVATIVA if len(sufijo) >= LARGO_SUFIJO_DERIVATIVO else 3
+        if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= minimo:
+            return palabra[:-len(sufijo)]
+    return palabra
+
+
+def terminos(texto: str):
+    """Raíces de las palabras significativas del texto, para el índice BM25"""
+    return [raiz(t) for t in tokenizar(texto) if t not in PALABRAS_VACIAS]
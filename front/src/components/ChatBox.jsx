@@ -2,7 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import JobCard from './JobCard';
 import LoadingSpinner from './LoadingSpinner';
 import SuggestedQueries from './SuggestedQueries';
-import { searchJobs, chatWithBot } from '../services/api';
+import { searchJobs, chatWithBot, chatWithBotStream } from '../services/api';
 import config from '../config/config.js';
 import './ChatBox.css';
 
@@ -18,6 +18,7 @@ const ChatBox = () => {
   ]);
   const [inputText, setInputText] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef(null);
 
   // Auto-scroll al final de los mensajes
@@ -40,6 +41,46 @@ const ChatBox = () => {
     setInputText('');
 
     try {
+      // Chat en streaming: las tarjetas aparecen antes que el resumen del bot
+      if (!config.USE_MOCK_DATA && config.USE_STREAMING) {
+        const botId = Date.now() + 1;
+        const actualizarBot = (cambios) => {
+          setMessages(prev => prev.map(m => (m.id === botId ? { ...m, ...cambios } : m)));
+        };
+        let mostrado = false;
+        let textoParcial = '';
+
+        const chatResponse = await chatWithBotStream(inputText, {
+          onEmpleos: (empleos) => {
+            mostrado = true;
+            setIsStreaming(true);
+            setMessages(prev => [...prev, {
+              id: botId,
+              type: 'bot',
+              content: '',
+              jobs: empleos,
+              timestamp: new Date()
+            }]);
+          },
+          onToken: (_, acumulado) => {
+            textoParcial = acumulado;
+            actualizarBot({ content: acumulado });
+          }
+        });
+
+        if (chatResponse.success) {
+          actualizarBot({ content: chatResponse.respuesta });
+          return;
+        }
+        // Si ya se mostraron las tarjetas se conservan con el texto parcial y un aviso;
+        // solo si el stream falló antes de mostrar algo se usa el chat normal
+        if (mostrado) {
+          const aviso = config.CHAT_CONFIG.streamErrorMessage;
+          actualizarBot({ content: textoParcial ? `${textoParcial}\n\n${aviso}` : aviso });
+          return;
+        }
+      }
+
       // Primero intentar usar el chatbot inteligente
       if (!config.USE_MOCK_DATA) {
         const chatResponse = await chatWithBot(inputText);
@@ -80,6 +121,7 @@ const ChatBox = () => {
       setMessages(prev => [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
+      setIsStreaming(false);
     }
   };
 
@@ -118,7 +160,7 @@ const ChatBox = () => {
         {messages.map((message) => (
           <div key={message.id} className={`message ${message.type}`}>
             <div className="message-content">
-              <p>{message.content}</p>
+              {message.content && <p>{message.content}</p>}
               {message.jobs && (
                 <div className="jobs-container">
                   {message.jobs.map((job) => (
@@ -133,7 +175,7 @@ const ChatBox = () => {
           </div>
         ))}
         
-        {isLoading && (
+        {isLoading && !isStreaming && (
           <div className="message bot loading-message">
             <div className="message-content">
               <LoadingSpinner />
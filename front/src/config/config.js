@@ -5,12 +5,16 @@ export const config = {
   
   // Modo de desarrollo - usar datos de prueba
   USE_MOCK_DATA: false, // Ahora usamos el backend real con Groq
+
+  // Usar /chat/stream para mostrar los empleos antes de que termine la respuesta del bot
+  USE_STREAMING: true,
   
   // Configuración del chat
   CHAT_CONFIG: {
     welcomeMessage: '¡Hola! Soy Jobly, tu asistente para encontrar empleos. Escribe qué tipo de trabajo estás buscando y te ayudaré a encontrar las mejores oportunidades.',
     loadingMessage: 'Buscando empleos...',
-    errorMessage: 'Lo siento, hubo un error al buscar empleos. Por favor, intenta de nuevo.'
+    errorMessage: 'Lo siento, hubo un error al buscar empleos. Por favor, intenta de nuevo.',
+    streamErrorMessage: 'La respuesta se interrumpió. Estos son los empleos encontrados; intenta de nuevo para obtener el resumen completo.'
   },
   
   // Configuración de la interfaz
@@ -119,6 +119,73 @@ export const chatWithBot = async (mensaje) => {
   }
 };
 
+// Función para chatear en streaming (SSE): primero llegan los empleos y luego el texto del bot
+export const chatWithBotStream = async (mensaje, { onEmpleos, onToken } = {}) => {
+  try {
+    const response = await fetch(`${BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ mensaje })
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`Respuesta inválida del servidor: ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let respuesta = '';
+    let empleos = null;
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      // Cada evento SSE termina con una línea en blanco
+      let separador;
+      while ((separador = buffer.indexOf('\n\n')) !== -1) {
+        const bloque = buffer.slice(0, separador);
+        buffer = buffer.slice(separador + 2);
+
+        let evento = 'message';
+        let datos = '';
+        for (const linea of bloque.split('\n')) {
+          if (linea.startsWith('event:')) evento = linea.slice(6).trim();
+          else if (linea.startsWith('data:')) datos += linea.slice(5).trim();
+        }
+        if (!datos) continue;
+        const payload = JSON.parse(datos);
+
+        if (evento === 'empleos') {
+          empleos = payload.empleos || null;
+          onEmpleos?.(empleos);
+        } else if (evento === 'token') {
+          respuesta += payload.texto;
+          onToken?.(payload.texto, respuesta);
+        } else if (evento === 'fin') {
+          respuesta = payload.respuesta;
+        }
+      }
+    }
+
+    return {
+      respuesta,
+      empleos,
+      success: true
+    };
+  } catch (error) {
+    console.error('Error al chatear con el bot en streaming:', error);
+    return {
+      respuesta: "Lo siento, hubo un error al procesar tu consulta. Por favor, intenta de nuevo.",
+      success: false
+    };
+  }
+};
+
 // Función principal que decide si usar datos reales o mock
 export const searchJobs = async (queryText) => {
   if (config.USE_MOCK_DATA) {